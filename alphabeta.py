@@ -0,0 +1,174 @@
+"""module for AlphaBeta class
+"""
+from typing import Any, Callable, Dict, Hashable, List
+import time
+from game import Game
+from game_state import GameState
+from solver import default_key
+
+# The score of a won position; wins found sooner score higher.
+WIN_SCORE = 1000
+
+
+def no_evaluation(state: GameState) -> float:
+    """Return 0.0, an evaluation that knows nothing about state
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> no_evaluation(SubtractSquareState('p1', 8))
+    0.0
+    """
+    return 0.0
+
+
+def largest_first(state: GameState, moves: List[Any]) -> List[Any]:
+    """Return moves with the largest first if they are numbers, such as the
+    squares of a subtract square game, and in their own order otherwise
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> largest_first(SubtractSquareState('p1', 10), [1, 4, 9])
+    [9, 4, 1]
+    >>> largest_first(SubtractSquareState('p1', 10), ['ll', 'rl'])
+    ['ll', 'rl']
+    """
+    if moves and all(isinstance(move, int) for move in moves):
+        return sorted(moves, reverse=True)
+    return list(moves)
+
+
+class AlphaBeta:
+    """An iterative-deepening alpha-beta player for a two-player, sequential
+    move, zero-sum, perfect-information game
+
+    Each move is searched to depth 1, 2, 3, ... until the deadline passes,
+    and the best move of the deepest completed search is played. The best
+    move of every position found by one depth is tried first by the next,
+    which makes alpha-beta cut off more of the tree.
+
+    Positions at the depth limit are scored by evaluate, from the point of
+    view of the player about to move, between -1.0 and 1.0. A position that
+    is over is lost by the player about to move.
+
+    seconds - the wall-clock seconds per move
+    max_depth - the deepest search per move
+    evaluate - the evaluation of positions at the depth limit
+    order_moves - returns a new list of the moves of a position in the order
+        to try them, after the best move from the previous depth
+    key - the function that maps a state to its position key
+    nodes - the number of positions searched so far
+    depth - the depth of the last completed search
+    """
+    seconds: float
+    max_depth: int
+    evaluate: Callable[[GameState], float]
+    order_moves: Callable[[GameState, List[Any]], List[Any]]
+    key: Callable[[GameState], Hashable]
+    nodes: int
+    depth: int
+    _best_moves: Dict[Hashable, Any]
+    _deadline: float
+    _cut_off: bool
+
+    def __init__(self, seconds: float = 1.0, max_depth: int = 64,
+                 evaluate: Callable[[GameState], float] = no_evaluation,
+                 order_moves: Callable[[GameState, List[Any]], List[Any]]
+                 = largest_first,
+                 key: Callable[[GameState], Hashable] = default_key) -> None:
+        """Initialize a new player
+
+        >>> a = AlphaBeta(seconds=0.5)
+        >>> a.nodes, a.depth
+        (0, 0)
+        """
+        self.seconds = seconds
+        self.max_depth = max_depth
+        self.evaluate = evaluate
+        self.order_moves = order_moves
+        self.key = key
+        self.nodes = 0
+        self.depth = 0
+        self._best_moves = {}
+        self._deadline = 0.0
+        self._cut_off = False
+
+    def __str__(self) -> str:
+        """Return a summary of the statistics of self
+
+        >>> print(AlphaBeta())
+        AlphaBeta: depth 0, 0 nodes searched
+        """
+        return "AlphaBeta: depth {}, {} nodes searched".format(self.depth,
+                                                               self.nodes)
+
+    def choose_move(self, game: Game, state: GameState) -> Any:
+        """Return the best move of state found before the deadline
+
+        The search stops early once a win is proven or the whole game tree
+        fits within the depth searched.
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> a = AlphaBeta(seconds=1.0)
+        >>> a.choose_move(Chopsticks(True), ChopsticksState('p1', [1, 2],
+        ...                                                 [3, 0]))
+        'rl'
+        >>> a.depth
+        1
+        """
+        self._deadline = time.perf_counter() + self.seconds
+        self._best_moves.clear()
+        moves = self.order_moves(state, state.get_possible_moves())
+        best = moves[0] if moves else None
+        self.depth = 0
+        for depth in range(1, self.max_depth + 1):
+            self._cut_off = False
+            try:
+                score = self._negamax(game, state, depth, -WIN_SCORE - 1,
+                                      WIN_SCORE + 1, 0)
+            except _Timeout:
+                break
+            best = self._best_moves.get(self.key(state), best)
+            self.depth = depth
+            if abs(score) > 1 or not self._cut_off:
+                break
+        return best
+
+    def _negamax(self, game: Game, state: GameState, depth: int,
+                 alpha: float, beta: float, ply: int) -> float:
+        """Return the score of state for the player about to move, searched
+        depth moves deep within the window (alpha, beta)
+        """
+        self.nodes += 1
+        if not self.nodes % 1024 and time.perf_counter() > self._deadline:
+            raise _Timeout
+        if game.is_over(state):
+            return -(WIN_SCORE - ply)
+        if depth == 0:
+            self._cut_off = True
+            return self.evaluate(state)
+        key = self.key(state)
+        moves = self.order_moves(state, state.get_possible_moves())
+        previous = self._best_moves.get(key)
+        if previous is not None and previous in moves:
+            moves.remove(previous)
+            moves.insert(0, previous)
+        best_score = -WIN_SCORE - 1
+        for move in moves:
+            score = -self._negamax(game, state.make_move(move), depth - 1,
+                                   -beta, -alpha, ply + 1)
+            if score > best_score:
+                best_score = score
+                self._best_moves[key] = move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        return best_score
+
+
+class _Timeout(Exception):
+    """Raised inside a search of AlphaBeta when its deadline has passed
+    """
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
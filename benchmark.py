@@ -0,0 +1,372 @@
+"""module for benchmarks of game states, full games, chopsticks variants and
+startup
+
+Run it to print the timings, save them as a baseline, or compare them with a
+saved baseline:
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json --threshold 0.2
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from subtract_square_state import SubtractSquareState
+from chopstick_state import ChopsticksState
+
+FORMAT_VERSION = 1
+# The starting values of the subtract square micro-benchmarks.
+SUBTRACT_SQUARE_VALUES = (100, 10 ** 4, 10 ** 6, 4 * 10 ** 6)
+# The modulus, hands and splits of the chopsticks variants benchmarked, to
+# show how the cost of generating and solving grows with the rules.
+CHOPSTICKS_VARIANTS = ((5, 2, False), (5, 2, True), (7, 2, True),
+                       (10, 2, True), (4, 3, True), (5, 3, False))
+# The code timed by the startup benchmarks, each in a new interpreter.
+STARTUP_CODE = (
+    ('python', 'pass'),
+    ('import game_interface', 'import game_interface'),
+    ('menus', 'import game_interface as g; str(g.playable_games); '
+              'str(g.usable_strategies)'),
+    ('select s r-r', 'import game_interface as g; g.playable_games["s"]; '
+                     'g.usable_strategies["r"]'),
+    ('select every game and strategy',
+     'import game_interface as g; list(g.playable_games.values()); '
+     'list(g.usable_strategies.values())'))
+# The strategies that keep engines, such as the solver table, between games.
+ENGINE_STRATEGIES = {'m', 't', 'p', 'u'}
+# A benchmark is a name and a function that runs the operation measured once.
+Benchmark = Tuple[str, Callable[[], Any]]
+
+
+class _CachedSubtractSquareState(SubtractSquareState):
+    """A subtract square state whose moves are cached, benchmarked next to
+    the uncached ones
+    """
+
+
+def state_benchmarks() -> Iterator[Benchmark]:
+    """Yield the micro-benchmarks of the operations of game states, and of
+    subtract square move generation through the move cache
+
+    >>> names = [name for name, _ in state_benchmarks()]
+    >>> names[0]
+    'subtract_square[100].get_possible_moves'
+    >>> len(names)
+    64
+    """
+    _CachedSubtractSquareState.enable_move_cache()
+    for value in SUBTRACT_SQUARE_VALUES:
+        state = SubtractSquareState('p1', value)
+        prefix = "subtract_square[{}]".format(value)
+        yield from _state_operations(prefix, state,
+                                     SubtractSquareState('p1', value),
+                                     state.get_possible_moves()[-1])
+        cached = _CachedSubtractSquareState('p1', value)
+        yield (prefix + ".get_possible_moves[cached]",
+               cached.get_possible_moves)
+        yield (prefix + ".is_valid_move[cached]",
+               _valid_move(cached, state.get_possible_moves()[-1]))
+    for name, p1_state, p2_state in (('start', [1, 1], [1, 1]),
+                                     ('middle', [3, 4], [2, 1]),
+                                     ('end', [0, 4], [1, 0])):
+        state = ChopsticksState('p1', p1_state, p2_state)
+        yield from _state_operations("chopsticks[{}]".format(name), state,
+                                     ChopsticksState('p1', p1_state, p2_state),
+                                     state.get_possible_moves()[-1])
+
+
+def game_benchmarks() -> Iterator[Benchmark]:
+    """Yield the macro-benchmarks of full games between strategies, each
+    timing a batch of games with a fixed seed
+
+    The engines of strategy.py are shared by every batch, so after the first
+    run a batch of a strategy in ENGINE_STRATEGIES mostly looks up positions
+    solved before. Each of those batches is timed warm, as it comes, and
+    cold, after strategy.reset_engines, as in a new process.
+
+    alpha_beta_strategy is left out, since it always searches until its
+    deadline.
+
+    >>> names = [name for name, _ in game_benchmarks()]
+    >>> names[0]
+    'games[s=1000,r-r]'
+    >>> names[2:4]
+    ['games[s=1000,m-r]', 'games[s=1000,m-r][cold]']
+    """
+    from simulator import simulate
+    from playouts import batched_playouts
+    for game_key, config, p1_key, p2_key, n_games in (
+            ('s', {'starting_value': 1000}, 'r', 'r', 20),
+            ('c', {}, 'r', 'r', 20),
+            ('s', {'starting_value': 1000}, 'm', 'r', 20),
+            ('s', {'starting_value': 10 ** 5}, 't', 'r', 20),
+            ('c', {}, 'p', 'r', 20),
+            ('s', {'starting_value': 200}, 'u', 'r', 2)):
+        name = "games[{}{},{}-{}]".format(
+            game_key, "".join("={}".format(v) for v in config.values()),
+            p1_key, p2_key)
+        batch = _game_batch(simulate, game_key, p1_key, p2_key, n_games,
+                            config)
+        yield name, batch
+        if {p1_key, p2_key} & ENGINE_STRATEGIES:
+            yield name + "[cold]", _cold(batch)
+    yield ("playouts[s=1000,batched]",
+           lambda: batched_playouts([1000], 20, seed=0))
+
+
+def variant_benchmarks() -> Iterator[Benchmark]:
+    """Yield the benchmarks of each chopsticks variant in CHOPSTICKS_VARIANTS,
+    timed from fresh rules, so that nothing is cached: generating the moves
+    of every position reachable from the start, and solving them all, which
+    only visits one position of each set that differs by the order of hands
+
+    >>> names = [name for name, _ in variant_benchmarks()]
+    >>> names[:3]
+    ['variant[m=5,h=2].moves', 'variant[m=5,h=2].solve', \
+'variant[m=5,h=2,splits].moves']
+    """
+    for modulus, hands, splits in CHOPSTICKS_VARIANTS:
+        name = "variant[m={},h={}{}]".format(modulus, hands,
+                                             ",splits" if splits else "")
+        yield name + ".moves", _variant_moves(modulus, hands, splits)
+        yield name + ".solve", _variant_solve(modulus, hands, splits)
+
+
+def startup_benchmarks() -> Iterator[Benchmark]:
+    """Yield the benchmarks of starting game_interface in a new interpreter,
+    listing its menus and picking a game and its strategies, next to the
+    cost of starting python itself
+
+    >>> names = [name for name, _ in startup_benchmarks()]
+    >>> names[:2]
+    ['startup[python]', 'startup[import game_interface]']
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name, code in STARTUP_CODE:
+        yield "startup[{}]".format(name), _interpreter(code, directory)
+
+
+def run(benchmarks: Iterator[Benchmark], repeat: int = 5,
+        pattern: str = '') -> Dict[str, float]:
+    """Return the best seconds per run of each benchmark of benchmarks whose
+    name contains pattern, out of repeat timings
+
+    >>> r = run(state_benchmarks(), 1, 'chopsticks[start].__eq__')
+    >>> list(r)
+    ['chopsticks[start].__eq__']
+    """
+    results = {}
+    for name, function in benchmarks:
+        if pattern not in name:
+            continue
+        timer = timeit.Timer(function)
+        number, _ = timer.autorange()
+        results[name] = min(timer.repeat(repeat, number)) / number
+    return results
+
+
+def save(results: Dict[str, float], path: str) -> None:
+    """Save results to a JSON baseline file at path
+    """
+    with open(path, 'w') as f:
+        json.dump({'version': FORMAT_VERSION,
+                   'python': platform.python_version(),
+                   'machine': platform.machine(),
+                   'results': results}, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> Dict[str, float]:
+    """Return the results saved in the JSON baseline file at path
+
+    Raise ValueError if the file is not a baseline of this version.
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('version') != FORMAT_VERSION:
+        raise ValueError("{} is not a version {} benchmark baseline".format(
+            path, FORMAT_VERSION))
+    return baseline['results']
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float],
+            threshold: float) -> List[str]:
+    """Return the names of the benchmarks in both results and baseline that
+    are slower in results by more than the fraction threshold
+
+    >>> compare({'a': 1.3, 'b': 1.0, 'c': 2.0}, {'a': 1.0, 'b': 1.0}, 0.2)
+    ['a']
+    """
+    return [name for name in results
+            if name in baseline
+            and results[name] > baseline[name] * (1 + threshold)]
+
+
+def report(results: Dict[str, float],
+           baseline: Optional[Dict[str, float]] = None) -> str:
+    """Return a table of results, with the change from baseline if given
+
+    >>> print(report({'a': 0.002}, {'a': 0.001}))
+    a                                                      2000.000 us  +100.0%
+    """
+    lines = []
+    for name, seconds in results.items():
+        line = "{:<50} {:>12.3f} us".format(name, seconds * 1e6)
+        if baseline is not None and baseline.get(name):
+            line += "  {:+.1%}".format(seconds / baseline[name] - 1)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _state_operations(prefix: str, state: Any, equal: Any,
+                      move: Any) -> Iterator[Benchmark]:
+    """Yield the benchmarks of the operations of state, which is equal to
+    equal and has move as a valid move
+    """
+    yield prefix + ".get_possible_moves", state.get_possible_moves
+    yield prefix + ".is_valid_move", lambda: state.is_valid_move(move)
+    yield prefix + ".make_move", lambda: state.make_move(move)
+    yield prefix + ".__eq__", lambda: state == equal
+    yield prefix + ".__hash__", lambda: hash(state)
+    table = {equal: 0}
+    yield prefix + ".dict_lookup", lambda: table[state]
+    # The key solvers used before states were hashable, for comparison.
+    string_table = {(equal.current_player, str(equal)): 0}
+    yield (prefix + ".dict_lookup[str key]",
+           lambda: string_table[state.current_player, str(state)])
+    walker = state.copy()
+    yield (prefix + ".apply_move+undo_move",
+           lambda: walker.undo_move(walker.apply_move(move)))
+
+
+def _valid_move(state: Any, move: Any) -> Callable[[], Any]:
+    """Return a function that checks whether move is valid for state
+    """
+    return lambda: state.is_valid_move(move)
+
+
+def _game_batch(simulate: Callable[..., Any], game_key: str, p1_key: str,
+                p2_key: str, n_games: int,
+                config: Dict[str, Any]) -> Callable[[], Any]:
+    """Return a function that plays one seeded batch of games
+    """
+    return lambda: simulate(game_key, p1_key, p2_key, n_games, config,
+                            seed=0)
+
+
+def _cold(batch: Callable[[], Any]) -> Callable[[], Any]:
+    """Return a function that plays batch after resetting the engines of
+    strategy.py
+    """
+    from strategy import reset_engines
+
+    def play() -> Any:
+        reset_engines()
+        return batch()
+    return play
+
+
+def _variant_moves(modulus: int, hands: int,
+                   splits: bool) -> Callable[[], Any]:
+    """Return a function that generates the moves of every position reachable
+    from the start of a chopsticks variant from fresh rules
+    """
+    from general_chopsticks_state import ChopsticksRules
+
+    def generate() -> None:
+        rules = ChopsticksRules(modulus, hands, splits)
+        stack = [rules.encode('p1', [1] * hands, [1] * hands)]
+        seen = set(stack)
+        while stack:
+            for code in rules.successors(stack.pop()).values():
+                if code not in seen:
+                    seen.add(code)
+                    stack.append(code)
+    return generate
+
+
+def _variant_solve(modulus: int, hands: int,
+                   splits: bool) -> Callable[[], Any]:
+    """Return a function that solves every position reachable from the start
+    of a chopsticks variant from fresh rules
+    """
+    from general_chopsticks import GeneralChopsticks
+    from general_chopsticks_state import ChopsticksRules, \
+        GeneralChopsticksState
+    from retrograde import RetrogradeSolver
+
+    def solve() -> None:
+        # The rules of a new game are shared with earlier games, so the game
+        # is given fresh ones to solve from nothing.
+        game = GeneralChopsticks(True, modulus, hands, splits)
+        game.rules = ChopsticksRules(modulus, hands, splits)
+        game.current_state = GeneralChopsticksState(
+            game.rules, 'p1', [1] * hands, [1] * hands)
+        RetrogradeSolver(game, [game.current_state])
+    return solve
+
+
+def _interpreter(code: str, directory: str) -> Callable[[], Any]:
+    """Return a function that runs code in a new interpreter in directory
+    """
+    return lambda: subprocess.run([sys.executable, '-c', code],
+                                  cwd=directory, check=True)
+
+
+def _parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """Return the command line arguments of a benchmark run
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark game state operations, full games, "
+                    "chopsticks variants and startup.")
+    parser.add_argument('-k', '--filter', default='',
+                        help="only run benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-games', action='store_true',
+                        help="skip the full-game benchmarks")
+    parser.add_argument('--no-variants', action='store_true',
+                        help="skip the chopsticks variant benchmarks")
+    parser.add_argument('--no-startup', action='store_true',
+                        help="skip the startup benchmarks")
+    parser.add_argument('--save', metavar='PATH',
+                        help="save the results as a baseline")
+    parser.add_argument('--compare', metavar='PATH',
+                        help="compare the results with a saved baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="the slowdown that counts as a regression")
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """Run the benchmarks chosen by the command line args and return the exit
+    status, which is 1 if any benchmark regressed from the baseline
+    """
+    options = _parse_args(args)
+    benchmarks = [state_benchmarks()]
+    if not options.no_games:
+        benchmarks.append(game_benchmarks())
+    if not options.no_variants:
+        benchmarks.append(variant_benchmarks())
+    if not options.no_startup:
+        benchmarks.append(startup_benchmarks())
+    results = {}
+    for group in benchmarks:
+        results.update(run(group, options.repeat, options.filter))
+    baseline = load(options.compare) if options.compare else None
+    print(report(results, baseline))
+    if options.save:
+        save(results, options.save)
+    if baseline is not None:
+        regressions = compare(results, baseline, options.threshold)
+        for name in regressions:
+            print("REGRESSION: {} is {:.1%} slower than the baseline".format(
+                name, results[name] / baseline[name] - 1))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,116 @@
 """module for ChopsticksState class
 """
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 from game_state import GameState
 
+# Hands are worth 0 to 4; a hand worth 5 is dead, the same as 0.
+MODULUS = 5
+# A position is packed into one integer, its code:
+# player * 625 + p1_left * 125 + p1_right * 25 + p2_left * 5 + p2_right
+STATE_COUNT = 2 * MODULUS ** 4
+PLAYERS = ('p1', 'p2')
+MOVES = ('ll', 'lr', 'rl', 'rr')
+# Swapping a player's left and right hands gives a strategically identical
+# position, so each position has up to four mirror images: SWAP_P1 and
+# SWAP_P2 are the bits of a symmetry that swap the hands of each player.
+SWAP_P1 = 1
+SWAP_P2 = 2
+
+
+def encode(current_player: str, p1_state: List[int],
+           p2_state: List[int]) -> int:
+    """Return the code of the chopsticks position with current_player about to
+    move and hands p1_state and p2_state
+
+    >>> encode('p1', [1, 1], [1, 1])
+    156
+    >>> encode('p2', [0, 0], [0, 1])
+    626
+    """
+    code = 0 if current_player == 'p1' else 1
+    for hand in (p1_state[0], p1_state[1], p2_state[0], p2_state[1]):
+        code = code * MODULUS + hand % MODULUS
+    return code
+
+
+def decode(code: int) -> Tuple[str, List[int], List[int]]:
+    """Return the current player and the hands of both players of the
+    chopsticks position with code code
+
+    >>> decode(626)
+    ('p2', [0, 0], [0, 1])
+    """
+    hands = []
+    for _ in range(4):
+        hands.append(code % MODULUS)
+        code //= MODULUS
+    return PLAYERS[code], [hands[3], hands[2]], [hands[1], hands[0]]
+
+
+def mirror(code: int, symmetry: int) -> int:
+    """Return the code of the position with code code after swapping the
+    hands of the players chosen by the bits of symmetry
+
+    >>> mirror(encode('p1', [1, 2], [3, 4]), SWAP_P1) == \\
+    ...     encode('p1', [2, 1], [3, 4])
+    True
+    >>> mirror(encode('p2', [1, 2], [3, 4]), SWAP_P1 | SWAP_P2) == \\
+    ...     encode('p2', [2, 1], [4, 3])
+    True
+    """
+    current_player, p1_state, p2_state = decode(code)
+    if symmetry & SWAP_P1:
+        p1_state.reverse()
+    if symmetry & SWAP_P2:
+        p2_state.reverse()
+    return encode(current_player, p1_state, p2_state)
+
+
+def canonical_code(code: int) -> int:
+    """Return the code of the canonical position of the position with code
+    code, the smallest code among its mirror images
+
+    >>> canonical_code(encode('p1', [2, 1], [0, 3])) == \\
+    ...     encode('p1', [1, 2], [0, 3])
+    True
+    """
+    return _CANONICAL[code]
+
+
+def canonical_index(code: int) -> int:
+    """Return the index in CANONICAL_CODES of the canonical position of the
+    position with code code
+
+    >>> CANONICAL_CODES[canonical_index(156)]
+    156
+    """
+    return _CANONICAL_INDEX[code]
+
 
 class ChopsticksState(GameState):
     """The current state of a chopsticks game
+
+    A chopsticks game has only STATE_COUNT positions, so every position is
+    packed into one integer and interned: creating a state returns the one
+    shared instance of its position. The legal moves and the state after each
+    move are precomputed for every position, so get_possible_moves,
+    is_valid_move and make_move are table lookups that allocate nothing.
+
+    Hand values are stored modulo 5.
     """
-    current_value: Dict[str, List[int]]
-    p1_left: int
-    p1_right: int
-    p2_left: int
-    p2_right: int
+    __slots__ = ('_code',)
+    _code: int
+
+    def __new__(cls, current_player: str, p1_state: List[int],
+                p2_state: List[int]) -> 'ChopsticksState':
+        """Return the shared state of the position with current_player about
+        to move and hands p1_state and p2_state
+
+        >>> ChopsticksState('p1', [1, 2], [3, 4]) is \\
+        ...     ChopsticksState('p1', [1, 2], [3, 4])
+        True
+        """
+        return _STATES[encode(current_player, p1_state, p2_state)]
 
     def __init__(self, current_player: str, p1_state: List[int],
                  p2_state: List[int]) -> None:
@@ -26,6 +125,9 @@ class ChopsticksState(GameState):
         p2_left - the value of the left hand of player 2
         p2_right - the value of the right hand of player 2
 
+        The shared instance returned by __new__ is already initialized, so
+        there is nothing left to do.
+
         >>> s = ChopsticksState('p2', [1, 1], [2, 1])
         >>> s.current_value
         {'p1': [1, 1], 'p2': [2, 1]}
@@ -34,12 +136,67 @@ class ChopsticksState(GameState):
         >>> s.p2_left
         2
         """
-        self.current_value = {'p1': p1_state[:], 'p2': p2_state[:]}
-        self.p1_left = p1_state[0]
-        self.p1_right = p1_state[1]
-        self.p2_left = p2_state[0]
-        self.p2_right = p2_state[1]
-        super().__init__(current_player)
+        # pylint: disable=super-init-not-called
+
+    @classmethod
+    def from_code(cls, code: int) -> 'ChopsticksState':
+        """Return the shared state of the position with code code
+
+        >>> print(ChopsticksState.from_code(626))
+        Player 1: Left 0 - 0 Right; Player 2: Left 0 - 1 Right
+        """
+        return _STATES[code]
+
+    @property
+    def code(self) -> int:
+        """The integer that self is packed into
+
+        >>> ChopsticksState('p1', [1, 1], [1, 1]).code
+        156
+        """
+        return self._code
+
+    @property
+    def current_value(self) -> Dict[str, List[int]]:
+        """The hands of both players, as {'p1': [left, right], 'p2': [...]}
+        """
+        _, p1_state, p2_state = decode(self._code)
+        return {'p1': p1_state, 'p2': p2_state}
+
+    @property
+    def p1_left(self) -> int:
+        """The value of the left hand of player 1
+        """
+        return self._code // 125 % MODULUS
+
+    @property
+    def p1_right(self) -> int:
+        """The value of the right hand of player 1
+        """
+        return self._code // 25 % MODULUS
+
+    @property
+    def p2_left(self) -> int:
+        """The value of the left hand of player 2
+        """
+        return self._code // 5 % MODULUS
+
+    @property
+    def p2_right(self) -> int:
+        """The value of the right hand of player 2
+        """
+        return self._code % MODULUS
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Return how to pickle self, so that unpickling returns the shared
+        state of the same position
+
+        >>> import pickle
+        >>> s = ChopsticksState('p2', [1, 3], [2, 4])
+        >>> pickle.loads(pickle.dumps(s)) is s
+        True
+        """
+        return ChopsticksState.from_code, (self._code,)
 
     def __str__(self) -> str:
         """Return a string representation of current_value
@@ -68,15 +225,78 @@ class ChopsticksState(GameState):
         >>> s == ChopsticksState('p2', [1, 3], [2, 4])
         True
         """
-        return (type(self) == type(other)
-                and self.current_value == other.current_value
-                and self.current_player == other.current_player)
+        return self is other or (type(self) == type(other)
+                                 and self._code == other._code)
+
+    def __hash__(self) -> int:
+        """Return the hash of self, which is its code: a perfect hash, carried
+        through make_move by the precomputed table of next states
+
+        >>> hash(ChopsticksState('p1', [1, 1], [1, 1]))
+        156
+        """
+        return self._code
+
+    def canonical(self) -> 'ChopsticksState':
+        """Return the shared state of the canonical position of self, the
+        mirror image of self with the smallest code
+
+        Overrides GameState.canonical
+
+        >>> a = ChopsticksState('p1', [3, 1], [2, 0])
+        >>> print(a.canonical())
+        Player 1: Left 1 - 3 Right; Player 2: Left 0 - 2 Right
+        >>> a.canonical() is ChopsticksState('p1', [1, 3], [0, 2]).canonical()
+        True
+        """
+        return _STATES[_CANONICAL[self._code]]
+
+    def canonical_move(self, move: str) -> str:
+        """Return the move of self.canonical() that corresponds to move of self
+
+        Overrides GameState.canonical_move
+
+        >>> a = ChopsticksState('p1', [3, 1], [2, 0])
+        >>> a.canonical_move('ll')
+        'rr'
+        >>> a.make_move('ll').canonical() is \\
+        ...     a.canonical().make_move('rr').canonical()
+        True
+        """
+        symmetry = _SYMMETRY[self._code]
+        if not symmetry:
+            return move
+        if self.current_player == 'p2':
+            symmetry = (symmetry & SWAP_P1) << 1 | (symmetry & SWAP_P2) >> 1
+        attacker, target = move
+        if symmetry & SWAP_P1:
+            attacker = 'r' if attacker == 'l' else 'l'
+        if symmetry & SWAP_P2:
+            target = 'r' if target == 'l' else 'l'
+        return attacker + target
+
+    def from_canonical_move(self, move: str) -> str:
+        """Return the move of self that corresponds to move of
+        self.canonical()
+
+        Overrides GameState.from_canonical_move
+
+        Every symmetry is its own inverse, so this maps moves the same way as
+        canonical_move.
+
+        >>> ChopsticksState('p1', [3, 1], [2, 0]).from_canonical_move('rr')
+        'll'
+        """
+        return self.canonical_move(move)
 
     def get_possible_moves(self) -> list:
         """Return all possible moves for a chopsticks game
 
         Overrides GameState.get_possible_moves
 
+        The returned list is shared by every call for the same position and
+        must not be modified.
+
         >>> a = ChopsticksState('p2', [1, 3], [2, 0])
         >>> a.get_possible_moves()
         ['ll', 'lr']
@@ -87,30 +307,7 @@ class ChopsticksState(GameState):
         >>> c.get_possible_moves()
         []
         """
-        result = []
-        if self.current_player == 'p1':
-            if self.p1_left % 5 != 0:
-                if self.p2_left % 5 != 0:
-                    result.append('ll')
-                if self.p2_right % 5 != 0:
-                    result.append('lr')
-            if self.p1_right % 5 != 0:
-                if self.p2_left % 5 != 0:
-                    result.append('rl')
-                if self.p2_right % 5 != 0:
-                    result.append('rr')
-        else:
-            if self.p2_left % 5 != 0:
-                if self.p1_left % 5 != 0:
-                    result.append('ll')
-                if self.p1_right % 5 != 0:
-                    result.append('lr')
-            if self.p2_right % 5 != 0:
-                if self.p1_left % 5 != 0:
-                    result.append('rl')
-                if self.p1_right % 5 != 0:
-                    result.append('rr')
-        return result
+        return _MOVES[self._code]
 
     def is_valid_move(self, move_to_make: str) -> bool:
         """Return whether move_to_make is a valid move
@@ -124,8 +321,10 @@ class ChopsticksState(GameState):
         True
         >>> b.is_valid_move('rm')
         False
+        >>> b.is_valid_move(None)
+        False
         """
-        return move_to_make in self.get_possible_moves()
+        return move_to_make in _NEXT[self._code]
 
     def make_move(self, move: str) -> 'ChopsticksState':
         """Apply the valid move
@@ -139,40 +338,114 @@ class ChopsticksState(GameState):
         >>> c.current_player
         'p2'
         """
-        if self.current_player == 'p2':
-            if move[0] == 'r':
-                if move[1] == 'r':
-                    p1_right = (self.p1_right + self.p2_right) % 5
-                    return ChopsticksState('p1', [self.p1_left, p1_right],
-                                           self.current_value['p2'])
-                p1_left = (self.p1_left + self.p2_right) % 5
-                return ChopsticksState('p1', [p1_left, self.p1_right],
-                                       self.current_value['p2'])
-            else:
-                if move[1] == 'r':
-                    p1_right = (self.p1_right + self.p2_left) % 5
-                    return ChopsticksState('p1', [self.p1_left, p1_right],
-                                           self.current_value['p2'])
-                p1_left = (self.p1_left + self.p2_left) % 5
-                return ChopsticksState('p1', [p1_left, self.p1_right],
-                                       self.current_value['p2'])
-        else:
-            if move[0] == 'r':
-                if move[1] == 'r':
-                    p2_right = (self.p1_right + self.p2_right) % 5
-                    return ChopsticksState('p2', self.current_value['p1'],
-                                           [self.p2_left, p2_right])
-                p2_left = (self.p1_right + self.p2_left) % 5
-                return ChopsticksState('p2', self.current_value['p1'],
-                                       [p2_left, self.p2_right])
+        return _NEXT[self._code][move]
+
+    def copy(self) -> 'ChopsticksState':
+        """Return a new state equal to self that apply_move may change
+
+        Overrides GameState.copy
+
+        The copy is not interned, so it must not be used as a dict key or set
+        member while it changes.
+
+        >>> a = ChopsticksState('p1', [4, 3], [2, 0])
+        >>> b = a.copy()
+        >>> b == a and b is not a
+        True
+        """
+        return _build_state(self._code)
+
+    def apply_move(self, move: str) -> int:
+        """Apply the valid move to self in place, and return what undo_move
+        needs to take it back
+
+        Overrides GameState.apply_move
+
+        Raise ValueError if self is a shared state rather than a copy.
+
+        >>> a = ChopsticksState('p1', [4, 3], [2, 0]).copy()
+        >>> undo = a.apply_move('ll')
+        >>> a == ChopsticksState('p2', [4, 3], [1, 0])
+        True
+        >>> a.undo_move(undo)
+        >>> a == ChopsticksState('p1', [4, 3], [2, 0])
+        True
+        >>> ChopsticksState('p1', [4, 3], [2, 0]).apply_move('ll')
+        Traceback (most recent call last):
+        ...
+        ValueError: apply_move needs a copy of a shared ChopsticksState
+        """
+        if _STATES[self._code] is self:
+            raise ValueError("apply_move needs a copy of a shared " +
+                             "ChopsticksState")
+        undo = self._code
+        next_state = _NEXT[undo][move]
+        self._code = next_state._code
+        self.current_player = next_state.current_player
+        return undo
+
+    def undo_move(self, undo: int) -> None:
+        """Take back the last move applied to self, where undo is what
+        apply_move returned for it
+
+        Overrides GameState.undo_move
+        """
+        previous = _STATES[undo]
+        self._code = undo
+        self.current_player = previous.current_player
+
+
+def _build_state(code: int) -> ChopsticksState:
+    """Return a new state of the position with code code, bypassing the
+    interning in ChopsticksState.__new__
+    """
+    state = object.__new__(ChopsticksState)
+    state.current_player = PLAYERS[code // MODULUS ** 4]
+    state._code = code
+    return state
+
+
+def _build_moves(code: int) -> Dict[str, ChopsticksState]:
+    """Return a mapping from each legal move of the position with code code to
+    the state after that move
+    """
+    current_player, p1_state, p2_state = decode(code)
+    own, other, next_player = p1_state, p2_state, 'p2'
+    if current_player == 'p2':
+        own, other, next_player = p2_state, p1_state, 'p1'
+    result = {}
+    for move in MOVES:
+        attacker = own['lr'.index(move[0])]
+        target = 'lr'.index(move[1])
+        if attacker != 0 and other[target] != 0:
+            hit = other[:]
+            hit[target] = (other[target] + attacker) % MODULUS
+            if current_player == 'p1':
+                next_code = encode(next_player, own, hit)
             else:
-                if move[1] == 'r':
-                    p2_right = (self.p1_left + self.p2_right) % 5
-                    return ChopsticksState('p2', self.current_value['p1'],
-                                           [self.p2_left, p2_right])
-                p2_left = (self.p1_left + self.p2_left) % 5
-                return ChopsticksState('p2', self.current_value['p1'],
-                                       [p2_left, self.p2_right])
+                next_code = encode(next_player, hit, own)
+            result[move] = _STATES[next_code]
+    return result
+
+
+def _build_symmetry(code: int) -> int:
+    """Return the symmetry that maps the position with code code to its
+    canonical position, with the fewest swaps among those that do
+    """
+    return min((0, SWAP_P1, SWAP_P2, SWAP_P1 | SWAP_P2),
+               key=lambda symmetry: mirror(code, symmetry))
+
+
+_STATES = [_build_state(code) for code in range(STATE_COUNT)]
+_NEXT = [_build_moves(code) for code in range(STATE_COUNT)]
+_MOVES = [list(moves) for moves in _NEXT]
+_SYMMETRY = [_build_symmetry(code) for code in range(STATE_COUNT)]
+_CANONICAL = [mirror(code, _SYMMETRY[code]) for code in range(STATE_COUNT)]
+# The codes of the canonical positions, in increasing order.
+CANONICAL_CODES = sorted(set(_CANONICAL))
+CANONICAL_COUNT = len(CANONICAL_CODES)
+_INDEX = {code: index for index, code in enumerate(CANONICAL_CODES)}
+_CANONICAL_INDEX = [_INDEX[code] for code in _CANONICAL]
 
 
 if __name__ == "__main__":
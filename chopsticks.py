@@ -84,8 +84,8 @@ class Chopsticks(Game):
         >>> b.is_over(c)
         True
         """
-        return (current_state.current_value['p1'] == [0, 0]
-                or current_state.current_value['p2'] == [0, 0])
+        return (current_state.p1_left == current_state.p1_right == 0
+                or current_state.p2_left == current_state.p2_right == 0)
 
     def is_winner(self, player: str) -> bool:
         """Return whether player is the winner in the chopsticks game
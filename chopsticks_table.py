@@ -0,0 +1,168 @@
+"""module for ChopsticksTable class
+"""
+from typing import List, Optional, Union
+from array import array
+from chopsticks import Chopsticks
+from chopstick_state import ChopsticksState, MOVES, STATE_COUNT, \
+    CANONICAL_CODES, CANONICAL_COUNT, canonical_index
+from retrograde import RetrogradeSolver
+from solver import WIN, DRAW, LOSS
+from tablebase import Tablebase, write_tablebase
+
+
+class ChopsticksTable:
+    """A table of the value, distance to the end and best move of every
+    chopsticks position
+
+    Only canonical positions are stored, in the order of CANONICAL_CODES,
+    and the other positions are looked up through their canonical position.
+    Each record holds two integers: the score, which is distance + 1 for a
+    WIN, -(distance + 1) for a LOSS and 0 for a DRAW, and the index in MOVES
+    of the best move of the canonical position, or -1 if it has no moves. A
+    table can be saved to a tablebase file and memory-mapped, so a lookup
+    reads two integers and nothing is deserialized.
+    """
+    # The game identifier of chopsticks tablebases.
+    GAME = 'chopsticks'
+    _records: Union[array, memoryview]
+    _tablebase: Optional[Tablebase]
+
+    def __init__(self) -> None:
+        """Initialize a new table by retrograde analysis of every position
+
+        >>> t = ChopsticksTable()
+        >>> s = ChopsticksState('p1', [4, 0], [0, 1])
+        >>> t.value(s), t.distance(s), t.best_move(s)
+        (1, 1, 'lr')
+        >>> t.value(ChopsticksState('p1', [1, 1], [1, 1]))
+        0
+        """
+        states = [ChopsticksState.from_code(code) for code in CANONICAL_CODES]
+        solver = RetrogradeSolver(Chopsticks(True), states)
+        self._records = array('h', [0] * (2 * CANONICAL_COUNT))
+        for index, state in enumerate(states):
+            distance = solver.distance(state)
+            if distance is not None:
+                self._records[2 * index] = (distance + 1) * \
+                    solver.value(state)
+            move = solver.best_move(state)
+            self._records[2 * index + 1] = (-1 if move is None
+                                            else MOVES.index(move))
+        self._tablebase = None
+
+    def __str__(self) -> str:
+        """Return a summary of self
+
+        >>> print(ChopsticksTable())
+        Chopsticks table of 1250 positions in 450 records
+        """
+        return "Chopsticks table of {} positions in {} records".format(
+            STATE_COUNT, CANONICAL_COUNT)
+
+    def value(self, state: ChopsticksState) -> int:
+        """Return the value of state for the player about to move
+        """
+        score = self._records[2 * canonical_index(state.code)]
+        if score > 0:
+            return WIN
+        if score < 0:
+            return LOSS
+        return DRAW
+
+    def distance(self, state: ChopsticksState) -> Optional[int]:
+        """Return the number of moves until the game is over from state with
+        perfect play, or None if state is a draw
+        """
+        score = self._records[2 * canonical_index(state.code)]
+        if score == 0:
+            return None
+        return abs(score) - 1
+
+    def best_move(self, state: ChopsticksState) -> Optional[str]:
+        """Return the move of state that achieves its value, or None if no
+        move can be made
+        """
+        index = self._records[2 * canonical_index(state.code) + 1]
+        if index < 0:
+            return None
+        return state.from_canonical_move(MOVES[index])
+
+    def save(self, path: str) -> None:
+        """Save self to a tablebase file at path
+
+        >>> import os
+        >>> import tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'c.table')
+        >>> ChopsticksTable().save(path)
+        >>> t = ChopsticksTable.load(path)
+        >>> t.best_move(ChopsticksState('p1', [4, 0], [0, 1]))
+        'lr'
+        >>> t.close()
+        """
+        write_tablebase(path, self.GAME, 'h', 2, array('h', self._records))
+
+    @classmethod
+    def load(cls, path: str) -> 'ChopsticksTable':
+        """Return the table saved in the tablebase file at path, memory-mapped
+        rather than read into memory
+
+        Raise ValueError if the file is not a chopsticks tablebase.
+        """
+        tablebase = Tablebase(path)
+        if (tablebase.game != cls.GAME or tablebase.typecode != 'h'
+                or tablebase.width != 2
+                or tablebase.count != CANONICAL_COUNT):
+            raise ValueError("{} is not a chopsticks tablebase".format(path))
+        table = cls.__new__(cls)
+        table._tablebase = tablebase
+        table._records = tablebase.records()
+        return table
+
+    @classmethod
+    def load_or_build(cls, path: str) -> 'ChopsticksTable':
+        """Return the table saved at path, or a new table saved there if the
+        file is missing or unreadable
+        """
+        try:
+            return cls.load(path)
+        except (OSError, ValueError):
+            table = cls()
+            table.save(path)
+            return table
+
+    def close(self) -> None:
+        """Release the file mapped by self, keeping a copy of its records
+        """
+        if self._tablebase is not None:
+            records = array('h')
+            records.frombytes(self._records.cast('B'))
+            self._tablebase.close()
+            self._tablebase = None
+            self._records = records
+
+    def check(self) -> List[str]:
+        """Return the positions whose record disagrees with the rules of
+        chopsticks, described as problems
+
+        >>> ChopsticksTable().check()
+        []
+        """
+        game = Chopsticks(True)
+        problems = []
+        for code in range(STATE_COUNT):
+            state = ChopsticksState.from_code(code)
+            moves = [] if game.is_over(state) else state.get_possible_moves()
+            values = [-self.value(state.make_move(move)) for move in moves]
+            if self.value(state) != max(values, default=LOSS):
+                problems.append("{} ({}) has the wrong value".format(
+                    state, state.current_player))
+            elif moves and -self.value(state.make_move(
+                    self.best_move(state))) != self.value(state):
+                problems.append("{} ({}) has the wrong best move".format(
+                    state, state.current_player))
+        return problems
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
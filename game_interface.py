@@ -1,22 +1,45 @@
 # TODO: import the modules needed to make game_interface run.
-from strategy import *
-from typing import Any, Callable
-from subtract_square import SubtractSquare
-from subtract_square_state import SubtractSquareState
-from chopsticks import Chopsticks
-from chopstick_state import ChopsticksState
+from typing import Any, Callable, Optional
+import sys
+import time
+from instrumentation import PlayObserver, TurnRecorder
+from rendering import Renderer, FULL, SUMMARY, RESULTS
+from pondering import Ponderer
+from registry import LazyRegistry
 
 
 # TODO: Replace None with the corresponding class name for your games.
 # 's' should map to your implementation of Subtract Square, and 'c' should map
 # to Chopsticks.
-playable_games = {'s': SubtractSquare,
-                  'c': Chopsticks}
+# Each game and strategy is imported only when it is first looked up, and
+# packages can add more through the entry point groups, read with --plugins.
+playable_games = LazyRegistry({'s': 'subtract_square:SubtractSquare',
+                               'c': 'chopsticks:Chopsticks',
+                               'm': 'multi_subtract_square:'
+                                    'MultiSubtractSquare',
+                               'v': 'general_chopsticks:GeneralChopsticks'},
+                              'game_interface.games')
 
 # The strategies you are to implement.  See strategy.py, and then decide
 # how to modify this.
-usable_strategies = {'r': random_strategy,
-                     'i': interactive_strategy}
+usable_strategies = LazyRegistry({'r': 'strategy:random_strategy',
+                                  'i': 'strategy:interactive_strategy',
+                                  'm': 'strategy:minimax_strategy',
+                                  't': 'strategy:table_strategy',
+                                  'p': 'strategy:retrograde_strategy',
+                                  'u': 'strategy:mcts_strategy',
+                                  'a': 'strategy:alpha_beta_strategy',
+                                  'x': 'strategy:parallel_strategy',
+                                  'g': 'strategy:grundy_strategy'},
+                                 'game_interface.strategies')
+
+# The observer used when a GameInterface has none; its hooks do nothing.
+NULL_OBSERVER = PlayObserver()
+# The number of functions printed when a game is played with --profile.
+PROFILE_LINES = 25
+# The number of moves after which a game is a tie, since chopsticks between
+# players who never lose can go on forever.
+MAX_MOVES = 1000
 
 
 class GameInterface:
@@ -27,13 +50,30 @@ class GameInterface:
     game - the  game to be played
     p1_strategy - strategy for player 1
     p2_strategy - strategy for player 2
+    observer - the observer of each phase of every turn, or None
+    profile - whether play runs under cProfile and prints its statistics
+    renderer - the output of play
+    ponderer - the ponderer of a player's strategy, run while the other
+        player chooses a move with a strategy that does not search the same
+        engine, or None
+    max_moves - the number of moves after which the game is a tie
     """
     game: Any
     p1_strategy: Callable[[Any], Any]
     p2_strategy: Callable[[Any], Any]
+    observer: Optional[PlayObserver]
+    profile: bool
+    renderer: Renderer
+    ponderer: Optional[Ponderer]
+    max_moves: int
 
     def __init__(self, game: Any, p1_strategy: Callable,
-                 p2_strategy: Callable[[Any], Any]) -> None:
+                 p2_strategy: Callable[[Any], Any],
+                 observer: Optional[PlayObserver] = None,
+                 profile: bool = False,
+                 renderer: Optional[Renderer] = None,
+                 ponderer: Optional[Ponderer] = None,
+                 max_moves: int = MAX_MOVES) -> None:
         """
         Initialize this GameInterface, setting its active game to game, and
         using the strategies p1_strategy for Player 1 and p2_strategy for
@@ -47,62 +87,120 @@ class GameInterface:
         self.game = game(is_p1_turn)
         self.p1_strategy = p1_strategy
         self.p2_strategy = p2_strategy
+        self.observer = observer
+        self.profile = profile
+        self.renderer = renderer or Renderer()
+        self.ponderer = ponderer
+        self.max_moves = max_moves
 
     def play(self) -> None:
         """
         Play the game.
         """
+        if not self.profile:
+            self._play()
+            return
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.runcall(self._play)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(
+            PROFILE_LINES)
+
+    def _play(self) -> None:
+        """
+        Play the game, reporting each phase of every turn to self.observer.
+        """
+        # Without an observer, the hooks do nothing and nothing is timed.
+        observer = self.observer or NULL_OBSERVER
+        clock = time.perf_counter if self.observer else _no_clock
+        renderer = self.renderer
+        ponderer = self.ponderer
+        if ponderer is not None:
+            from strategy import can_ponder_against
         current_state = self.game.current_state
 
-        print(self.game.get_instructions())
-        print(current_state)
+        renderer.instructions(self.game.get_instructions())
+        renderer.state(current_state)
+        observer.game_started(self.game)
 
-        # Pick moves until the game is over
-        while not self.game.is_over(current_state):
+        # Pick moves until the game is over, or is a tie after max_moves
+        moves_made = 0
+        while (not self.game.is_over(current_state)
+               and moves_made < self.max_moves):
             move_to_make = None
 
-            # Print out all of the valid moves
+            # Print out all of the valid moves, with the rest of the turn,
+            # before a move is chosen
+            start = clock()
             possible_moves = current_state.get_possible_moves()
-            print("The current available moves are:")
-            for move in possible_moves:
-                print(move)
+            observer.moves_generated(possible_moves, clock() - start)
+            start = clock()
+            renderer.moves(possible_moves)
+            renderer.flush()
+            observer.printed(clock() - start)
 
             # Pick a (legal) move.
-            while not current_state.is_valid_move(move_to_make):
-                current_strategy = self.p2_strategy
-                if current_state.get_current_player_name() == 'p1':
-                    current_strategy = self.p1_strategy
-                move_to_make = current_strategy(self.game)
+            current_player_name = current_state.get_current_player_name()
+            current_strategy = self.p2_strategy
+            if current_player_name == 'p1':
+                current_strategy = self.p1_strategy
+            valid = False
+            if (ponderer is not None
+                    and ponderer.player != current_player_name
+                    and can_ponder_against(ponderer.ponder, current_strategy)):
+                ponderer.start(self.game)
+            try:
+                while not valid:
+                    start = clock()
+                    move_to_make = current_strategy(self.game)
+                    valid = current_state.is_valid_move(move_to_make)
+                    observer.move_chosen(current_player_name, move_to_make,
+                                         clock() - start, valid)
+            finally:
+                if ponderer is not None:
+                    ponderer.stop()
 
             # Apply the move
-            current_player_name = current_state.get_current_player_name()
+            start = clock()
             new_game_state = current_state.make_move(move_to_make)
             self.game.current_state = new_game_state
             current_state = self.game.current_state
+            moves_made += 1
+            observer.move_made(current_player_name, move_to_make,
+                               clock() - start)
 
-            print("{} made the move {}. The game's state is now:".format(
-                current_player_name, move_to_make))
-            print(current_state)
+            start = clock()
+            renderer.move_made(current_player_name, move_to_make,
+                               current_state)
+            observer.printed(clock() - start)
 
         # Print out the winner of the game
         if self.game.is_winner("p1"):
-            print("Player 1 is the winner!")
+            renderer.result("Player 1 is the winner!")
         elif self.game.is_winner("p2"):
-            print("Player 2 is the winner!")
+            renderer.result("Player 2 is the winner!")
         else:
-            print("It's a tie!")
+            renderer.result("It's a tie!")
+        renderer.flush()
+        observer.game_over(self.game)
 
 
-if __name__ == '__main__':
-    games = ", ".join(["'{}': {}".format(key, playable_games[key].__name__) if
-                       playable_games[key] is not None else
-                       "'{}': None".format(key) for key in playable_games])
+def _no_clock() -> float:
+    """
+    Return 0.0, the clock of a game played without an observer.
+    """
+    return 0.0
 
-    strategies = ", ".join(["'{}': {}".format(key,
-                                              usable_strategies[key].__name__)
-                            if usable_strategies[key] is not None else
-                            "'{}': None".format(key)
-                            for key in usable_strategies])
+
+if __name__ == '__main__':
+    # --plugins adds the games and strategies of installed packages.
+    if '--plugins' in sys.argv:
+        playable_games.discover()
+        usable_strategies.discover()
+    # The menus list names without importing any game or strategy.
+    games = str(playable_games)
+    strategies = str(usable_strategies)
 
     chosen_game = ''
     while chosen_game not in playable_games.keys():
@@ -118,5 +216,39 @@ if __name__ == '__main__':
     while p2 not in usable_strategies.keys():
         p2 = input("Select the strategy for Player 2 ({}): ".format(strategies))
 
-    GameInterface(playable_games[chosen_game], usable_strategies[p1],
-                  usable_strategies[p2]).play()
+    # --profile plays the game under cProfile, --stats prints a summary of
+    # the time spent in each phase of the turns, and --move-cache caches the
+    # moves of the positions played and prints its hit rate. --summary
+    # prints each list of moves on one line, and --quiet only the result.
+    # --ponder lets the strategy of player 2, or else of player 1, think
+    # while the other player chooses, if it can and the other strategy does
+    # not search the same engine.
+    recorder = TurnRecorder() if '--stats' in sys.argv else None
+    verbosity = FULL
+    if '--summary' in sys.argv:
+        verbosity = SUMMARY
+    if '--quiet' in sys.argv:
+        verbosity = RESULTS
+    ponderer = None
+    if '--ponder' in sys.argv:
+        from strategy import PONDER_FUNCTIONS, can_ponder_against
+        for player, key, other in (('p2', p2, p1), ('p1', p1, p2)):
+            ponder = PONDER_FUNCTIONS.get(usable_strategies[key])
+            if ponder is not None and can_ponder_against(
+                    ponder, usable_strategies[other]):
+                ponderer = Ponderer(ponder, player)
+                break
+    interface = GameInterface(playable_games[chosen_game],
+                              usable_strategies[p1], usable_strategies[p2],
+                              recorder, '--profile' in sys.argv,
+                              Renderer(verbosity), ponderer)
+    move_cache = None
+    if '--move-cache' in sys.argv:
+        move_cache = type(interface.game.current_state).enable_move_cache()
+    interface.play()
+    if recorder is not None:
+        print(recorder)
+    if move_cache is not None:
+        print("Move cache: {}".format(move_cache))
+    if ponderer is not None:
+        print(ponderer)
@@ -0,0 +1,626 @@
+"""module for the game log, a compact append-only file of played games
+
+A game log starts with a header, MAGIC and a uint16 version, followed by
+blocks. Each block is
+
+    flags         uint8     1 if the records are zlib-compressed
+    size          uint32    the number of bytes stored
+    raw size      uint32    the number of bytes of the records
+    checksum      uint32    the CRC-32 of the records
+
+and the stored bytes of whole records, so a block can be read, checked and
+decompressed on its own. A record is a run of unsigned LEB128 integers:
+
+    game, first player (0 for p1), the starting state, winner (0 for a tie,
+    1 for p1, 2 for p2), number of moves, moves
+
+where the game numbers, states and moves are encoded by the codec of the
+game: a subtract square move is the base of its square minus 1, a
+chopsticks move is its index in MOVES, and the state of a chopsticks variant
+starts with its rules. Each block is appended with a single write, so
+processes may append to the same log, and a block cut short by a crash is
+skipped by the reader.
+
+Run it to summarize a log:
+
+    python game_log.py games.log --top 10
+"""
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from math import isqrt
+import argparse
+import os
+import struct
+import zlib
+from subtract_square_state import SubtractSquareState
+from multi_subtract_square_state import MultiSubtractSquareState
+from chopstick_state import ChopsticksState, MOVES, STATE_COUNT
+from general_chopsticks_state import GeneralChopsticksState, DIGITS, \
+    shared_rules
+
+MAGIC = b'CSCGMLOG'
+VERSION = 1
+HEADER = struct.Struct('<8sH')
+BLOCK_HEADER = struct.Struct('<BIII')
+COMPRESSED = 1
+# The number of bytes of records gathered before a block is written.
+BLOCK_SIZE = 1 << 16
+WINNERS = (None, 'p1', 'p2')
+
+
+class GameRecord(NamedTuple):
+    """A game in a log
+
+    game - the name of the codec of the game
+    start - the starting state
+    moves - the moves made, in order
+    winner - 'p1', 'p2', or None for a tie
+    """
+    game: str
+    start: Any
+    moves: List[Any]
+    winner: Optional[str]
+
+
+class GameLogWriter:
+    """A writer that appends games to a game log in blocks
+
+    path - the path of the log
+    compress - whether blocks are zlib-compressed
+    block_size - the number of bytes of records gathered before a block is
+        written
+    games - the number of games appended by self
+    """
+    path: str
+    compress: bool
+    block_size: int
+    games: int
+    _buffer: bytearray
+    _file: Any
+
+    def __init__(self, path: str, compress: bool = True,
+                 block_size: int = BLOCK_SIZE) -> None:
+        """Initialize a writer appending to the log at path, which is
+        created if it does not exist
+
+        Raise ValueError if path exists but is not a game log.
+        """
+        self.path = path
+        self.compress = compress
+        self.block_size = block_size
+        self.games = 0
+        self._buffer = bytearray()
+        create_log(path)
+        # Unbuffered, so that every block is appended by one write.
+        self._file = open(path, 'ab', buffering=0)
+
+    def __enter__(self) -> 'GameLogWriter':
+        """Return self, to be closed at the end of a with statement
+        """
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close self
+        """
+        self.close()
+
+    def append(self, start: Any, moves: List[Any],
+               winner: Optional[str]) -> None:
+        """Add the game from state start with moves and winner to the log
+
+        >>> import tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'games.log')
+        >>> with GameLogWriter(path) as log:
+        ...     log.append(SubtractSquareState('p1', 20), [16, 4], 'p2')
+        >>> [record.moves for record in read_games(path)]
+        [[16, 4]]
+        """
+        codec = codec_for(start)
+        buffer = self._buffer
+        _write_int(buffer, codec.number)
+        _write_int(buffer, 0 if start.current_player == 'p1' else 1)
+        for number in codec.encode_state(start):
+            _write_int(buffer, number)
+        _write_int(buffer, WINNERS.index(winner))
+        _write_int(buffer, len(moves))
+        for move in moves:
+            _write_int(buffer, codec.encode_move(start, move))
+        self.games += 1
+        if len(buffer) >= self.block_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the records gathered by self as one block
+        """
+        if not self._buffer:
+            return
+        raw = bytes(self._buffer)
+        stored = zlib.compress(raw) if self.compress else raw
+        header = BLOCK_HEADER.pack(COMPRESSED if self.compress else 0,
+                                   len(stored), len(raw), zlib.crc32(raw))
+        self._file.write(header + stored)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """Write the records gathered by self and close the log
+        """
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def create_log(path: str) -> None:
+    """Create an empty game log at path if there is no file there
+
+    Raise ValueError if path exists but is not a game log.
+    """
+    try:
+        with open(path, 'xb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION))
+        return
+    except FileExistsError:
+        pass
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    # A file created a moment ago by another process may still be empty.
+    if header and (len(header) < HEADER.size
+                   or HEADER.unpack(header) != (MAGIC, VERSION)):
+        raise ValueError("{} is not a version {} game log".format(path,
+                                                                 VERSION))
+
+
+def read_games(path: str) -> Iterator[GameRecord]:
+    """Yield the games of the log at path in order, reading one block at a
+    time
+
+    Raise ValueError if path is not a game log or a block is corrupt.
+    """
+    for block in read_blocks(path):
+        yield from _decode_block(block)
+
+
+def read_blocks(path: str) -> Iterator[bytes]:
+    """Yield the records of each block of the log at path, decompressed and
+    checked, stopping at a block cut short by a crash
+
+    Raise ValueError if path is not a game log or a block is corrupt.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        if (len(header) < HEADER.size
+                or HEADER.unpack(header) != (MAGIC, VERSION)):
+            raise ValueError("{} is not a version {} game log".format(
+                path, VERSION))
+        while True:
+            header = f.read(BLOCK_HEADER.size)
+            if len(header) < BLOCK_HEADER.size:
+                return
+            flags, size, raw_size, checksum = BLOCK_HEADER.unpack(header)
+            stored = f.read(size)
+            if len(stored) < size:
+                return
+            try:
+                raw = (zlib.decompress(stored) if flags & COMPRESSED
+                       else stored)
+            except zlib.error:
+                raw = b''
+            if len(raw) != raw_size or zlib.crc32(raw) != checksum:
+                raise ValueError("{} has a corrupt block at byte {}".format(
+                    path, f.tell() - size - BLOCK_HEADER.size))
+            yield raw
+
+
+def replay(record: GameRecord) -> Iterator[Any]:
+    """Yield the starting state of record and the state after each of its
+    moves, rebuilt through make_move
+
+    Raise ValueError if a move of record is not valid.
+
+    >>> r = GameRecord('subtract_square', SubtractSquareState('p1', 20),
+    ...                [16, 4], 'p2')
+    >>> [str(state)[-2:] for state in replay(r)]
+    ['20', ' 4', ' 0']
+    """
+    state = record.start
+    yield state
+    for move in record.moves:
+        if not state.is_valid_move(move):
+            raise ValueError("{} is not a valid move of {}".format(move,
+                                                                  state))
+        state = state.make_move(move)
+        yield state
+
+
+class PositionStats:
+    """The number of games through each position of a log and how many of
+    them the player about to move there won, in bounded memory
+
+    Once max_positions positions are counted, games through new positions
+    only add to dropped, so memory depends on max_positions and not on the
+    size of the log.
+
+    max_positions - the largest number of positions counted
+    dropped - the number of visits to positions that were not counted
+    """
+    max_positions: int
+    dropped: int
+    _counts: Dict[Tuple[int, ...], List[int]]
+
+    def __init__(self, max_positions: int = 1 << 20) -> None:
+        """Initialize new, empty statistics
+        """
+        self.max_positions = max_positions
+        self.dropped = 0
+        self._counts = {}
+
+    def __len__(self) -> int:
+        """Return the number of positions counted
+        """
+        return len(self._counts)
+
+    def add(self, record: GameRecord) -> None:
+        """Count every position of the game of record, each at most once
+
+        >>> p = PositionStats()
+        >>> p.add(GameRecord('subtract_square',
+        ...                  SubtractSquareState('p1', 5), [1, 4], 'p2'))
+        >>> p.win_rate(SubtractSquareState('p1', 5))
+        0.0
+        >>> p.win_rate(SubtractSquareState('p2', 4))
+        1.0
+        """
+        codec = codec_for(record.start)
+        seen = set()
+        for state in replay(record):
+            key = codec.key(state)
+            if key in seen:
+                continue
+            seen.add(key)
+            counts = self._counts.get(key)
+            if counts is None:
+                if len(self._counts) >= self.max_positions:
+                    self.dropped += 1
+                    continue
+                counts = self._counts[key] = [0, 0]
+            counts[0] += 1
+            if record.winner == state.current_player:
+                counts[1] += 1
+
+    def games(self, state: Any) -> int:
+        """Return the number of games counted through state
+        """
+        return self._counts.get(codec_for(state).key(state), [0, 0])[0]
+
+    def win_rate(self, state: Any) -> Optional[float]:
+        """Return the fraction of the games counted through state that the
+        player about to move at state won, or None if there are none
+        """
+        games, wins = self._counts.get(codec_for(state).key(state), [0, 0])
+        if not games:
+            return None
+        return wins / games
+
+    def most_played(self, n: int) -> List[Tuple[Any, int, float]]:
+        """Return the n positions with the most games, most first, each with
+        its number of games and win rate
+        """
+        keys = sorted(self._counts, key=lambda k: self._counts[k][0],
+                      reverse=True)[:n]
+        return [(_decode_key(key), self._counts[key][0],
+                 self._counts[key][1] / self._counts[key][0])
+                for key in keys]
+
+
+def position_stats(path: str, max_positions: int = 1 << 20) -> PositionStats:
+    """Return the position statistics of every game of the log at path,
+    streamed one block at a time
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'games.log')
+    >>> with GameLogWriter(path, block_size=1) as log:
+    ...     log.append(ChopsticksState('p1', [1, 1], [1, 1]),
+    ...                ['ll', 'lr'], None)
+    ...     log.append(ChopsticksState('p1', [1, 1], [1, 1]), ['rr'], None)
+    >>> p = position_stats(path)
+    >>> p.games(ChopsticksState('p1', [1, 1], [1, 1])), len(p)
+    (2, 4)
+    """
+    stats = PositionStats(max_positions)
+    for record in read_games(path):
+        stats.add(record)
+    return stats
+
+
+class _Codec:
+    """The encoding of the states and moves of one game as small integers
+
+    name - the name of the game
+    number - the number of the game in logs
+    """
+    name: str
+    number: int
+    state_type: type
+
+    def encode_state(self, state: Any) -> List[int]:
+        """Return state, without its current player, as integers
+        """
+        raise NotImplementedError('Subclass needed')
+
+    def decode_state(self, player: str, numbers: Iterator[int]) -> Any:
+        """Return the state with player about to move read from numbers
+        """
+        raise NotImplementedError('Subclass needed')
+
+    def encode_move(self, state: Any, move: Any) -> int:
+        """Return move of state as an integer
+        """
+        raise NotImplementedError('Subclass needed')
+
+    def decode_move(self, state: Any, number: int) -> Any:
+        """Return the move of state encoded as number
+        """
+        raise NotImplementedError('Subclass needed')
+
+    def key(self, state: Any) -> Tuple[int, ...]:
+        """Return a compact key of state, unique among all games
+        """
+        return (self.number, 0 if state.current_player == 'p1' else 1,
+                *self.encode_state(state))
+
+
+class _SubtractSquareCodec(_Codec):
+    """The codec of subtract square, whose moves are bases minus 1
+    """
+    name = 'subtract_square'
+    number = 0
+    state_type = SubtractSquareState
+
+    def encode_state(self, state: SubtractSquareState) -> List[int]:
+        """Overrides _Codec.encode_state
+        """
+        return [state.current_value]
+
+    def decode_state(self, player: str,
+                     numbers: Iterator[int]) -> SubtractSquareState:
+        """Overrides _Codec.decode_state
+        """
+        return SubtractSquareState(player, next(numbers))
+
+    def encode_move(self, state: SubtractSquareState, move: int) -> int:
+        """Overrides _Codec.encode_move
+        """
+        return isqrt(move) - 1
+
+    def decode_move(self, state: SubtractSquareState, number: int) -> int:
+        """Overrides _Codec.decode_move
+        """
+        return (number + 1) ** 2
+
+
+class _ChopsticksCodec(_Codec):
+    """The codec of chopsticks, whose states are codes without the player
+    and whose moves are indexes in MOVES
+    """
+    name = 'chopsticks'
+    number = 1
+    state_type = ChopsticksState
+
+    def encode_state(self, state: ChopsticksState) -> List[int]:
+        """Overrides _Codec.encode_state
+        """
+        return [state.code % (STATE_COUNT // 2)]
+
+    def decode_state(self, player: str,
+                     numbers: Iterator[int]) -> ChopsticksState:
+        """Overrides _Codec.decode_state
+        """
+        offset = 0 if player == 'p1' else STATE_COUNT // 2
+        return ChopsticksState.from_code(offset + next(numbers))
+
+    def encode_move(self, state: ChopsticksState, move: str) -> int:
+        """Overrides _Codec.encode_move
+        """
+        return MOVES.index(move)
+
+    def decode_move(self, state: ChopsticksState, number: int) -> str:
+        """Overrides _Codec.decode_move
+        """
+        return MOVES[number]
+
+
+class _MultiSubtractSquareCodec(_Codec):
+    """The codec of multi-pile subtract square, whose states are the number
+    of piles and the piles, and whose moves are the pile plus the number of
+    piles times the base of the square minus 1
+    """
+    name = 'multi_subtract_square'
+    number = 2
+    state_type = MultiSubtractSquareState
+
+    def encode_state(self, state: MultiSubtractSquareState) -> List[int]:
+        """Overrides _Codec.encode_state
+        """
+        return [len(state.piles), *state.piles]
+
+    def decode_state(self, player: str,
+                     numbers: Iterator[int]) -> MultiSubtractSquareState:
+        """Overrides _Codec.decode_state
+        """
+        return MultiSubtractSquareState(
+            player, [next(numbers) for _ in range(next(numbers))])
+
+    def encode_move(self, state: MultiSubtractSquareState,
+                    move: Tuple[int, int]) -> int:
+        """Overrides _Codec.encode_move
+        """
+        return move[0] + len(state.piles) * (isqrt(move[1]) - 1)
+
+    def decode_move(self, state: MultiSubtractSquareState,
+                    number: int) -> Tuple[int, int]:
+        """Overrides _Codec.decode_move
+        """
+        base, pile = divmod(number, len(state.piles))
+        return pile, (base + 1) ** 2
+
+
+class _GeneralChopsticksCodec(_Codec):
+    """The codec of chopsticks variants, whose states are the modulus, the
+    number of hands, 1 if splits are allowed, and the code without the
+    player, and whose moves are the attacking hand times the number of hands
+    plus the target hand for attacks, and the number of attacks plus the
+    new hands read in base modulus for splits
+
+    >>> from general_chopsticks_state import ChopsticksRules
+    >>> c = _GeneralChopsticksCodec()
+    >>> s = GeneralChopsticksState(ChopsticksRules(7, 3, True), 'p2',
+    ...                            [1, 2, 3], [4, 5, 6])
+    >>> c.decode_state('p2', iter(c.encode_state(s))) == s
+    True
+    >>> c.encode_move(s, 'cb'), c.encode_move(s, 's060')
+    (7, 51)
+    >>> c.decode_move(s, 7), c.decode_move(s, 51)
+    ('cb', 's060')
+    """
+    name = 'general_chopsticks'
+    number = 3
+    state_type = GeneralChopsticksState
+
+    def encode_state(self, state: GeneralChopsticksState) -> List[int]:
+        """Overrides _Codec.encode_state
+        """
+        rules = state.rules
+        return [rules.modulus, rules.hands, int(rules.splits),
+                state.code % rules.modulus ** (2 * rules.hands)]
+
+    def decode_state(self, player: str,
+                     numbers: Iterator[int]) -> GeneralChopsticksState:
+        """Overrides _Codec.decode_state
+        """
+        modulus, hands, splits = next(numbers), next(numbers), next(numbers)
+        rules = shared_rules(modulus, hands, bool(splits))
+        offset = 0 if player == 'p1' else modulus ** (2 * hands)
+        return rules.state(offset + next(numbers))
+
+    def encode_move(self, state: GeneralChopsticksState, move: str) -> int:
+        """Overrides _Codec.encode_move
+        """
+        rules = state.rules
+        if move[0] == 's':
+            return rules.hands ** 2 + int(move[1:], rules.modulus)
+        return (rules.hand_names.index(move[0]) * rules.hands
+                + rules.hand_names.index(move[1]))
+
+    def decode_move(self, state: GeneralChopsticksState, number: int) -> str:
+        """Overrides _Codec.decode_move
+        """
+        rules = state.rules
+        if number < rules.hands ** 2:
+            attacker, target = divmod(number, rules.hands)
+            return rules.hand_names[attacker] + rules.hand_names[target]
+        number -= rules.hands ** 2
+        digits = []
+        for _ in range(rules.hands):
+            number, digit = divmod(number, rules.modulus)
+            digits.append(DIGITS[digit])
+        return 's' + ''.join(reversed(digits))
+
+
+# The codecs, indexed by the number of their game.
+CODECS = (_SubtractSquareCodec(), _ChopsticksCodec(),
+          _MultiSubtractSquareCodec(), _GeneralChopsticksCodec())
+_CODEC_OF_TYPE = {codec.state_type: codec for codec in CODECS}
+
+
+def codec_for(state: Any) -> _Codec:
+    """Return the codec of the game of state
+
+    Raise ValueError if no codec encodes states of its type.
+    """
+    try:
+        return _CODEC_OF_TYPE[type(state)]
+    except KeyError:
+        raise ValueError("no game log codec for {}".format(
+            type(state).__name__)) from None
+
+
+def _write_int(buffer: bytearray, number: int) -> None:
+    """Append the unsigned LEB128 encoding of number to buffer
+
+    >>> b = bytearray()
+    >>> _write_int(b, 5); _write_int(b, 300)
+    >>> bytes(b)
+    b'\\x05\\xac\\x02'
+    """
+    while number > 0x7f:
+        buffer.append(number & 0x7f | 0x80)
+        number >>= 7
+    buffer.append(number)
+
+
+def _decode_block(raw: bytes) -> Iterator[GameRecord]:
+    """Yield the records of one block of a log
+    """
+    numbers = _read_ints(raw)
+    for number in numbers:
+        codec = CODECS[number]
+        start = codec.decode_state('p1' if next(numbers) == 0 else 'p2',
+                                   numbers)
+        winner = WINNERS[next(numbers)]
+        moves = [codec.decode_move(start, next(numbers))
+                 for _ in range(next(numbers))]
+        yield GameRecord(codec.name, start, moves, winner)
+
+
+def _read_ints(raw: bytes) -> Iterator[int]:
+    """Yield the unsigned LEB128 integers of raw
+
+    >>> list(_read_ints(b'\\x05\\xac\\x02'))
+    [5, 300]
+    """
+    number = shift = 0
+    for byte in raw:
+        number |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield number
+            number = shift = 0
+
+
+def _decode_key(key: Tuple[int, ...]) -> Any:
+    """Return the state of a key made by _Codec.key
+    """
+    return CODECS[key[0]].decode_state('p1' if key[1] == 0 else 'p2',
+                                       iter(key[2:]))
+
+
+def _parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """Return the command line arguments of a log summary
+    """
+    parser = argparse.ArgumentParser(description="Summarize a game log.")
+    parser.add_argument('path')
+    parser.add_argument('--top', type=int, default=10,
+                        help="the number of most played positions shown")
+    parser.add_argument('--max-positions', type=int, default=1 << 20)
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """Print the results and most played positions of a game log
+    """
+    options = _parse_args(args)
+    results = {winner: 0 for winner in WINNERS}
+    stats = PositionStats(options.max_positions)
+    for record in read_games(options.path):
+        results[record.winner] += 1
+        stats.add(record)
+    print("{} games: {} won by p1, {} by p2, {} ties".format(
+        sum(results.values()), results['p1'], results['p2'], results[None]))
+    print("{} positions, {} visits dropped".format(len(stats),
+                                                    stats.dropped))
+    for state, games, rate in stats.most_played(options.top):
+        print("{:>8} games {:>6.1%} won by {}: {}".format(
+            games, rate, state.current_player, state))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""module for GameServer class, which hosts many games at once over a socket
+
+Each connection plays one session at a time with a line protocol. The client
+sends
+
+    NEW <game> <p1> <p2> [<value> ...]  start a session of the game with key
+                                        game, from playable_games. Each seat
+                                        is h for the client or the key of a
+                                        strategy, from usable_strategies, and
+                                        the values are the starting value or
+                                        piles of a subtract square game, or
+                                        the modulus, hands and splits (0 or
+                                        1) of a chopsticks variant.
+    MOVE <move>                         make move for the seat whose TURN it is
+    STATS                               ask for the counts of sessions
+    QUIT                                close the connection
+
+and the server replies with
+
+    READY                               once on connecting
+    STATE <state>                       the state at the start and before a
+                                        client's turn
+    MOVES <move> | <move> | ...         the possible moves before a turn
+    TURN <player>                       a client seat is to move
+    MOVED <player> <move>               a move was made
+    INVALID <move>                      a client's move was not valid
+    OVER <player>                       the winner, or tie, ending the session;
+                                        a session still going after max_moves
+                                        moves is a tie
+    STATS <active> <finished>           the counts of sessions
+    ERR <message>                       a line that cannot be served, or a
+                                        bot move that failed or ran out of
+                                        time, ending its session
+
+Random moves are chosen inline; every other bot strategy runs in an executor,
+so a slow search never stalls the other sessions. In threads, the strategies
+share the module-level engines of strategy.py, each behind its own lock, so
+only the moves that need the engine of a slow search wait for it; worker
+processes each have their own engines. A bot move that takes longer than
+move_seconds ends its session.
+
+Run it to serve on a TCP port or a Unix socket:
+
+    python game_server.py --port 8765
+    python game_server.py --unix /tmp/games.sock --processes 4
+"""
+from typing import Any, Dict, List, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+from game_interface import playable_games, usable_strategies
+from subtract_square import SubtractSquare
+from multi_subtract_square import MultiSubtractSquare
+from general_chopsticks import GeneralChopsticks
+
+# The seat of a player who moves by sending MOVE lines.
+HUMAN = 'h'
+# The strategies cheap enough to run on the event loop.
+INLINE_STRATEGIES = {'r'}
+# The strategies that would block on input() in the server process.
+UNSERVED_STRATEGIES = {'i'}
+
+
+class GameServer:
+    """A server of concurrent game sessions
+
+    processes - the number of worker processes running bot strategies, or 0
+        to run them in threads of this process
+    max_moves - the number of moves after which a session is a tie, since
+        chopsticks can go on forever
+    move_seconds - the longest a bot may take to choose a move; its session
+        ends when it runs out, although the search itself runs to the end in
+        its thread or worker process
+    sessions_active - the number of sessions being played
+    sessions_finished - the number of sessions played to the end
+    """
+    processes: int
+    max_moves: int
+    move_seconds: float
+    sessions_active: int
+    sessions_finished: int
+    _executor: Optional[Executor]
+    _server: Optional[asyncio.AbstractServer]
+
+    def __init__(self, processes: int = 0, max_moves: int = 1000,
+                 move_seconds: float = 60.0) -> None:
+        """Initialize a new server, whose executor starts with it
+
+        >>> print(GameServer())
+        GameServer: 0 sessions active, 0 finished
+        """
+        self.processes = processes
+        self.max_moves = max_moves
+        self.move_seconds = move_seconds
+        self.sessions_active = 0
+        self.sessions_finished = 0
+        self._executor = None
+        self._server = None
+
+    def __str__(self) -> str:
+        """Return a summary of the sessions of self
+        """
+        return "GameServer: {} sessions active, {} finished".format(
+            self.sessions_active, self.sessions_finished)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0,
+                    path: Optional[str] = None) -> str:
+        """Start serving on the Unix socket at path, or on host and port if
+        path is None, and return the address served, where port 0 picks a
+        free port
+        """
+        if self.processes > 0:
+            self._executor = ProcessPoolExecutor(self.processes)
+        else:
+            self._executor = ThreadPoolExecutor()
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._serve, path)
+            return path
+        self._server = await asyncio.start_server(self._serve, host, port)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return '{}:{}'.format(host, port)
+
+    async def close(self) -> None:
+        """Stop serving and shut down the executor of self
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def serve_forever(self) -> None:
+        """Serve until cancelled
+        """
+        await self._server.serve_forever()
+
+    async def _serve(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        """Serve the sessions of one connection until it quits or closes
+        """
+        connection = _Connection(reader, writer)
+        connection.send('READY')
+        try:
+            while True:
+                line = await connection.receive()
+                if line is None or line == 'QUIT':
+                    break
+                command, _, argument = line.partition(' ')
+                if command == 'NEW':
+                    await self._play_session(connection, argument.split())
+                elif command == 'STATS':
+                    connection.send('STATS {} {}'.format(
+                        self.sessions_active, self.sessions_finished))
+                else:
+                    connection.send('ERR no session for {}'.format(line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _play_session(self, connection: '_Connection',
+                            words: List[str]) -> None:
+        """Play the session asked for by the words of a NEW line to the end,
+        or until the connection closes
+        """
+        if len(words) < 3:
+            connection.send('ERR NEW needs a game and two seats')
+            return
+        try:
+            game = make_game(words[0], [int(word) for word in words[3:]])
+            seats = {'p1': _check_seat(words[1]),
+                     'p2': _check_seat(words[2])}
+        except ValueError as error:
+            connection.send('ERR {}'.format(error))
+            return
+        self.sessions_active += 1
+        try:
+            if await self._play(connection, game, seats):
+                self.sessions_finished += 1
+        finally:
+            self.sessions_active -= 1
+
+    async def _play(self, connection: '_Connection', game: Any,
+                    seats: Dict[str, str]) -> bool:
+        """Play game with the strategy key of each seat, or HUMAN for the
+        client, and return whether it was played to the end
+        """
+        loop = asyncio.get_running_loop()
+        connection.send('STATE {}'.format(game.current_state))
+        moves = 0
+        while (not game.is_over(game.current_state)
+               and moves < self.max_moves):
+            state = game.current_state
+            player = state.get_current_player_name()
+            seat = seats[player]
+            if seat == HUMAN:
+                connection.send('STATE {}'.format(state))
+                connection.send('MOVES {}'.format(' | '.join(
+                    str(move) for move in state.get_possible_moves())))
+                connection.send('TURN {}'.format(player))
+                await connection.writer.drain()
+                line = await connection.receive()
+                if line is None or line == 'QUIT':
+                    return False
+                if not line.startswith('MOVE '):
+                    connection.send('ERR expected MOVE, not {}'.format(line))
+                    continue
+                move = game.str_to_move(line[len('MOVE '):])
+                if not state.is_valid_move(move):
+                    connection.send('INVALID {}'.format(line[len('MOVE '):]))
+                    continue
+            elif seat in INLINE_STRATEGIES:
+                move = usable_strategies[seat](game)
+                # Let the other sessions run between inline moves.
+                await asyncio.sleep(0)
+            else:
+                try:
+                    move = await asyncio.wait_for(loop.run_in_executor(
+                        self._executor, usable_strategies[seat], game),
+                        self.move_seconds)
+                except asyncio.TimeoutError:
+                    connection.send('ERR {} took over {} s'.format(
+                        seat, self.move_seconds))
+                    return False
+                except Exception as error:
+                    # A failing strategy ends its session, not the server.
+                    connection.send('ERR {} failed: {!r}'.format(seat, error))
+                    return False
+            if not state.is_valid_move(move):
+                continue
+            game.current_state = state.make_move(move)
+            moves += 1
+            connection.send('MOVED {} {}'.format(player, move))
+        if game.is_winner('p1'):
+            connection.send('OVER p1')
+        elif game.is_winner('p2'):
+            connection.send('OVER p2')
+        else:
+            connection.send('OVER tie')
+        return True
+
+
+def _check_seat(key: str) -> str:
+    """Return key, the key of a seat
+
+    Raise ValueError if it is neither HUMAN nor the key of a strategy that
+    can be served.
+    """
+    if key != HUMAN and (key not in usable_strategies
+                         or key in UNSERVED_STRATEGIES):
+        raise ValueError("no strategy {}".format(key))
+    return key
+
+
+def make_game(key: str, values: List[int]) -> Any:
+    """Return a new game with key in playable_games, with player 1 to move
+    first, started from values: the starting value of a subtract square game,
+    the piles of a multi-pile one, or the modulus, hands and splits of a
+    chopsticks variant
+
+    Raise ValueError if there is no such game or values do not fit it.
+
+    >>> print(make_game('s', [20]))
+    The current player is Player 1 and the current value is 20
+    >>> make_game('s', [])
+    Traceback (most recent call last):
+    ...
+    ValueError: s needs one starting value
+    >>> print(make_game('v', [7, 3, 1]).rules)
+    chopsticks modulo 7 with 3 hands and splits
+    """
+    if key not in playable_games:
+        raise ValueError("no game {}".format(key))
+    game = playable_games[key]
+    if any(value < 0 for value in values):
+        raise ValueError("values must be non-negative")
+    if issubclass(game, MultiSubtractSquare):
+        if not values:
+            raise ValueError("{} needs at least one pile".format(key))
+        return game(True, values)
+    if issubclass(game, SubtractSquare):
+        if len(values) != 1:
+            raise ValueError("{} needs one starting value".format(key))
+        return game(True, values[0])
+    if issubclass(game, GeneralChopsticks):
+        if not 1 <= len(values) <= 3:
+            raise ValueError("{} needs a modulus, then hands and splits"
+                             .format(key))
+        return game(True, *values[:2], *[bool(v) for v in values[2:]])
+    if values:
+        raise ValueError("{} takes no values".format(key))
+    return game(True)
+
+
+class _Connection:
+    """The line protocol of one client connection
+
+    reader - the stream of lines from the client
+    writer - the stream of lines to the client
+    """
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+
+    def __init__(self, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter) -> None:
+        """Initialize the connection of reader and writer
+        """
+        self.reader = reader
+        self.writer = writer
+
+    def send(self, line: str) -> None:
+        """Buffer line to be sent on the next drain of the writer
+        """
+        self.writer.write(line.encode() + b'\n')
+
+    async def receive(self) -> Optional[str]:
+        """Return the next line from the client, without its end, or None if
+        the connection is closed
+        """
+        line = await self.reader.readline()
+        if not line:
+            return None
+        return line.decode().strip()
+
+
+def _parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """Return the command line arguments of the server
+    """
+    parser = argparse.ArgumentParser(
+        description="Serve concurrent game sessions over a line protocol.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH',
+                        help="serve on a Unix socket instead of TCP")
+    parser.add_argument('-j', '--processes', type=int, default=0,
+                        help="worker processes for bot strategies, or 0 "
+                             "for threads")
+    parser.add_argument('--max-moves', type=int, default=1000)
+    parser.add_argument('--move-seconds', type=float, default=60.0,
+                        help="the longest a bot may take to choose a move")
+    return parser.parse_args(args)
+
+
+async def main(args: Optional[List[str]] = None) -> None:
+    """Serve as the command line args ask until interrupted
+    """
+    options = _parse_args(args)
+    server = GameServer(options.processes, options.max_moves,
+                        options.move_seconds)
+    address = await server.start(options.host, options.port, options.unix)
+    print("Serving on", address)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
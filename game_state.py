@@ -1,15 +1,25 @@
 """
 module for GameState class
 """
-from typing import Any
+from typing import Any, Hashable, Optional
+import functools
+from move_cache import MoveCache
 
 
 class GameState:
     """The game state for a two-player, sequential move, zero-sum,
     perfect-information game.
 
+    A subclass whose states are used as keys of tables, caches and visited
+    sets defines __hash__, consistent with __eq__, from a hash it computes
+    once and carries from state to state, and __eq__ compares the hashes
+    before anything else. A state is never changed once made, except a copy
+    through apply_move and undo_move, which keep its hash up to date; a copy
+    must not be changed while it is a key.
+
     current_player - the player that is about to play at the point
     """
+    __slots__ = ('current_player',)
     current_player: str
 
     def __init__(self, current_player: str) -> None:
@@ -45,6 +55,69 @@ class GameState:
         """
         raise NotImplementedError('Subclass needed')
 
+    def moves_key(self) -> Hashable:
+        """Return a key of the position of self for caching its moves: states
+        with equal keys must have the same possible moves
+
+        The default is self if it is hashable, or its player and string
+        otherwise.
+        """
+        if type(self).__hash__ is not None:
+            return self
+        return self.current_player, str(self)
+
+    @classmethod
+    def enable_move_cache(cls, maxsize: int = 1024) -> MoveCache:
+        """Cache the possible moves of the last maxsize positions of states
+        of cls, looked up by moves_key, and return the cache
+
+        get_possible_moves of cls then returns one shared list for each
+        cached position. Enabling the cache again only resizes it.
+
+        >>> class Counter(GameState):
+        ...     def get_possible_moves(self):
+        ...         return [1, 2]
+        ...     def moves_key(self):
+        ...         return self.current_player
+        >>> cache = Counter.enable_move_cache(8)
+        >>> Counter('p1').get_possible_moves(), 'p1' in cache
+        ([1, 2], True)
+        >>> cache.hits, cache.misses
+        (0, 1)
+        >>> Counter.disable_move_cache()
+        >>> Counter.move_cache() is None
+        True
+        """
+        cache = cls.move_cache()
+        if cache is not None:
+            cache.resize(maxsize)
+            return cache
+        cache = MoveCache(cls.get_possible_moves, maxsize)
+
+        @functools.wraps(cache.generate)
+        def get_possible_moves(self: GameState) -> list:
+            return cache.lookup(self, self.moves_key())
+        cls.get_possible_moves = get_possible_moves
+        cls._move_cache = cache
+        return cache
+
+    @classmethod
+    def disable_move_cache(cls) -> None:
+        """Stop caching the possible moves of states of cls, and drop the
+        cache
+        """
+        cache = cls.move_cache()
+        if cache is not None:
+            cls.get_possible_moves = cache.generate
+            del cls._move_cache
+
+    @classmethod
+    def move_cache(cls) -> Optional[MoveCache]:
+        """Return the cache of the possible moves of states of cls, or None if
+        it is not enabled
+        """
+        return cls.__dict__.get('_move_cache')
+
     def is_valid_move(self, move_to_make: str) -> bool:
         """Return whether move_to_make is a valid move
         """
@@ -55,6 +128,55 @@ class GameState:
         """
         raise NotImplementedError('Subclass needed')
 
+    def canonical(self) -> 'GameState':
+        """Return the representative of the states that are strategically
+        identical to self, such as its mirror images, which is the same state
+        for all of them
+
+        Solvers and tables store only canonical states, and translate moves
+        with canonical_move and from_canonical_move. A game without
+        symmetries keeps this default, where every state is its own
+        representative.
+
+        >>> s = GameState('p1')
+        >>> s.canonical() is s
+        True
+        """
+        return self
+
+    def canonical_move(self, move: Any) -> Any:
+        """Return the move of self.canonical() that corresponds to move of self
+        """
+        return move
+
+    def from_canonical_move(self, move: Any) -> Any:
+        """Return the move of self that corresponds to move of
+        self.canonical()
+        """
+        return move
+
+    def copy(self) -> 'GameState':
+        """Return a new state equal to self that apply_move may change
+
+        Searches call apply_move and undo_move on a copy, so they walk the
+        game tree on one state object and allocate nothing per position.
+        """
+        raise NotImplementedError('Subclass needed')
+
+    def apply_move(self, move: Any) -> Any:
+        """Apply the valid move to self in place, and return what undo_move
+        needs to take it back
+
+        Only a state returned by copy may be changed this way.
+        """
+        raise NotImplementedError('Subclass needed')
+
+    def undo_move(self, undo: Any) -> None:
+        """Take back the last move applied to self, where undo is what
+        apply_move returned for it
+        """
+        raise NotImplementedError('Subclass needed')
+
 
 if __name__ == "__main__":
     import python_ta
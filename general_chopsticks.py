@@ -0,0 +1,89 @@
+"""module for GeneralChopsticks class
+"""
+from typing import Optional
+from chopsticks import Chopsticks
+from general_chopsticks_state import ChopsticksRules, GeneralChopsticksState, \
+    shared_rules
+
+
+class GeneralChopsticks(Chopsticks):
+    """A chopsticks variant with any modulus, number of hands and, if chosen,
+    split moves
+    """
+    current_state: GeneralChopsticksState
+    rules: ChopsticksRules
+
+    def __init__(self, is_p1_turn: bool, modulus: Optional[int] = None,
+                 hands: int = 2, splits: bool = False) -> None:
+        """Initialize a new game of the variant with modulus, hands and
+        splits, where every hand starts at 1, asking for the rules if
+        modulus is None
+
+        Extends Chopsticks.__init__
+
+        ===New Attributes===
+        rules - the rules of the variant, shared by every game of it in this
+            process
+
+        >>> g = GeneralChopsticks(True, 7, 3, True)
+        >>> print(g)
+        Player 1: 1 1 1; Player 2: 1 1 1
+        >>> print(g.rules)
+        chopsticks modulo 7 with 3 hands and splits
+        >>> g.rules is GeneralChopsticks(False, 7, 3, True).rules
+        True
+        """
+        super().__init__(is_p1_turn)
+        if modulus is None:
+            modulus = int(input("Type the value at which a hand dies: "))
+            hands = int(input("Type the number of hands of each player: "))
+            splits = input("Type y to allow split moves: ").lower() == 'y'
+        self.rules = shared_rules(modulus, hands, splits)
+        self.current_state = GeneralChopsticksState(
+            self.rules, self.current_player, [1] * hands, [1] * hands)
+
+    def get_instructions(self) -> str:
+        """Return instructions of the chopsticks variant
+
+        Overrides Chopsticks.get_instructions
+
+        >>> print(GeneralChopsticks(True, 7, 3).get_instructions()[:39])
+        Each player has 3 hands, named a, b and
+        """
+        names = self.rules.hand_names
+        instructions = ("Each player has {} hands, named {} and {}, each " +
+                        "starting at 1.\nPlayers take turns adding the " +
+                        "value of one of their hands to one\nof their " +
+                        "opponent's hands, modulo {}, with a move such as " +
+                        "{}{}, the\nattacking hand then the target. A hand " +
+                        "worth 0 is dead.").format(
+                            self.rules.hands, ", ".join(names[:-1]),
+                            names[-1], self.rules.modulus, names[0],
+                            names[-1])
+        if self.rules.splits:
+            instructions += ("\nA player may instead split their fingers " +
+                             "among their own hands with\na move such as " +
+                             "s{}, the new value of each hand, keeping the " +
+                             "total\nand doing more than reordering the " +
+                             "hands.").format('1' * (self.rules.hands - 1)
+                                              + '0')
+        return instructions + ("\nThe first player with every hand dead " +
+                               "loses the game.")
+
+    def is_over(self, current_state: GeneralChopsticksState) -> bool:
+        """Return whether self is over from the information provided by
+        current_state
+
+        Overrides Chopsticks.is_over
+
+        >>> g = GeneralChopsticks(True, 7, 3)
+        >>> g.is_over(GeneralChopsticksState(g.rules, 'p1', [0, 0, 0],
+        ...                                  [1, 2, 3]))
+        True
+        """
+        return self.rules.is_over(current_state.code)
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
@@ -0,0 +1,499 @@
+"""module for ChopsticksRules and GeneralChopsticksState classes, the engine
+of chopsticks variants with any modulus, number of hands and split moves
+"""
+from typing import Any, Dict, List, Tuple
+from itertools import product
+from game_state import GameState
+
+PLAYERS = ('p1', 'p2')
+# The digits of hand values in the names of split moves.
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+# The letters of the hands in the names of attacks, which stop before s, the
+# first letter of the names of splits.
+HAND_LETTERS = 'abcdefghijklmnopqr'
+
+
+class ChopsticksRules:
+    """The rules of a chopsticks variant, and the positions and moves of its
+    game, built on first use
+
+    A position is packed into one mixed-radix integer, its code: the
+    current player (radix 2) followed by the hands of player 1 and then of
+    player 2 (radix modulus each). With modulus 5 and two hands, the codes
+    are the codes of ChopsticksState.
+
+    An attack is named by the attacking hand and the target hand, such as
+    'lr' with two hands (left and right) or 'ac' with three (a, b, c). A
+    split, if allowed, moves fingers between the hands of the player about
+    to move. It is named s followed by the new value of each hand, such as
+    's13', keeps the total, and must do more than reorder the hands.
+
+    modulus - the value at which a hand dies
+    hands - the number of hands of each player
+    splits - whether split moves are allowed
+    hand_names - the letter of each hand in the names of moves
+    state_count - the number of codes
+    """
+    modulus: int
+    hands: int
+    splits: bool
+    hand_names: str
+    state_count: int
+    _attacks: List[Tuple[str, int, int]]
+    _distributions: Dict[int, List[Tuple[int, ...]]]
+    _states: Dict[int, 'GeneralChopsticksState']
+    _next: Dict[int, Dict[str, int]]
+    _moves: Dict[int, List[str]]
+    _canonical: Dict[int, int]
+
+    def __init__(self, modulus: int = 5, hands: int = 2,
+                 splits: bool = False) -> None:
+        """Initialize the rules of the variant with modulus, hands and splits
+
+        Raise ValueError if modulus is not between 2 and 36 or hands is not
+        between 1 and 18.
+
+        >>> r = ChopsticksRules(7, 3, True)
+        >>> r.hand_names, r.state_count
+        ('abc', 235298)
+        >>> ChopsticksRules(2, 19)
+        Traceback (most recent call last):
+        ...
+        ValueError: no chopsticks with modulus 2 and 19 hands
+        """
+        if (not 2 <= modulus <= len(DIGITS)
+                or not 1 <= hands <= len(HAND_LETTERS)):
+            raise ValueError("no chopsticks with modulus {} and {} "
+                             "hands".format(modulus, hands))
+        self.modulus = modulus
+        self.hands = hands
+        self.splits = splits
+        self.hand_names = 'lr' if hands == 2 else HAND_LETTERS[:hands]
+        self.state_count = 2 * modulus ** (2 * hands)
+        self._attacks = [(self.hand_names[i] + self.hand_names[j], i, j)
+                         for i in range(hands) for j in range(hands)]
+        self._distributions = {}
+        if splits:
+            for hand_values in product(range(modulus), repeat=hands):
+                self._distributions.setdefault(sum(hand_values), []).append(
+                    hand_values)
+        self._states = {}
+        self._next = {}
+        self._moves = {}
+        self._canonical = {}
+
+    def __str__(self) -> str:
+        """Return a description of self
+
+        >>> print(ChopsticksRules(10, 2, True))
+        chopsticks modulo 10 with 2 hands and splits
+        """
+        return "chopsticks modulo {} with {} hands{}".format(
+            self.modulus, self.hands, " and splits" if self.splits else "")
+
+    def __eq__(self, other: Any) -> bool:
+        """Return whether ChopsticksRules self is equivalent to other
+
+        >>> ChopsticksRules(5, 2) == ChopsticksRules()
+        True
+        """
+        return (type(self) == type(other)
+                and (self.modulus, self.hands, self.splits)
+                == (other.modulus, other.hands, other.splits))
+
+    def __hash__(self) -> int:
+        """Return the hash of the parameters of self
+        """
+        return hash((self.modulus, self.hands, self.splits))
+
+    def encode(self, current_player: str, p1_state: List[int],
+               p2_state: List[int]) -> int:
+        """Return the code of the position with current_player about to move
+        and hands p1_state and p2_state
+
+        >>> ChopsticksRules().encode('p1', [1, 1], [1, 1])
+        156
+        """
+        code = PLAYERS.index(current_player)
+        for hand in list(p1_state) + list(p2_state):
+            code = code * self.modulus + hand % self.modulus
+        return code
+
+    def decode(self, code: int) -> Tuple[str, List[int], List[int]]:
+        """Return the current player and the hands of both players of the
+        position with code code
+
+        >>> ChopsticksRules(7, 3).decode(ChopsticksRules(7, 3).encode(
+        ...     'p2', [1, 2, 3], [4, 5, 6]))
+        ('p2', [1, 2, 3], [4, 5, 6])
+        """
+        digits = []
+        for _ in range(2 * self.hands):
+            code, digit = divmod(code, self.modulus)
+            digits.append(digit)
+        digits.reverse()
+        return PLAYERS[code], digits[:self.hands], digits[self.hands:]
+
+    def state(self, code: int) -> 'GeneralChopsticksState':
+        """Return the shared state of the position with code code
+        """
+        state = self._states.get(code)
+        if state is None:
+            state = self._states[code] = _build_state(self, code)
+        return state
+
+    def successors(self, code: int) -> Dict[str, int]:
+        """Return a mapping from each legal move of the position with code
+        code to the code of the position after it, computed once
+
+        A position where a player has no live hand has no moves.
+
+        >>> r = ChopsticksRules(5, 2, True)
+        >>> r.successors(r.encode('p1', [1, 3], [2, 0]))
+        {'ll': 840, 'rl': 825, 's04': 735, 's22': 935, 's40': 1135}
+        """
+        result = self._next.get(code)
+        if result is None:
+            result = self._next[code] = self._build_successors(code)
+            self._moves[code] = list(result)
+        return result
+
+    def moves(self, code: int) -> List[str]:
+        """Return the legal moves of the position with code code, as a list
+        shared by every call
+        """
+        if code not in self._moves:
+            self.successors(code)
+        return self._moves[code]
+
+    def canonical(self, code: int) -> int:
+        """Return the code of the position with code code with the hands of
+        each player in increasing order, computed once
+
+        >>> r = ChopsticksRules(5, 3)
+        >>> r.decode(r.canonical(r.encode('p1', [3, 1, 2], [0, 4, 0])))
+        ('p1', [1, 2, 3], [0, 0, 4])
+        """
+        result = self._canonical.get(code)
+        if result is None:
+            current_player, p1_state, p2_state = self.decode(code)
+            result = self._canonical[code] = self.encode(
+                current_player, sorted(p1_state), sorted(p2_state))
+        return result
+
+    def is_over(self, code: int) -> bool:
+        """Return whether a player has no live hand at the position with code
+        code
+        """
+        _, p1_state, p2_state = self.decode(code)
+        return not any(p1_state) or not any(p2_state)
+
+    def cached_positions(self) -> int:
+        """Return the number of positions whose moves have been computed
+        """
+        return len(self._next)
+
+    def _build_successors(self, code: int) -> Dict[str, int]:
+        """Return the moves of the position with code code and the codes
+        they lead to
+        """
+        current_player, p1_state, p2_state = self.decode(code)
+        if not any(p1_state) or not any(p2_state):
+            return {}
+        own, other = p1_state, p2_state
+        if current_player == 'p2':
+            own, other = p2_state, p1_state
+        next_player = PLAYERS[1 - PLAYERS.index(current_player)]
+        result = {}
+        for name, attacker, target in self._attacks:
+            if own[attacker] and other[target]:
+                hit = other[:]
+                hit[target] = (other[target] + own[attacker]) % self.modulus
+                result[name] = self._encode_turn(next_player, own, hit)
+        if self.splits:
+            ordered = sorted(own)
+            for hand_values in self._distributions[sum(own)]:
+                if sorted(hand_values) != ordered:
+                    result['s' + ''.join(DIGITS[value]
+                                         for value in hand_values)] = \
+                        self._encode_turn(next_player, list(hand_values),
+                                          other)
+        return result
+
+    def _encode_turn(self, next_player: str, mover: List[int],
+                     waiter: List[int]) -> int:
+        """Return the code of the position with next_player about to move,
+        after the other player, whose hands are now mover, moved against
+        waiter, the hands of next_player
+        """
+        if next_player == 'p2':
+            return self.encode(next_player, mover, waiter)
+        return self.encode(next_player, waiter, mover)
+
+
+class GeneralChopsticksState(GameState):
+    """The current state of a chopsticks variant
+
+    States are interned by their rules, like ChopsticksState: creating a
+    state returns the one shared instance of its position, and the moves of
+    each position are computed once.
+
+    rules - the rules of the variant
+    """
+    __slots__ = ('rules', '_code')
+    rules: ChopsticksRules
+    _code: int
+
+    def __new__(cls, rules: ChopsticksRules, current_player: str,
+                p1_state: List[int],
+                p2_state: List[int]) -> 'GeneralChopsticksState':
+        """Return the shared state of the position of rules with
+        current_player about to move and hands p1_state and p2_state
+
+        >>> r = ChopsticksRules(7, 3)
+        >>> GeneralChopsticksState(r, 'p1', [1, 1, 1], [1, 1, 1]) is \\
+        ...     GeneralChopsticksState(r, 'p1', [1, 1, 1], [1, 1, 1])
+        True
+        """
+        return rules.state(rules.encode(current_player, p1_state, p2_state))
+
+    def __init__(self, rules: ChopsticksRules, current_player: str,
+                 p1_state: List[int], p2_state: List[int]) -> None:
+        """Initialize a new state of a chopsticks variant
+
+        Extends GameState.__init__
+
+        The shared state is initialized once, by __new__.
+        """
+
+    @property
+    def code(self) -> int:
+        """The integer that self is packed into
+        """
+        return self._code
+
+    @property
+    def current_value(self) -> Dict[str, List[int]]:
+        """The hands of both players, as {'p1': [...], 'p2': [...]}
+
+        >>> r = ChopsticksRules(7, 3)
+        >>> GeneralChopsticksState(r, 'p2', [1, 2, 3], [0, 0, 6]).current_value
+        {'p1': [1, 2, 3], 'p2': [0, 0, 6]}
+        """
+        _, p1_state, p2_state = self.rules.decode(self._code)
+        return {'p1': p1_state, 'p2': p2_state}
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Return how to pickle self: as its rules and code, so that it is
+        interned again when unpickled
+        """
+        return _unpickle_state, (self.rules.modulus, self.rules.hands,
+                                 self.rules.splits, self._code)
+
+    def __str__(self) -> str:
+        """Return a string representation of the hands of self
+
+        Overrides GameState.__str__
+
+        >>> r = ChopsticksRules(7, 3)
+        >>> print(GeneralChopsticksState(r, 'p1', [1, 2, 3], [4, 5, 6]))
+        Player 1: 1 2 3; Player 2: 4 5 6
+        """
+        _, p1_state, p2_state = self.rules.decode(self._code)
+        return "Player 1: {}; Player 2: {}".format(
+            " ".join(map(str, p1_state)), " ".join(map(str, p2_state)))
+
+    def __eq__(self, other: Any) -> bool:
+        """Return whether GeneralChopsticksState self is equivalent to other
+
+        Overrides GameState.__eq__
+        """
+        return (type(self) == type(other) and self._code == other._code
+                and self.rules == other.rules)
+
+    def __hash__(self) -> int:
+        """Return the hash of self, which is its code
+        """
+        return self._code
+
+    def get_possible_moves(self) -> list:
+        """Return all possible moves for a chopsticks variant
+
+        Overrides GameState.get_possible_moves
+
+        The returned list is shared by every call for the same position and
+        must not be modified.
+
+        >>> r = ChopsticksRules(5, 3)
+        >>> GeneralChopsticksState(r, 'p1', [1, 0, 2],
+        ...                        [0, 3, 0]).get_possible_moves()
+        ['ab', 'cb']
+        """
+        return self.rules.moves(self._code)
+
+    def is_valid_move(self, move_to_make: Any) -> bool:
+        """Return whether move_to_make is a valid move
+
+        Overrides GameState.is_valid_move
+        """
+        return move_to_make in self.rules.successors(self._code)
+
+    def make_move(self, move: str) -> 'GeneralChopsticksState':
+        """Apply the valid move
+
+        Overrides GameState.make_move
+
+        >>> r = ChopsticksRules(5, 2, True)
+        >>> print(GeneralChopsticksState(r, 'p1', [1, 3], [2, 0]).make_move(
+        ...     's22'))
+        Player 1: 2 2; Player 2: 2 0
+        """
+        return self.rules.state(self.rules.successors(self._code)[move])
+
+    def canonical(self) -> 'GeneralChopsticksState':
+        """Return the shared state of the position of self with the hands of
+        each player in increasing order
+
+        Overrides GameState.canonical
+
+        >>> r = ChopsticksRules(5, 3)
+        >>> print(GeneralChopsticksState(r, 'p1', [3, 1, 2],
+        ...                              [0, 4, 0]).canonical())
+        Player 1: 1 2 3; Player 2: 0 0 4
+        """
+        return self.rules.state(self.rules.canonical(self._code))
+
+    def canonical_move(self, move: str) -> str:
+        """Return the move of self.canonical() that corresponds to move of self
+
+        Overrides GameState.canonical_move
+
+        >>> r = ChopsticksRules(5, 3, True)
+        >>> s = GeneralChopsticksState(r, 'p1', [3, 1, 2], [0, 4, 0])
+        >>> s.canonical_move('ab'), s.canonical_move('s420')
+        ('cc', 's204')
+        """
+        own, other = self._orders()
+        if move[0] == 's':
+            return 's' + ''.join(move[1 + i] for i in own)
+        names = self.rules.hand_names
+        return (names[own.index(names.index(move[0]))]
+                + names[other.index(names.index(move[1]))])
+
+    def from_canonical_move(self, move: str) -> str:
+        """Return the move of self that corresponds to move of
+        self.canonical()
+
+        Overrides GameState.from_canonical_move
+
+        >>> r = ChopsticksRules(5, 3, True)
+        >>> s = GeneralChopsticksState(r, 'p1', [3, 1, 2], [0, 4, 0])
+        >>> s.from_canonical_move('cc'), s.from_canonical_move('s204')
+        ('ab', 's420')
+        """
+        own, other = self._orders()
+        if move[0] == 's':
+            values = [''] * len(own)
+            for i, hand in enumerate(own):
+                values[hand] = move[1 + i]
+            return 's' + ''.join(values)
+        names = self.rules.hand_names
+        return (names[own[names.index(move[0])]]
+                + names[other[names.index(move[1])]])
+
+    def copy(self) -> 'GeneralChopsticksState':
+        """Return a new state equal to self that apply_move may change
+
+        Overrides GameState.copy
+        """
+        return _build_state(self.rules, self._code)
+
+    def apply_move(self, move: str) -> int:
+        """Apply the valid move to self in place, and return what undo_move
+        needs to take it back
+
+        Overrides GameState.apply_move
+
+        Raise ValueError if self is a shared state rather than a copy.
+
+        >>> r = ChopsticksRules(7, 3)
+        >>> a = GeneralChopsticksState(r, 'p1', [1, 1, 1], [1, 1, 1]).copy()
+        >>> undo = a.apply_move('ab')
+        >>> print(a)
+        Player 1: 1 1 1; Player 2: 1 2 1
+        >>> a.undo_move(undo)
+        >>> print(a)
+        Player 1: 1 1 1; Player 2: 1 1 1
+        """
+        if self.rules.state(self._code) is self:
+            raise ValueError("apply_move needs a copy of a shared " +
+                             "GeneralChopsticksState")
+        undo = self._code
+        self._code = self.rules.successors(undo)[move]
+        self.current_player = PLAYERS[self._code // self.rules.modulus ** (
+            2 * self.rules.hands)]
+        return undo
+
+    def undo_move(self, undo: int) -> None:
+        """Take back the last move applied to self, where undo is what
+        apply_move returned for it
+
+        Overrides GameState.undo_move
+        """
+        self._code = undo
+        self.current_player = self.rules.state(undo).current_player
+
+    def _orders(self) -> Tuple[List[int], List[int]]:
+        """Return, for the player about to move and for the other player, the
+        hands in the order they take in self.canonical(): the hand at index
+        i of the canonical state is the hand at index order[i] of self
+        """
+        current_player, p1_state, p2_state = self.rules.decode(self._code)
+        own, other = p1_state, p2_state
+        if current_player == 'p2':
+            own, other = p2_state, p1_state
+        return (sorted(range(len(own)), key=lambda i: (own[i], i)),
+                sorted(range(len(other)), key=lambda i: (other[i], i)))
+
+
+def _build_state(rules: ChopsticksRules,
+                 code: int) -> GeneralChopsticksState:
+    """Return a new state of the position of rules with code code, bypassing
+    the interning in GeneralChopsticksState.__new__
+    """
+    state = object.__new__(GeneralChopsticksState)
+    state.rules = rules
+    state.current_player = PLAYERS[code // rules.modulus ** (2 * rules.hands)]
+    state._code = code
+    return state
+
+
+# The rules of each variant unpickled or read in this process, so that their
+# states are interned in one place.
+_RULES: Dict[Tuple[int, int, bool], ChopsticksRules] = {}
+
+
+def shared_rules(modulus: int, hands: int, splits: bool) -> ChopsticksRules:
+    """Return the rules of the variant with modulus, hands and splits shared
+    by every state rebuilt in this process
+
+    >>> shared_rules(7, 3, True) is shared_rules(7, 3, True)
+    True
+    """
+    key = (modulus, hands, splits)
+    if key not in _RULES:
+        _RULES[key] = ChopsticksRules(modulus, hands, splits)
+    return _RULES[key]
+
+
+def _unpickle_state(modulus: int, hands: int, splits: bool,
+                    code: int) -> GeneralChopsticksState:
+    """Return the shared state with code code of the variant with modulus,
+    hands and splits
+    """
+    return shared_rules(modulus, hands, splits).state(code)
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
@@ -0,0 +1,219 @@
+"""module for GrundyTable class
+"""
+from typing import List, Optional, Tuple, Union
+from array import array
+from math import isqrt
+from tablebase import Tablebase, write_tablebase
+
+
+class GrundyTable:
+    """A table of the Sprague-Grundy value of every subtract square pile size
+    up to size
+
+    The Grundy value of a pile is the smallest non-negative integer that is
+    not the Grundy value of a pile one square smaller. A sum of subtract
+    square games is lost by the player about to move exactly when the Grundy
+    values of its piles XOR to 0, so many piles cost one lookup each.
+
+    size - the largest pile size in the table
+    """
+    # The game identifier of Grundy value tablebases.
+    GAME = 'ss_grundy'
+    size: int
+    _values: Union[array, memoryview]
+    _tablebase: Optional[Tablebase]
+
+    def __init__(self, size: int = 0) -> None:
+        """Initialize a new table of every pile size up to size
+
+        >>> t = GrundyTable(12)
+        >>> [t.grundy(v) for v in range(13)]
+        [0, 1, 0, 1, 2, 0, 1, 0, 1, 2, 0, 1, 0]
+        """
+        self.size = -1
+        self._values = array('H')
+        self._tablebase = None
+        self.extend(size)
+
+    def __str__(self) -> str:
+        """Return a string representation of self
+
+        >>> print(GrundyTable(100))
+        Grundy table of the pile sizes 0 to 100
+        """
+        return "Grundy table of the pile sizes 0 to {}".format(self.size)
+
+    def grundy(self, pile: int) -> int:
+        """Return the Grundy value of pile
+
+        Assume 0 <= pile <= self.size
+        """
+        return self._values[pile]
+
+    def position_value(self, piles: List[int]) -> int:
+        """Return the XOR of the Grundy values of piles, which is 0 exactly
+        when piles is lost by the player about to move
+
+        Assume every pile is at most self.size
+
+        >>> t = GrundyTable(10)
+        >>> t.position_value([2, 5])
+        0
+        >>> t.position_value([4, 1])
+        3
+        """
+        result = 0
+        values = self._values
+        for pile in piles:
+            result ^= values[pile]
+        return result
+
+    def best_move(self, piles: List[int]) -> Optional[Tuple[int, int]]:
+        """Return a move (pile, square) of piles that leaves a position whose
+        Grundy values XOR to 0, the move (pile, 1) from the first non-empty
+        pile if piles is lost, or None if every pile is empty
+
+        Assume every pile is at most self.size
+
+        >>> t = GrundyTable(10)
+        >>> t.best_move([4, 1])
+        (0, 1)
+        >>> t.best_move([2, 5]), t.best_move([0, 0])
+        ((0, 1), None)
+        """
+        total = self.position_value(piles)
+        values = self._values
+        for index, pile in enumerate(piles):
+            # Some move of pile reaches every Grundy value below its own.
+            target = values[pile] ^ total
+            if total and target < values[pile]:
+                for base in range(1, isqrt(pile) + 1):
+                    if values[pile - base * base] == target:
+                        return index, base * base
+        for index, pile in enumerate(piles):
+            if pile:
+                return index, 1
+        return None
+
+    def extend(self, size: int) -> None:
+        """Extend self to every pile size up to size, reusing the values that
+        are already in the table
+
+        >>> t = GrundyTable(5)
+        >>> t.extend(200)
+        >>> t == GrundyTable(200)
+        True
+        """
+        if size <= self.size:
+            return
+        values = self._copy()
+        seen = []
+        for pile in range(self.size + 1, size + 1):
+            # seen[g] == pile marks g as the Grundy value of some move.
+            for base in range(1, isqrt(pile) + 1):
+                value = values[pile - base * base]
+                while len(seen) <= value:
+                    seen.append(-1)
+                seen[value] = pile
+            mex = 0
+            while mex < len(seen) and seen[mex] == pile:
+                mex += 1
+            values.append(mex)
+        self._values = values
+        self.size = size
+
+    def save(self, path: str) -> None:
+        """Save self to a tablebase file at path
+
+        >>> import os
+        >>> import tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'g.table')
+        >>> GrundyTable(50).save(path)
+        >>> GrundyTable.load(path) == GrundyTable(50)
+        True
+        """
+        write_tablebase(path, self.GAME, 'H', 1, array('H', self._values))
+
+    @classmethod
+    def load(cls, path: str) -> 'GrundyTable':
+        """Return the table saved in the tablebase file at path, memory-mapped
+        rather than read into memory
+
+        Raise ValueError if the file is not a Grundy value tablebase.
+        """
+        tablebase = Tablebase(path)
+        if (tablebase.game != cls.GAME or tablebase.typecode != 'H'
+                or tablebase.width != 1):
+            raise ValueError("{} is not a Grundy value tablebase".format(path))
+        table = cls.__new__(cls)
+        table.size = tablebase.count - 1
+        table._tablebase = tablebase
+        table._values = tablebase.records()
+        return table
+
+    @classmethod
+    def load_or_build(cls, path: str, size: int) -> 'GrundyTable':
+        """Return the table saved at path, extended and saved again if it does
+        not reach size
+
+        A missing or unreadable file is rebuilt from scratch.
+        """
+        try:
+            table = cls.load(path)
+        except (OSError, ValueError):
+            table = cls()
+        if table.size < size:
+            table.extend(size)
+            table.save(path)
+        return table
+
+    def check(self) -> List[str]:
+        """Return the pile sizes whose Grundy value is not the smallest value
+        missing from the piles one square smaller, described as problems
+
+        >>> GrundyTable(300).check()
+        []
+        """
+        problems = []
+        values = self._values
+        for pile in range(self.size + 1):
+            reached = {values[pile - base * base]
+                       for base in range(1, isqrt(pile) + 1)}
+            mex = 0
+            while mex in reached:
+                mex += 1
+            if values[pile] != mex:
+                problems.append("{} has the wrong Grundy value".format(pile))
+        return problems
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether GrundyTable self is equivalent to other
+
+        >>> GrundyTable(3) == GrundyTable(4)
+        False
+        """
+        return (type(self) == type(other)
+                and self.size == other.size
+                and bytes(self._values) == bytes(other._values))
+
+    def close(self) -> None:
+        """Release the file mapped by self, keeping a copy of its values
+        """
+        self._values = self._copy()
+
+    def _copy(self) -> array:
+        """Return the values of self as an array in memory, releasing the
+        memory-mapped file of self, if any
+        """
+        if self._tablebase is None:
+            return self._values
+        values = array('H')
+        values.frombytes(self._values.cast('B'))
+        self._tablebase.close()
+        self._tablebase = None
+        return values
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
@@ -0,0 +1,145 @@
+"""module for observers of GameInterface.play
+"""
+from typing import Any, Dict
+
+
+class PlayObserver:
+    """An observer of each phase of the turns of GameInterface.play
+
+    GameInterface.play calls these methods at every turn. Without an
+    observer it calls those of a shared PlayObserver and does not time the
+    phases, so a game played without one only pays for calls that do
+    nothing. Subclasses override the methods they need; the ones here do
+    nothing.
+    """
+
+    def game_started(self, game: Any) -> None:
+        """Called before the first turn of game
+        """
+
+    def moves_generated(self, moves: Any, seconds: float) -> None:
+        """Called after the possible moves of a turn, moves, took seconds to
+        generate
+        """
+
+    def move_chosen(self, player: str, move: Any, seconds: float,
+                    valid: bool) -> None:
+        """Called after the strategy of player took seconds to choose move,
+        and checking whether move is valid gave valid
+        """
+
+    def move_made(self, player: str, move: Any, seconds: float) -> None:
+        """Called after applying the move of player took seconds
+        """
+
+    def printed(self, seconds: float) -> None:
+        """Called after printing took seconds
+        """
+
+    def game_over(self, game: Any) -> None:
+        """Called after the last turn of game
+        """
+
+
+class TurnRecorder(PlayObserver):
+    """A PlayObserver that records the timings and counts of every turn
+
+    turns - the number of turns played
+    phase_times - the total seconds spent in each phase of a turn
+    invalid_moves - the number of invalid moves of each player
+    total_moves - the total number of possible moves of every turn
+    max_moves - the most possible moves of a turn
+    """
+    turns: int
+    phase_times: Dict[str, float]
+    invalid_moves: Dict[str, int]
+    total_moves: int
+    max_moves: int
+
+    def __init__(self) -> None:
+        """Initialize a new recorder of no turns
+
+        >>> r = TurnRecorder()
+        >>> r.turns, r.phase_times['strategy']
+        (0, 0.0)
+        """
+        self.turns = 0
+        self.phase_times = {'generate': 0.0, 'strategy': 0.0, 'apply': 0.0,
+                            'print': 0.0}
+        self.invalid_moves = {'p1': 0, 'p2': 0}
+        self.total_moves = 0
+        self.max_moves = 0
+
+    def __str__(self) -> str:
+        """Return the summary of self as text
+
+        >>> print(TurnRecorder())
+        0 turns, 0 invalid moves, 0.0 possible moves per turn (max 0)
+        generate 0.000 s, strategy 0.000 s, apply 0.000 s, print 0.000 s
+        """
+        summary = self.summary()
+        return ("{turns} turns, {invalid_moves} invalid moves, " +
+                "{mean_moves:.1f} possible moves per turn (max {max_moves})\n" +
+                "generate {generate:.3f} s, strategy {strategy:.3f} s, " +
+                "apply {apply:.3f} s, print {print:.3f} s").format(**summary)
+
+    def moves_generated(self, moves: Any, seconds: float) -> None:
+        """Record the number of moves of a new turn and the seconds it took to
+        generate them
+
+        Overrides PlayObserver.moves_generated
+        """
+        self.turns += 1
+        count = len(moves)
+        self.total_moves += count
+        if count > self.max_moves:
+            self.max_moves = count
+        self.phase_times['generate'] += seconds
+
+    def move_chosen(self, player: str, move: Any, seconds: float,
+                    valid: bool) -> None:
+        """Record the seconds the strategy of player took and whether it
+        chose an invalid move
+
+        Overrides PlayObserver.move_chosen
+        """
+        self.phase_times['strategy'] += seconds
+        if not valid:
+            self.invalid_moves[player] += 1
+
+    def move_made(self, player: str, move: Any, seconds: float) -> None:
+        """Record the seconds applying a move took
+
+        Overrides PlayObserver.move_made
+        """
+        self.phase_times['apply'] += seconds
+
+    def printed(self, seconds: float) -> None:
+        """Record the seconds printing took
+
+        Overrides PlayObserver.printed
+        """
+        self.phase_times['print'] += seconds
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the summary of the game recorded by self
+
+        >>> r = TurnRecorder()
+        >>> r.moves_generated([1, 4, 9], 0.5)
+        >>> r.move_chosen('p1', 7, 0.25, False)
+        >>> s = r.summary()
+        >>> s['turns'], s['invalid_moves'], s['max_moves'], s['strategy']
+        (1, 1, 3, 0.25)
+        """
+        summary = dict(self.phase_times)
+        summary['turns'] = self.turns
+        summary['invalid_moves'] = sum(self.invalid_moves.values())
+        summary['max_moves'] = self.max_moves
+        summary['mean_moves'] = (self.total_moves / self.turns
+                                 if self.turns else 0.0)
+        return summary
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
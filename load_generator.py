@@ -0,0 +1,203 @@
+"""module for the load generator of GameServer
+
+Each of a number of concurrent connections plays sessions one after
+another, choosing random moves for the client seats, until the requested
+number of sessions is done. The latency of a move is the time from sending
+MOVE to receiving the next TURN or OVER, so it includes the bot's reply.
+
+Run it against a running server, or against one started in this process:
+
+    python load_generator.py --connect 127.0.0.1:8765 -n 1000 -c 50
+    python load_generator.py --local -n 200 --session 'c h m'
+"""
+from typing import List, Optional
+import argparse
+import asyncio
+import random
+import time
+from game_server import GameServer
+
+# The session played unless another is asked for: subtract square from 50,
+# with the client as player 1 against a table lookup.
+DEFAULT_SESSION = 's h t 50'
+
+
+class LoadReport:
+    """The results of a load test
+
+    sessions - the number of sessions played to the end
+    elapsed - the wall-clock seconds of the test
+    latencies - the seconds of every client move until the server's reply
+    errors - the error lines received from the server
+    """
+    sessions: int
+    elapsed: float
+    latencies: List[float]
+    errors: List[str]
+
+    def __init__(self) -> None:
+        """Initialize a new, empty report
+
+        >>> print(LoadReport())
+        0 sessions in 0.00 s: 0.0 sessions per second
+        0 moves: p50 0.000 ms, p99 0.000 ms, max 0.000 ms
+        """
+        self.sessions = 0
+        self.elapsed = 0.0
+        self.latencies = []
+        self.errors = []
+
+    def __str__(self) -> str:
+        """Return a summary of self
+        """
+        lines = ["{} sessions in {:.2f} s: {:.1f} sessions per second".format(
+            self.sessions, self.elapsed, self.sessions_per_second()),
+            "{} moves: p50 {:.3f} ms, p99 {:.3f} ms, max {:.3f} ms".format(
+                len(self.latencies), 1000 * self.percentile(50),
+                1000 * self.percentile(99), 1000 * self.percentile(100))]
+        lines.extend("ERR {}".format(error) for error in self.errors)
+        return "\n".join(lines)
+
+    def sessions_per_second(self) -> float:
+        """Return the number of sessions played per second
+        """
+        if not self.elapsed:
+            return 0.0
+        return self.sessions / self.elapsed
+
+    def percentile(self, q: float) -> float:
+        """Return the latency that q percent of the moves did not exceed
+
+        >>> r = LoadReport()
+        >>> r.latencies = [i / 1000 for i in range(1, 101)]
+        >>> r.percentile(99), r.percentile(100)
+        (0.099, 0.1)
+        """
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = max(0, -(-len(ordered) * q // 100) - 1)
+        return ordered[int(index)]
+
+
+async def run_load(address: str, sessions: int, concurrency: int,
+                   session: str = DEFAULT_SESSION,
+                   seed: Optional[int] = None) -> LoadReport:
+    """Return the report of playing sessions sessions of session, the
+    arguments of a NEW line, over concurrency connections to the server at
+    address, which is host:port or the path of a Unix socket
+
+    >>> async def demo():
+    ...     server = GameServer()
+    ...     address = await server.start()
+    ...     report = await run_load(address, 6, 3, 's h r 30', seed=0)
+    ...     await server.close()
+    ...     return report
+    >>> report = asyncio.run(demo())
+    >>> report.sessions, report.errors, len(report.latencies) > 0
+    (6, [], True)
+    """
+    report = LoadReport()
+    remaining = [sessions]
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    await asyncio.gather(*[_client(address, session, remaining, rng, report)
+                           for _ in range(min(concurrency, sessions))])
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+async def _client(address: str, session: str, remaining: List[int],
+                  rng: random.Random, report: LoadReport) -> None:
+    """Play sessions over one connection while remaining[0] is positive,
+    recording them in report
+    """
+    if ':' in address and '/' not in address:
+        host, port = address.rsplit(':', 1)
+        reader, writer = await asyncio.open_connection(host, int(port))
+    else:
+        reader, writer = await asyncio.open_unix_connection(address)
+    await reader.readline()
+    try:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            writer.write('NEW {}\n'.format(session).encode())
+            await writer.drain()
+            if not await _play_session(reader, writer, rng, report):
+                break
+        writer.write(b'QUIT\n')
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def _play_session(reader: asyncio.StreamReader,
+                        writer: asyncio.StreamWriter, rng: random.Random,
+                        report: LoadReport) -> bool:
+    """Play one session with random moves until it is over, and return
+    whether it was, rather than refused or cut off
+    """
+    moves = []
+    sent = None
+    while True:
+        line = (await reader.readline()).decode().strip()
+        if not line:
+            return False
+        kind, _, rest = line.partition(' ')
+        if sent is not None and kind in ('TURN', 'OVER'):
+            report.latencies.append(time.perf_counter() - sent)
+            sent = None
+        if kind == 'MOVES':
+            moves = rest.split(' | ')
+        elif kind == 'TURN':
+            writer.write('MOVE {}\n'.format(rng.choice(moves)).encode())
+            sent = time.perf_counter()
+            await writer.drain()
+        elif kind == 'OVER':
+            report.sessions += 1
+            return True
+        elif kind == 'ERR':
+            report.errors.append(rest)
+            return False
+
+
+def _parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """Return the command line arguments of the load generator
+    """
+    parser = argparse.ArgumentParser(
+        description="Measure sessions per second and move latency of a "
+                    "game server.")
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument('--connect', metavar='ADDRESS',
+                       help="host:port or the path of a Unix socket")
+    where.add_argument('--local', action='store_true',
+                       help="start a server in this process")
+    parser.add_argument('-n', '--sessions', type=int, default=100)
+    parser.add_argument('-c', '--concurrency', type=int, default=10)
+    parser.add_argument('--session', default=DEFAULT_SESSION,
+                        help="the arguments of each NEW line")
+    parser.add_argument('-j', '--processes', type=int, default=0,
+                        help="worker processes of a --local server")
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args(args)
+
+
+async def main(args: Optional[List[str]] = None) -> None:
+    """Run the load test the command line args ask for and print its report
+    """
+    options = _parse_args(args)
+    server = None
+    address = options.connect
+    if options.local:
+        server = GameServer(options.processes)
+        address = await server.start()
+    try:
+        print(await run_load(address, options.sessions, options.concurrency,
+                             options.session, options.seed))
+    finally:
+        if server is not None:
+            await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
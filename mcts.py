@@ -0,0 +1,276 @@
+"""module for MCTS class
+"""
+from typing import Any, Callable, List, Optional
+import math
+import random
+import time
+from game import Game
+from game_state import GameState
+
+# Pondering stops once the tree of the position has this many times the
+# iterations of a move, so a long wait does not grow the tree without bound.
+PONDER_FACTOR = 100
+
+
+class MCTS:
+    """A Monte Carlo tree search player for a two-player, sequential move,
+    zero-sum, perfect-information game
+
+    Each iteration walks down the search tree by UCT, adds one new position
+    and finishes the game from there with random moves. The search is
+    limited by a number of iterations, a number of seconds, or both, and
+    keeps the subtree of the position after its move, so the next search
+    starts from the work already done.
+
+    iterations - the number of iterations per move, or None for no limit
+    seconds - the wall-clock seconds per move, or None for no limit
+    exploration - the exploration constant of UCT
+    playout_limit - the number of random moves after which a playout counts
+        as a draw
+    playouts - the number of playouts run so far
+    search_time - the total seconds spent searching
+    tree_size - the number of positions in the current search tree
+    """
+    iterations: Optional[int]
+    seconds: Optional[float]
+    exploration: float
+    playout_limit: int
+    playouts: int
+    search_time: float
+    tree_size: int
+    _root: Optional['_Node']
+    _pondered: Optional['_Node']
+
+    def __init__(self, iterations: Optional[int] = 1000,
+                 seconds: Optional[float] = None, exploration: float = 1.4,
+                 playout_limit: int = 200) -> None:
+        """Initialize a new player with an empty search tree
+
+        Assume at least one of iterations and seconds is not None
+
+        >>> m = MCTS(iterations=50)
+        >>> m.playouts, m.tree_size
+        (0, 0)
+        """
+        self.iterations = iterations
+        self.seconds = seconds
+        self.exploration = exploration
+        self.playout_limit = playout_limit
+        self.playouts = 0
+        self.search_time = 0.0
+        self.tree_size = 0
+        self._root = None
+        self._pondered = None
+
+    def __str__(self) -> str:
+        """Return a summary of the statistics of self
+
+        >>> print(MCTS())
+        MCTS: 0 playouts, 0 playouts per second, 0 positions in the tree
+        """
+        return ("MCTS: {} playouts, {:.0f} playouts per second, {} " +
+                "positions in the tree").format(self.playouts,
+                                                self.playouts_per_second(),
+                                                self.tree_size)
+
+    def playouts_per_second(self) -> float:
+        """Return the number of playouts run per second of search
+        """
+        if not self.search_time:
+            return 0.0
+        return self.playouts / self.search_time
+
+    def choose_move(self, game: Game, state: GameState) -> Any:
+        """Return the move of state visited most by a search within the
+        budget of self
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> random.seed(0)
+        >>> m = MCTS(iterations=300)
+        >>> s = ChopsticksState('p1', [1, 2], [3, 0])
+        >>> m.choose_move(Chopsticks(True), s)
+        'rl'
+        """
+        start = time.perf_counter()
+        root = self._find_root(state)
+        deadline = None
+        if self.seconds is not None:
+            deadline = start + self.seconds
+        done = 0
+        # The playouts pondered through root count toward the iterations.
+        if self._pondered is not None and root.parent is None and any(
+                child is root for child in self._pondered.children):
+            done = root.visits
+        self._pondered = None
+        while ((self.iterations is None or done < self.iterations)
+               and (deadline is None or time.perf_counter() < deadline)):
+            self._iterate(game, root)
+            done += 1
+        best = max(root.children, key=lambda child: child.visits,
+                   default=None)
+        self.search_time += time.perf_counter() - start
+        if best is None:
+            return None
+        # Keep the subtree after the chosen move for the next search.
+        self._root = best
+        self.tree_size = best.count()
+        return best.move
+
+    def ponder(self, game: Game, state: GameState,
+               should_stop: Callable[[], bool]) -> int:
+        """Search the tree of state, where the opponent of self is to move,
+        until should_stop returns True or the tree of state has PONDER_FACTOR
+        times the iterations of a move, and return how many playouts were
+        run
+
+        The tree is kept, so choose_move after the opponent's move starts
+        from the subtree of that move, whose playouts count toward its
+        iterations.
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> random.seed(0)
+        >>> m = MCTS(iterations=100)
+        >>> s = ChopsticksState('p2', [1, 2], [3, 0])
+        >>> m.ponder(Chopsticks(True), s, lambda: m.playouts >= 500)
+        500
+        >>> before = m.playouts
+        >>> m.choose_move(Chopsticks(True), s.make_move('ll')) is not None
+        True
+        >>> m.playouts - before < 100
+        True
+        """
+        start = time.perf_counter()
+        root = self._find_root(state)
+        self._pondered = root
+        limit = PONDER_FACTOR * (self.iterations or 1000)
+        done = 0
+        while root.visits < limit and not should_stop():
+            self._iterate(game, root)
+            done += 1
+        self.search_time += time.perf_counter() - start
+        return done
+
+    def reset(self) -> None:
+        """Discard the search tree of self
+        """
+        self._root = None
+        self._pondered = None
+        self.tree_size = 0
+
+    def _find_root(self, state: GameState) -> '_Node':
+        """Return the node of state in the tree kept from the last search, or
+        a new root if it is not there
+        """
+        if self._root is not None:
+            if self._root.state == state:
+                return self._root
+            for child in self._root.children:
+                if child.state == state:
+                    child.parent = None
+                    self._root = child
+                    self.tree_size = child.count()
+                    return child
+        self._root = _Node(state, None, None)
+        self.tree_size = 1
+        return self._root
+
+    def _iterate(self, game: Game, root: '_Node') -> None:
+        """Run one selection, expansion, playout and backpropagation from root
+        """
+        node = root
+        while not node.untried and node.children:
+            node = node.best_child(self.exploration)
+        if node.untried:
+            move = node.untried.pop()
+            child = _Node(node.state.make_move(move), move, node)
+            if game.is_over(child.state):
+                child.untried = []
+            node.children.append(child)
+            node = child
+            self.tree_size += 1
+        # The score is 1 if the player about to move at node wins.
+        score = self._playout(game, node.state)
+        self.playouts += 1
+        while node is not None:
+            node.visits += 1
+            node.score += 1 - score
+            score = 1 - score
+            node = node.parent
+
+    def _playout(self, game: Game, state: GameState) -> float:
+        """Return 1 if the player about to move at state wins a game finished
+        with random moves, 0 if they lose, and 0.5 if it goes on too long
+
+        The moves are applied in place to one copy of state.
+        """
+        mover = True
+        state = state.copy()
+        for _ in range(self.playout_limit):
+            if game.is_over(state):
+                return 0.0 if mover else 1.0
+            state.apply_move(random.choice(state.get_possible_moves()))
+            mover = not mover
+        if game.is_over(state):
+            return 0.0 if mover else 1.0
+        return 0.5
+
+
+class _Node:
+    """A position in the search tree of MCTS
+
+    state - the position
+    move - the move that led to state from parent
+    parent - the node before move, or None at the root
+    children - the nodes of the moves tried from state
+    untried - the moves of state without a node yet
+    visits - the number of playouts through self
+    score - the total score of those playouts for the player who made move
+    """
+    __slots__ = ('state', 'move', 'parent', 'children', 'untried', 'visits',
+                 'score')
+    state: GameState
+    move: Any
+    parent: Optional['_Node']
+    children: List['_Node']
+    untried: List[Any]
+    visits: int
+    score: float
+
+    def __init__(self, state: GameState, move: Any,
+                 parent: Optional['_Node']) -> None:
+        """Initialize a new node of state, reached by move from parent
+        """
+        self.state = state
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = list(state.get_possible_moves())
+        random.shuffle(self.untried)
+        self.visits = 0
+        self.score = 0.0
+
+    def best_child(self, exploration: float) -> '_Node':
+        """Return the child of self with the highest UCT value
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda c: (c.score / c.visits + exploration *
+                                  math.sqrt(log_visits / c.visits)))
+
+    def count(self) -> int:
+        """Return the number of nodes in the subtree of self
+        """
+        total = 0
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            total += 1
+            pending.extend(node.children)
+        return total
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
@@ -0,0 +1,120 @@
+"""module for MoveCache class
+"""
+from typing import Any, Callable, Hashable, List
+from collections import OrderedDict
+
+
+class MoveCache:
+    """A bounded cache of the moves of positions, which evicts the least
+    recently used position when it is full
+
+    maxsize - the most positions kept, where 0 keeps none
+    hits - the number of lookups answered from the cache
+    misses - the number of lookups that generated the moves
+    generate - the function that generates the moves of a state
+    """
+    maxsize: int
+    hits: int
+    misses: int
+    generate: Callable[[Any], List[Any]]
+    _entries: 'OrderedDict[Hashable, List[Any]]'
+
+    def __init__(self, generate: Callable[[Any], List[Any]],
+                 maxsize: int = 1024) -> None:
+        """Initialize a new, empty cache of the moves generated by generate
+
+        Raise ValueError if maxsize is negative.
+
+        >>> c = MoveCache(lambda n: list(range(n)), 2)
+        >>> c.lookup(3, 3), c.lookup(3, 3)
+        ([0, 1, 2], [0, 1, 2])
+        >>> print(c)
+        1/2 positions: 50.0% hits (1 hits, 1 misses)
+        """
+        if maxsize < 0:
+            raise ValueError("maxsize must be non-negative")
+        self.generate = generate
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __str__(self) -> str:
+        """Return a summary of the size and the statistics of self
+        """
+        return "{}/{} positions: {:.1%} hits ({} hits, {} misses)".format(
+            len(self), self.maxsize, self.hit_rate(), self.hits, self.misses)
+
+    def __len__(self) -> int:
+        """Return the number of positions in self
+        """
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether the moves of the position with key key are in self
+        """
+        return key in self._entries
+
+    def lookup(self, state: Any, key: Hashable) -> List[Any]:
+        """Return the moves of state, whose position key is key, generating
+        them only if key is not in self
+
+        The returned list is shared by every lookup of key while it stays in
+        self, and must not be modified.
+
+        >>> c = MoveCache(lambda n: list(range(n)), 2)
+        >>> for n in (1, 2, 1, 3, 2):
+        ...     moves = c.lookup(n, n)
+        >>> c.hits, c.misses, list(c._entries)
+        (1, 4, [3, 2])
+        """
+        entries = self._entries
+        moves = entries.get(key)
+        if moves is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return moves
+        self.misses += 1
+        moves = self.generate(state)
+        if self.maxsize:
+            entries[key] = moves
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+        return moves
+
+    def hit_rate(self) -> float:
+        """Return the fraction of lookups answered from the cache
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        """Remove every position from self and reset its statistics
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def resize(self, maxsize: int) -> None:
+        """Keep at most maxsize positions from now on, evicting the least
+        recently used ones that no longer fit
+
+        Raise ValueError if maxsize is negative.
+
+        >>> c = MoveCache(lambda n: list(range(n)), 3)
+        >>> for n in (1, 2, 3):
+        ...     moves = c.lookup(n, n)
+        >>> c.resize(1)
+        >>> list(c._entries)
+        [3]
+        """
+        if maxsize < 0:
+            raise ValueError("maxsize must be non-negative")
+        self.maxsize = maxsize
+        while len(self._entries) > maxsize:
+            self._entries.popitem(last=False)
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
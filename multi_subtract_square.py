@@ -0,0 +1,71 @@
+"""module for MultiSubtractSquare class
+"""
+from typing import List, Optional, Tuple
+from subtract_square import SubtractSquare
+from multi_subtract_square_state import MultiSubtractSquareState
+
+
+class MultiSubtractSquare(SubtractSquare):
+    """A subtract square game played on several piles, which is the sum of
+    one subtract square game per pile
+    """
+    current_state: MultiSubtractSquareState
+
+    def __init__(self, is_p1_turn: bool,
+                 piles: Optional[List[int]] = None) -> None:
+        """Initialize a new multi-pile subtract square game, asking for the
+        starting piles if piles is None
+
+        Extends SubtractSquare.__init__
+
+        current_value is the total of the piles.
+
+        Assume every pile is a non-negative whole number
+
+        >>> a = MultiSubtractSquare(True, [3, 5, 7])
+        >>> print(a)
+        The current player is Player 1 and the piles are [3, 5, 7]
+        """
+        if piles is None:
+            piles = [int(pile) for pile in input(
+                "Type the starting values of the piles, separated by " +
+                "spaces: ").split()]
+        super().__init__(is_p1_turn, sum(piles))
+        self.current_state = MultiSubtractSquareState(self.current_player,
+                                                      piles)
+
+    def get_instructions(self) -> str:
+        """Return instructions of the multi-pile subtract square game
+
+        Overrides SubtractSquare.get_instructions
+        """
+        return ("A multi-pile subtract square game is played as follows: \n" +
+                "Some piles of non-negative whole numbers are chosen by " +
+                "some neutral\nentity. Players take turns subtracting a " +
+                "square value (such as 1, 4,\n9, ...) from any one pile, " +
+                "provided the chosen square is not larger\nthan that pile. " +
+                "A move is written as the index of the pile, starting\nat " +
+                "0, and the square, such as 0 4. When no moves are " +
+                "possible,\nwhoever is about to play at that point loses!")
+
+    def str_to_move(self, move: str) -> Tuple[int, int]:
+        """Return move, written as the index of a pile and a square, as a
+        tuple
+
+        Overrides SubtractSquare.str_to_move
+
+        >>> g = MultiSubtractSquare(True, [3, 5])
+        >>> g.str_to_move('1 4'), g.str_to_move('(0, 1)')
+        ((1, 4), (0, 1))
+        """
+        try:
+            pile, square = move.strip('() ').replace(',', ' ').split()
+            return int(pile), int(square)
+        except ValueError as ve:
+            print(ve)
+            print("Your move must be the index of a pile and a square")
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
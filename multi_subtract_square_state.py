@@ -0,0 +1,220 @@
+"""module for MultiSubtractSquareState class
+"""
+from typing import Any, List, Tuple
+from subtract_square_state import SubtractSquareState
+
+# The seed of the random keys, which is fixed so that hashes agree between
+# processes.
+_KEY_SEED = 0x5ea5e
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(x: int) -> int:
+    """Return the 64-bit integer x scrambled by the splitmix64 finalizer, a
+    fixed function whose results look random
+
+    >>> _mix64(0)
+    16294208416658607535
+    """
+    x = (x + 0x9e3779b97f4a7c15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & _MASK64
+    return x ^ (x >> 31)
+
+
+# The random key of Player 2 being about to move.
+_P2_KEY = _mix64(_KEY_SEED)
+
+
+class MultiSubtractSquareState(SubtractSquareState):
+    """The current state of a subtract square game played on several piles,
+    where a move subtracts a square from any one pile
+
+    A move is a tuple (pile, square) of the index of a pile and the square to
+    subtract from it.
+
+    The hash is a Zobrist hash: the exclusive or of the random key of the
+    value of each pile, and of a random key when Player 2 is to move, so
+    apply_move and undo_move update it from the one pile they change.
+    """
+    piles: List[int]
+
+    def __init__(self, current_player: str, piles: List[int]) -> None:
+        """Initialize a new state of a multi-pile subtract square game
+
+        Extends SubtractSquareState.__init__
+
+        ===New Attributes===
+        piles - the current value of each pile
+
+        current_value is the total of piles, so the game is over when it
+        is 0.
+
+        >>> s = MultiSubtractSquareState('p1', [3, 5])
+        >>> s.piles, s.current_value
+        ([3, 5], 8)
+        """
+        super().__init__(current_player, sum(piles))
+        self.piles = list(piles)
+        self._hash = _P2_KEY if current_player == 'p2' else 0
+        for pile, value in enumerate(self.piles):
+            self._hash ^= _value_key(pile, value)
+
+    def __str__(self) -> str:
+        """Return a string representation of current_player and piles of self
+
+        Overrides SubtractSquareState.__str__
+
+        >>> print(MultiSubtractSquareState('p2', [3, 5]))
+        The current player is Player 2 and the piles are [3, 5]
+        """
+        player = 2
+        if self.current_player == 'p1':
+            player = 1
+        return "The current player is Player {} and the piles are {}".format(
+            player, self.piles)
+
+    def __eq__(self, other: Any) -> bool:
+        """Return whether MultiSubtractSquareState self is equivalent to other
+
+        Overrides SubtractSquareState.__eq__
+
+        >>> a = MultiSubtractSquareState('p1', [3, 5])
+        >>> a == MultiSubtractSquareState('p1', [5, 3])
+        False
+        >>> a == MultiSubtractSquareState('p1', [3, 5])
+        True
+        """
+        return (type(self) == type(other) and self._hash == other._hash
+                and self.piles == other.piles
+                and self.current_player == other.current_player)
+
+    def __hash__(self) -> int:
+        """Return the hash of self
+
+        Overrides SubtractSquareState.__hash__
+
+        >>> a = MultiSubtractSquareState('p1', [3, 5])
+        >>> hash(a) == hash(MultiSubtractSquareState('p1', [3, 5]))
+        True
+        >>> hash(a) == hash(MultiSubtractSquareState('p1', [5, 3]))
+        False
+        """
+        return self._hash
+
+    def get_possible_moves(self) -> list:
+        """Return all possible moves for the multi-pile subtract square game
+
+        Overrides SubtractSquareState.get_possible_moves
+
+        >>> MultiSubtractSquareState('p1', [4, 0, 2]).get_possible_moves()
+        [(0, 1), (0, 4), (2, 1)]
+        """
+        result = []
+        for pile, value in enumerate(self.piles):
+            base = 1
+            while base * base <= value:
+                result.append((pile, base * base))
+                base += 1
+        return result
+
+    def moves_key(self) -> Tuple[int, ...]:
+        """Return the piles of self, which decide its possible moves
+
+        Overrides SubtractSquareState.moves_key
+
+        >>> MultiSubtractSquareState('p2', [4, 0, 2]).moves_key()
+        (4, 0, 2)
+        """
+        return tuple(self.piles)
+
+    def is_valid_move(self, move_to_make: Any) -> bool:
+        """Return whether move_to_make is a valid move
+
+        Overrides SubtractSquareState.is_valid_move
+
+        >>> a = MultiSubtractSquareState('p1', [4, 2])
+        >>> a.is_valid_move((0, 4)), a.is_valid_move((1, 4))
+        (True, False)
+        >>> a.is_valid_move(4)
+        False
+        """
+        return move_to_make in self.get_possible_moves()
+
+    def make_move(self, move: Tuple[int, int]) -> 'MultiSubtractSquareState':
+        """Apply the valid move
+
+        Overrides SubtractSquareState.make_move
+
+        >>> a = MultiSubtractSquareState('p2', [4, 2])
+        >>> a.make_move((0, 4)) == MultiSubtractSquareState('p1', [0, 2])
+        True
+        """
+        current_player = 'p2'
+        if self.current_player == 'p2':
+            current_player = 'p1'
+        piles = list(self.piles)
+        piles[move[0]] -= move[1]
+        return MultiSubtractSquareState(current_player, piles)
+
+    def copy(self) -> 'MultiSubtractSquareState':
+        """Return a new state equal to self that apply_move may change
+
+        Overrides SubtractSquareState.copy
+        """
+        return MultiSubtractSquareState(self.current_player, self.piles)
+
+    def apply_move(self, move: Tuple[int, int]) -> Tuple[int, int]:
+        """Apply the valid move to self in place, and return what undo_move
+        needs to take it back
+
+        Overrides SubtractSquareState.apply_move
+
+        >>> a = MultiSubtractSquareState('p2', [4, 2])
+        >>> undo = a.apply_move((1, 1))
+        >>> print(a)
+        The current player is Player 1 and the piles are [4, 1]
+        >>> a.undo_move(undo)
+        >>> a == MultiSubtractSquareState('p2', [4, 2])
+        True
+        >>> hash(a) == hash(MultiSubtractSquareState('p2', [4, 2]))
+        True
+        """
+        pile, square = move
+        value = self.piles[pile]
+        self.piles[pile] = value - square
+        self.current_value -= square
+        self.current_player = 'p1' if self.current_player == 'p2' else 'p2'
+        self._hash ^= (_value_key(pile, value)
+                       ^ _value_key(pile, value - square) ^ _P2_KEY)
+        return move
+
+    def undo_move(self, undo: Tuple[int, int]) -> None:
+        """Take back the last move applied to self, where undo is what
+        apply_move returned for it
+
+        Overrides SubtractSquareState.undo_move
+        """
+        pile, square = undo
+        value = self.piles[pile]
+        self.piles[pile] = value + square
+        self.current_value += square
+        self.current_player = 'p1' if self.current_player == 'p2' else 'p2'
+        self._hash ^= (_value_key(pile, value)
+                       ^ _value_key(pile, value + square) ^ _P2_KEY)
+
+
+def _value_key(pile: int, value: int) -> int:
+    """Return the random key of value value at pile index pile, computed
+    from the seed, pile and value alone, so that it costs the same for any
+    value and nothing is stored
+
+    >>> _value_key(1, 40) == _value_key(1, 40) != _value_key(0, 40)
+    True
+    """
+    return _mix64((_mix64(_KEY_SEED + 1 + pile) + value) & _MASK64)
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
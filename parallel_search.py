@@ -0,0 +1,167 @@
+"""module for ParallelSearch class
+"""
+from typing import Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import os
+import time
+from solver import Solver, LOSS
+from subtract_square import SubtractSquare
+from subtract_square_state import SubtractSquareState
+
+# The solver of each worker process, which keeps its table between tasks.
+_WORKER_SOLVER: Optional[Solver] = None
+
+
+def value_key(state: SubtractSquareState) -> int:
+    """Return the transposition table key of a subtract square state, its
+    value, since both players have the same moves from the same value
+
+    >>> value_key(SubtractSquareState('p2', 17))
+    17
+    """
+    return state.current_value
+
+
+class ParallelSearch:
+    """A search for the best first move of a subtract square game that splits
+    the possible moves across a pool of processes
+
+    Each worker solves the value left by one square, and the search stops as
+    soon as some square leaves a lost value, since that move wins. Values
+    below min_value are searched in this process, where the pool would cost
+    more than it saves.
+
+    Each worker solves with its own table, so workers repeat each other's
+    work on the values their children share, and the seconds they spend
+    together are not the seconds of a serial search.
+
+    processes - the number of worker processes
+    min_value - the smallest value searched in parallel
+    solver - the solver used for values below min_value
+    elapsed - the wall-clock seconds of the last search
+    work - the total seconds the workers spent on the last search, 0 if it
+        was searched in this process
+    """
+    processes: int
+    min_value: int
+    solver: Solver
+    elapsed: float
+    work: float
+    _executor: Optional[ProcessPoolExecutor]
+
+    def __init__(self, processes: Optional[int] = None,
+                 min_value: int = 10000) -> None:
+        """Initialize a new search with a pool of processes workers, one per
+        CPU by default
+
+        >>> p = ParallelSearch(2)
+        >>> p.processes, p.utilization()
+        (2, 0.0)
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.min_value = min_value
+        self.solver = Solver(value_key)
+        self.elapsed = 0.0
+        self.work = 0.0
+        self._executor = None
+
+    def __str__(self) -> str:
+        """Return a summary of the last search of self
+
+        >>> print(ParallelSearch(4))
+        ParallelSearch: 4 processes, 0.000 s, 0% utilization
+        """
+        return ("ParallelSearch: {} processes, {:.3f} s, {:.0%} "
+                "utilization").format(self.processes, self.elapsed,
+                                      self.utilization())
+
+    def utilization(self) -> float:
+        """Return the fraction of the time of the pool that the workers spent
+        on the last search, including the work they repeated
+        """
+        if not self.elapsed:
+            return 0.0
+        return self.work / (self.elapsed * self.processes)
+
+    def best_move(self, value: int) -> Optional[int]:
+        """Return a square that wins from value, or 1 if none does, or None if
+        no square can be subtracted
+
+        >>> from subtract_square_table import SubtractSquareTable
+        >>> table = SubtractSquareTable(200)
+        >>> p = ParallelSearch(2, min_value=100)
+        >>> p.best_move(17)
+        1
+        >>> table.is_win(27 - p.best_move(27))
+        False
+        >>> table.is_win(135 - p.best_move(135))
+        False
+        >>> p.close()
+        """
+        start = time.perf_counter()
+        squares = SubtractSquareState('p1', value).get_possible_moves()
+        if value < self.min_value or self.processes < 2:
+            move = self._serial_best_move(value, squares)
+            self.elapsed = time.perf_counter() - start
+            self.work = 0.0
+            return move
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.processes)
+        # Large squares leave small values, which are quick to solve.
+        pending = {self._executor.submit(_solve_child, value - square): square
+                   for square in reversed(squares)}
+        move, self.work = None, 0.0
+        while pending and move is None:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                square = pending.pop(future)
+                lost, seconds = future.result()
+                self.work += seconds
+                if lost and move is None:
+                    move = square
+        running = [future for future in pending if not future.cancel()]
+        if running:
+            # The workers still solving would keep their slots, and the next
+            # search would queue behind them, so they are left to finish in
+            # this pool and the next search starts a new one.
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.elapsed = time.perf_counter() - start
+        if move is None and squares:
+            move = 1
+        return move
+
+    def close(self) -> None:
+        """Shut down the worker processes of self
+        """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _serial_best_move(self, value: int,
+                          squares: list) -> Optional[int]:
+        """Return the best move from value, searched in this process
+        """
+        if not squares:
+            return None
+        result, move = self.solver.solve(SubtractSquare(True, 0),
+                                         SubtractSquareState('p1', value))
+        return move if result != LOSS else 1
+
+
+def _solve_child(value: int) -> Tuple[bool, float]:
+    """Return whether value is lost by the player about to move, and the CPU
+    seconds the worker spent finding out
+    """
+    global _WORKER_SOLVER
+    start = time.process_time()
+    if _WORKER_SOLVER is None:
+        _WORKER_SOLVER = Solver(value_key)
+    result, _ = _WORKER_SOLVER.solve(SubtractSquare(True, 0),
+                                     SubtractSquareState('p1', value))
+    return result == LOSS, time.process_time() - start
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
@@ -0,0 +1,73 @@
+"""module for batched random playouts of subtract square games
+"""
+from typing import Dict, List, Optional, Tuple
+from math import isqrt
+import random
+
+
+def batched_playouts(starting_values: List[int], games_per_value: int,
+                     seed: Optional[int] = None) -> Dict[int, int]:
+    """Return, for each value in starting_values, how many of games_per_value
+    subtract square games from that value are won by the player about to
+    move when both players subtract uniformly random squares
+
+    All the games advance together, one move per pass, over flat lists of
+    values. A random square below v is drawn as (int(r * isqrt(v)) + 1) ** 2,
+    so no list of possible moves is ever built, and finished games are
+    dropped from the lists after each pass.
+
+    Assume the values in starting_values are distinct
+
+    >>> batched_playouts([1, 2, 3], 100, seed=0)
+    {1: 100, 2: 0, 3: 100}
+    >>> 0 < batched_playouts([50], 1000, seed=1)[50] < 1000
+    True
+    """
+    rng = random.Random(seed)
+    draw = rng.random
+    wins = dict.fromkeys(starting_values, 0)
+    # games[i] is the index in starting_values of the game with values[i].
+    values = [value for value in starting_values
+              for _ in range(games_per_value)]
+    games = [index for index in range(len(starting_values))
+             for _ in range(games_per_value)]
+    # A game that is already over is lost by the player about to move.
+    values, games = _drop_finished(values, games)
+    starter_moved = False
+    while values:
+        values = [value - (int(draw() * isqrt(value)) + 1) ** 2
+                  for value in values]
+        starter_moved = not starter_moved
+        if starter_moved:
+            for value, game in zip(values, games):
+                if not value:
+                    wins[starting_values[game]] += 1
+        values, games = _drop_finished(values, games)
+    return wins
+
+
+def win_rates(starting_values: List[int], games_per_value: int,
+              seed: Optional[int] = None) -> Dict[int, float]:
+    """Return, for each value in starting_values, the fraction of random
+    playouts from that value won by the player about to move
+
+    >>> win_rates([0, 1], 10, seed=0)
+    {0: 0.0, 1: 1.0}
+    """
+    wins = batched_playouts(starting_values, games_per_value, seed)
+    return {value: wins[value] / games_per_value for value in wins}
+
+
+def _drop_finished(values: List[int],
+                   games: List[int]) -> Tuple[List[int], List[int]]:
+    """Return values and games without the games whose value is 0
+    """
+    if all(values):
+        return values, games
+    kept = [i for i, value in enumerate(values) if value]
+    return [values[i] for i in kept], [games[i] for i in kept]
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
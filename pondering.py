@@ -0,0 +1,92 @@
+"""module for Ponderer class
+"""
+from typing import Any, Callable, Optional
+import threading
+import time
+
+# A ponder function analyzes the current state of a game until its second
+# argument, should_stop, returns True.
+PonderFunction = Callable[[Any, Callable[[], bool]], Any]
+
+
+class Ponderer:
+    """Runs the ponder function of a player's strategy in a background thread
+    while the other player chooses a move
+
+    The work is done in a thread of this process, not in a worker process,
+    so that it lands in the same tables and trees the strategy reads when
+    it moves next. The other player is usually a human blocked on input(),
+    which leaves the interpreter to the thread. GameInterface never starts
+    it while the other player's strategy searches the same engine, which is
+    not safe to share between threads.
+
+    ponder - the ponder function of the strategy of player
+    player - the player whose strategy ponders, 'p1' or 'p2'
+    sessions - the number of times pondering ran
+    seconds - the total seconds spent pondering
+    """
+    ponder: PonderFunction
+    player: str
+    sessions: int
+    seconds: float
+    _thread: Optional[threading.Thread]
+    _stop: threading.Event
+    _started: float
+
+    def __init__(self, ponder: PonderFunction, player: str) -> None:
+        """Initialize a new ponderer that runs ponder for player
+
+        >>> p = Ponderer(lambda game, should_stop: None, 'p2')
+        >>> print(p)
+        Pondered 0 times for 0.00 s
+        """
+        self.ponder = ponder
+        self.player = player
+        self.sessions = 0
+        self.seconds = 0.0
+        self._thread = None
+        self._stop = threading.Event()
+        self._started = 0.0
+
+    def __str__(self) -> str:
+        """Return a summary of the statistics of self
+        """
+        return "Pondered {} times for {:.2f} s".format(self.sessions,
+                                                       self.seconds)
+
+    def start(self, game: Any) -> None:
+        """Start pondering on the current state of game, unless self is
+        already pondering
+
+        >>> import time
+        >>> p = Ponderer(lambda game, should_stop: time.sleep(0.01), 'p2')
+        >>> p.start(None)
+        >>> p.stop()
+        >>> p.sessions, p.seconds > 0
+        (1, True)
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self.ponder, args=(game, self._stop.is_set), daemon=True,
+            name="ponder-{}".format(self.player))
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop pondering and wait for the thread to return, so that the
+        strategy of player can safely move
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.sessions += 1
+        self.seconds += time.perf_counter() - self._started
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
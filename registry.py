@@ -0,0 +1,129 @@
+"""module for LazyRegistry class
+"""
+from typing import Any, Dict, Iterator, Mapping, Optional
+import importlib
+
+
+class LazyRegistry(Mapping):
+    """A mapping from keys to objects declared by a target 'module:attribute',
+    where each module is imported only when its key is first looked up
+
+    Listing the keys and names of a registry imports nothing, so a menu of
+    every game or strategy costs no more than the ones actually picked.
+    Third-party packages can add entries through the entry point group of
+    the registry, which is only read by discover.
+
+    group - the entry point group of plugins, or None
+    """
+    group: Optional[str]
+    _targets: Dict[str, str]
+    _loaded: Dict[str, Any]
+
+    def __init__(self, targets: Dict[str, str],
+                 group: Optional[str] = None) -> None:
+        """Initialize a new registry of targets, a dict from each key to its
+        target 'module:attribute'
+
+        >>> r = LazyRegistry({'j': 'json:dumps'})
+        >>> r.name('j'), r.is_loaded('j')
+        ('dumps', False)
+        >>> r['j']([1])
+        '[1]'
+        >>> r.is_loaded('j')
+        True
+        """
+        self.group = group
+        self._targets = dict(targets)
+        self._loaded = {}
+
+    def __str__(self) -> str:
+        """Return the keys and names of self, as listed in a menu
+
+        >>> print(LazyRegistry({'j': 'json:dumps', 'c': 'copy:copy'}))
+        'j': dumps, 'c': copy
+        """
+        return ", ".join("'{}': {}".format(key, self.name(key))
+                         for key in self._targets)
+
+    def __getitem__(self, key: str) -> Any:
+        """Return the object of key, importing its module on first use
+
+        Raise KeyError if self has no key.
+        """
+        if key not in self._loaded:
+            module, _, attribute = self._targets[key].partition(':')
+            self._loaded[key] = getattr(importlib.import_module(module),
+                                        attribute)
+        return self._loaded[key]
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether self has key, without importing anything
+
+        >>> 'j' in LazyRegistry({'j': 'json:dumps'})
+        True
+        """
+        return key in self._targets
+
+    def __iter__(self) -> Iterator[str]:
+        """Return an iterator over the keys of self
+        """
+        return iter(self._targets)
+
+    def __len__(self) -> int:
+        """Return the number of keys of self
+        """
+        return len(self._targets)
+
+    def name(self, key: str) -> str:
+        """Return the name of the object of key, without importing it
+        """
+        return self._targets[key].rpartition(':')[2].rpartition('.')[2]
+
+    def target(self, key: str) -> str:
+        """Return the target 'module:attribute' of key
+        """
+        return self._targets[key]
+
+    def is_loaded(self, key: str) -> bool:
+        """Return whether the object of key has been imported
+        """
+        return key in self._loaded
+
+    def register(self, key: str, target: str) -> None:
+        """Declare target 'module:attribute' as the object of key, replacing
+        any object key had
+
+        >>> r = LazyRegistry({})
+        >>> r.register('d', 'json:dumps')
+        >>> list(r)
+        ['d']
+        """
+        self._targets[key] = target
+        self._loaded.pop(key, None)
+
+    def discover(self) -> int:
+        """Register the entry points of the group of self whose names are not
+        keys of self yet, and return how many were added
+
+        Each entry point's name is its key and its value is its target, so a
+        plugin package declares, for example,
+
+            [project.entry-points."game_interface.strategies"]
+            z = "my_plugin:zero_strategy"
+
+        Reading the installed packages is slow, so it only happens here.
+        """
+        if self.group is None:
+            return 0
+        from importlib.metadata import entry_points
+        added = 0
+        for entry_point in entry_points(group=self.group):
+            if entry_point.name not in self._targets:
+                self._targets[entry_point.name] = entry_point.value
+                added += 1
+        return added
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
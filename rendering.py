@@ -0,0 +1,125 @@
+"""module for Renderer class, the output of GameInterface.play
+"""
+from typing import Any, List, Optional, TextIO
+import sys
+
+# The verbosity levels: every move on its own line, move lists summarized on
+# one line, or only the result of the game.
+FULL = 'full'
+SUMMARY = 'summary'
+RESULTS = 'results'
+VERBOSITIES = (FULL, SUMMARY, RESULTS)
+# The number of moves a summary shows before the last one.
+SUMMARY_HEAD = 3
+
+
+class Renderer:
+    """The output of a game, written to a stream at a verbosity level
+
+    Everything written is kept in a buffer and reaches the stream in one
+    write at each flush, which GameInterface.play calls once per turn, just
+    before a move is chosen, so a turn costs one write however many moves it
+    lists.
+
+    verbosity - FULL, SUMMARY or RESULTS
+    stream - the stream written to, or None for sys.stdout at each flush
+    """
+    verbosity: str
+    stream: Optional[TextIO]
+    _parts: List[str]
+
+    def __init__(self, verbosity: str = FULL,
+                 stream: Optional[TextIO] = None) -> None:
+        """Initialize a new renderer at verbosity to stream
+
+        Raise ValueError if verbosity is not one of VERBOSITIES.
+
+        >>> r = Renderer(SUMMARY)
+        >>> r.moves([1, 4, 9, 16, 25])
+        >>> r.result("It's a tie!")
+        >>> r.flush()
+        The current available moves are: 1, 4, 9 ... 25 (5 moves)
+        It's a tie!
+        """
+        if verbosity not in VERBOSITIES:
+            raise ValueError("no verbosity {}".format(verbosity))
+        self.verbosity = verbosity
+        self.stream = stream
+        self._parts = []
+
+    def instructions(self, text: str) -> None:
+        """Write the instructions of the game, unless only results are
+        written
+        """
+        if self.verbosity != RESULTS:
+            self._parts.append(text + "\n")
+
+    def state(self, state: Any) -> None:
+        """Write state, unless only results are written
+        """
+        if self.verbosity != RESULTS:
+            self._parts.append("{}\n".format(state))
+
+    def moves(self, moves: List[Any]) -> None:
+        """Write the possible moves of a turn, one per line at FULL
+        verbosity, summarized on one line at SUMMARY
+
+        >>> r = Renderer()
+        >>> r.moves(['ll', 'lr'])
+        >>> r.flush()
+        The current available moves are:
+        ll
+        lr
+        """
+        if self.verbosity == FULL:
+            self._parts.append("The current available moves are:\n")
+            self._parts.extend("{}\n".format(move) for move in moves)
+        elif self.verbosity == SUMMARY:
+            self._parts.append("The current available moves are: {}\n".format(
+                summarize(moves)))
+
+    def move_made(self, player: str, move: Any, state: Any) -> None:
+        """Write that player made move, which led to state, unless only
+        results are written
+        """
+        if self.verbosity != RESULTS:
+            self._parts.append(
+                "{} made the move {}. The game's state is now:\n{}\n".format(
+                    player, move, state))
+
+    def result(self, text: str) -> None:
+        """Write the result of the game, at every verbosity
+        """
+        self._parts.append(text + "\n")
+
+    def flush(self) -> None:
+        """Write everything buffered to the stream in one write, and flush it
+        """
+        if not self._parts:
+            return
+        stream = self.stream or sys.stdout
+        stream.write("".join(self._parts))
+        stream.flush()
+        self._parts.clear()
+
+
+def summarize(moves: List[Any], head: int = SUMMARY_HEAD) -> str:
+    """Return moves on one line, with only the first head moves and the
+    last one if there are more, and the number of moves
+
+    >>> summarize([i * i for i in range(1, 1000)])
+    '1, 4, 9 ... 998001 (999 moves)'
+    >>> summarize(['ll', 'rl'])
+    'll, rl (2 moves)'
+    """
+    if len(moves) <= head + 1:
+        shown = ", ".join(str(move) for move in moves)
+    else:
+        shown = "{} ... {}".format(
+            ", ".join(str(move) for move in moves[:head]), moves[-1])
+    return "{} ({} moves)".format(shown, len(moves))
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
@@ -0,0 +1,182 @@
+"""module for RetrogradeSolver class
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from game import Game
+from game_state import GameState
+from solver import WIN, DRAW, LOSS
+
+
+class RetrogradeSolver:
+    """A solver that labels every position reachable from some starting
+    positions by retrograde analysis
+
+    Unlike Solver, it handles games whose positions repeat, such as
+    chopsticks: every reachable position is enumerated once, the positions
+    that are over are labelled LOSS for the player about to move, and the
+    labels are propagated backward from them. A position that is never
+    labelled this way can be neither won nor lost, so it is a DRAW.
+
+    The states of the game must be hashable. Only canonical states are
+    enumerated and stored, so the mirror images of a position share one
+    label.
+
+    values - the value of each canonical position for the player about to
+        move
+    distances - the number of moves until the game is over with perfect play,
+        or None for a DRAW
+    moves - a move of each canonical position that achieves its value the
+        fastest if it is a WIN, and the slowest if it is a LOSS
+    """
+    values: Dict[GameState, int]
+    distances: Dict[GameState, Optional[int]]
+    moves: Dict[GameState, Any]
+
+    def __init__(self, game: Game, roots: List[GameState]) -> None:
+        """Initialize a new solver and label every position of game that is
+        reachable from roots
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> start = ChopsticksState('p1', [1, 1], [1, 1])
+        >>> s = RetrogradeSolver(Chopsticks(True), [start])
+        >>> len(s.values)
+        398
+        >>> s.value(start), s.distance(start)
+        (0, None)
+        """
+        self.values = {}
+        self.distances = {}
+        self.moves = {}
+        children, parents = self._enumerate(game, roots)
+        unresolved = {state: len(moves) for state, moves in children.items()}
+        queue = deque()
+        for state, moves in children.items():
+            if not moves:
+                self._label(state, LOSS, 0, queue)
+        while queue:
+            state = queue.popleft()
+            value, distance = self.values[state], self.distances[state]
+            for parent in parents[state]:
+                if parent in self.values:
+                    continue
+                if value == LOSS:
+                    self._label(parent, WIN, distance + 1, queue)
+                else:
+                    unresolved[parent] -= 1
+                    if not unresolved[parent]:
+                        self._label(parent, LOSS, distance + 1, queue)
+        for state in children:
+            if state not in self.values:
+                self.values[state] = DRAW
+                self.distances[state] = None
+        for state, moves in children.items():
+            self.moves[state] = self._choose(state, moves)
+
+    def __str__(self) -> str:
+        """Return a summary of the labels of self
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> start = ChopsticksState('p1', [1, 1], [1, 1])
+        >>> print(RetrogradeSolver(Chopsticks(True), [start]))
+        398 positions: 164 wins, 92 losses, 142 draws
+        """
+        counts = {WIN: 0, LOSS: 0, DRAW: 0}
+        for value in self.values.values():
+            counts[value] += 1
+        return "{} positions: {} wins, {} losses, {} draws".format(
+            len(self.values), counts[WIN], counts[LOSS], counts[DRAW])
+
+    def value(self, state: GameState) -> int:
+        """Return the value of state for the player about to move
+        """
+        return self.values[state.canonical()]
+
+    def distance(self, state: GameState) -> Optional[int]:
+        """Return the number of moves until the game is over from state with
+        perfect play, or None if state is a draw
+        """
+        return self.distances[state.canonical()]
+
+    def best_move(self, state: GameState) -> Any:
+        """Return the move of state that achieves its value, or None if no
+        move can be made
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> a = ChopsticksState('p1', [4, 0], [0, 1])
+        >>> s = RetrogradeSolver(Chopsticks(True), [a])
+        >>> s.best_move(a), s.value(a), s.distance(a)
+        ('lr', 1, 1)
+        >>> s.best_move(ChopsticksState('p1', [0, 4], [1, 0]))
+        'rl'
+        """
+        move = self.moves[state.canonical()]
+        if move is None:
+            return None
+        return state.from_canonical_move(move)
+
+    def _label(self, state: GameState, value: int, distance: int,
+               queue: deque) -> None:
+        """Label state with value and distance and queue it to label its
+        parents
+        """
+        self.values[state] = value
+        self.distances[state] = distance
+        queue.append(state)
+
+    def _choose(self, state: GameState,
+                moves: List[Tuple[Any, GameState]]) -> Any:
+        """Return the move among moves, pairs of a move and the state it leads
+        to, that achieves the value of state
+        """
+        value = self.values[state]
+        best, best_distance = None, None
+        for move, child in moves:
+            if self.values[child] != -value:
+                continue
+            distance = self.distances[child]
+            if (best is None or (value == WIN and distance < best_distance)
+                    or (value == LOSS and distance > best_distance)):
+                best, best_distance = move, distance
+        if best is None and moves:
+            best = moves[0][0]
+        return best
+
+    @staticmethod
+    def _enumerate(game: Game, roots: List[GameState]) \
+            -> Tuple[Dict[GameState, List[Tuple[Any, GameState]]],
+                     Dict[GameState, List[GameState]]]:
+        """Return the moves of every canonical position of game reachable
+        from roots, as pairs of a move and the canonical state it leads to,
+        and the parents of every canonical position
+
+        Positions that are over have no moves.
+        """
+        children = {}
+        parents = {}
+        pending = []
+        for root in roots:
+            root = root.canonical()
+            if root not in parents:
+                parents[root] = []
+                pending.append(root)
+        while pending:
+            state = pending.pop()
+            moves = []
+            if not game.is_over(state):
+                for move in state.get_possible_moves():
+                    child = state.make_move(move).canonical()
+                    moves.append((move, child))
+                    if child not in parents:
+                        parents[child] = []
+                        pending.append(child)
+                    parents[child].append(state)
+            children[state] = moves
+        return children, parents
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
@@ -0,0 +1,305 @@
+"""module for headless self-play between strategies
+"""
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import random
+import time
+from game_log import GameLogWriter, create_log
+
+# The number of invalid moves in a row after which a player forfeits.
+MAX_INVALID_MOVES = 10
+
+
+class MatchStats:
+    """Aggregate statistics of a series of games between two strategies
+
+    games - the number of games played
+    wins - the number of games won by each player, 'p1' and 'p2'
+    ties - the number of games stopped after the move limit
+    lengths - the number of games of each length, in moves
+    move_counts - the number of moves chosen by each player
+    think_times - the total seconds each player's strategy spent choosing
+    max_think_times - the longest seconds each player's strategy spent on a
+        single move
+    invalid_moves - the number of invalid moves each player's strategy made
+    forfeits - the number of games each player lost by making
+        MAX_INVALID_MOVES invalid moves in a row
+    elapsed - the total wall-clock seconds spent playing
+    """
+    games: int
+    wins: Dict[str, int]
+    ties: int
+    lengths: Dict[int, int]
+    move_counts: Dict[str, int]
+    think_times: Dict[str, float]
+    max_think_times: Dict[str, float]
+    invalid_moves: Dict[str, int]
+    forfeits: Dict[str, int]
+    elapsed: float
+
+    def __init__(self) -> None:
+        """Initialize statistics with no games played
+
+        >>> s = MatchStats()
+        >>> s.games, s.wins
+        (0, {'p1': 0, 'p2': 0})
+        """
+        self.games = 0
+        self.wins = {'p1': 0, 'p2': 0}
+        self.ties = 0
+        self.lengths = {}
+        self.move_counts = {'p1': 0, 'p2': 0}
+        self.think_times = {'p1': 0.0, 'p2': 0.0}
+        self.max_think_times = {'p1': 0.0, 'p2': 0.0}
+        self.invalid_moves = {'p1': 0, 'p2': 0}
+        self.forfeits = {'p1': 0, 'p2': 0}
+        self.elapsed = 0.0
+
+    def __str__(self) -> str:
+        """Return a summary of self
+
+        >>> print(MatchStats())
+        0 games: p1 won 0.0%, p2 won 0.0%, 0.0% ties
+        mean length 0.0 moves, longest 0 moves, 0.0 games per second
+        p1: 0.000 ms per move (max 0.000 ms), 0 invalid moves, 0 forfeits
+        p2: 0.000 ms per move (max 0.000 ms), 0 invalid moves, 0 forfeits
+        """
+        lines = ["{} games: p1 won {:.1%}, p2 won {:.1%}, {:.1%} ties".format(
+            self.games, self.win_rate('p1'), self.win_rate('p2'),
+            self.ties / self.games if self.games else 0.0),
+                 "mean length {:.1f} moves, longest {} moves, {:.1f} games "
+                 "per second".format(self.mean_length(),
+                                     max(self.lengths, default=0),
+                                     self.games / self.elapsed
+                                     if self.elapsed else 0.0)]
+        for player in ('p1', 'p2'):
+            lines.append("{}: {:.3f} ms per move (max {:.3f} ms), {} invalid "
+                         "moves, {} forfeits".format(
+                             player, 1000 * self.mean_think_time(player),
+                             1000 * self.max_think_times[player],
+                             self.invalid_moves[player],
+                             self.forfeits[player]))
+        return "\n".join(lines)
+
+    def win_rate(self, player: str) -> float:
+        """Return the fraction of games won by player
+
+        >>> MatchStats().win_rate('p1')
+        0.0
+        """
+        if not self.games:
+            return 0.0
+        return self.wins[player] / self.games
+
+    def mean_length(self) -> float:
+        """Return the mean number of moves per game
+        """
+        if not self.games:
+            return 0.0
+        return sum(length * count
+                   for length, count in self.lengths.items()) / self.games
+
+    def mean_think_time(self, player: str) -> float:
+        """Return the mean seconds player's strategy spent choosing a move
+        """
+        if not self.move_counts[player]:
+            return 0.0
+        return self.think_times[player] / self.move_counts[player]
+
+    def merge(self, other: 'MatchStats') -> None:
+        """Add the statistics of other to self
+
+        >>> a, b = MatchStats(), MatchStats()
+        >>> a.games, b.games = 2, 3
+        >>> a.merge(b)
+        >>> a.games
+        5
+        """
+        self.games += other.games
+        self.ties += other.ties
+        self.elapsed = max(self.elapsed, other.elapsed)
+        for length, count in other.lengths.items():
+            self.lengths[length] = self.lengths.get(length, 0) + count
+        for player in ('p1', 'p2'):
+            self.wins[player] += other.wins[player]
+            self.move_counts[player] += other.move_counts[player]
+            self.think_times[player] += other.think_times[player]
+            self.invalid_moves[player] += other.invalid_moves[player]
+            self.forfeits[player] += other.forfeits[player]
+            self.max_think_times[player] = max(self.max_think_times[player],
+                                               other.max_think_times[player])
+
+
+def play_game(game: Any, strategies: Dict[str, Callable[[Any], Any]],
+              stats: MatchStats, max_moves: int,
+              log: Optional[GameLogWriter] = None) -> None:
+    """Play game to the end with no console I/O, choosing each player's moves
+    with strategies[player], and record the result in stats and, if given,
+    the game in log
+
+    A game still going after max_moves moves counts as a tie. A player whose
+    strategy makes MAX_INVALID_MOVES invalid moves in a row forfeits, and
+    the other player wins.
+
+    >>> from subtract_square import SubtractSquare
+    >>> from strategy import minimax_strategy
+    >>> s = MatchStats()
+    >>> play_game(SubtractSquare(True, 21), {'p1': minimax_strategy,
+    ...                                      'p2': minimax_strategy}, s, 100)
+    >>> s.wins
+    {'p1': 1, 'p2': 0}
+    >>> play_game(SubtractSquare(True, 21), {'p1': lambda game: 2,
+    ...                                      'p2': minimax_strategy}, s, 100)
+    >>> s.wins, s.forfeits['p1'], s.invalid_moves['p1']
+    ({'p1': 1, 'p2': 1}, 1, 10)
+    """
+    current_state = game.current_state
+    start_state = current_state
+    made = [] if log is not None else None
+    moves = 0
+    forfeit = None
+    while not game.is_over(current_state) and moves < max_moves:
+        player = current_state.get_current_player_name()
+        strategy = strategies[player]
+        start = time.perf_counter()
+        move_to_make = strategy(game)
+        invalid = 0
+        while not current_state.is_valid_move(move_to_make):
+            stats.invalid_moves[player] += 1
+            invalid += 1
+            if invalid == MAX_INVALID_MOVES:
+                break
+            move_to_make = strategy(game)
+        if invalid == MAX_INVALID_MOVES:
+            forfeit = player
+            break
+        think_time = time.perf_counter() - start
+        stats.think_times[player] += think_time
+        stats.max_think_times[player] = max(stats.max_think_times[player],
+                                            think_time)
+        stats.move_counts[player] += 1
+        current_state = current_state.make_move(move_to_make)
+        game.current_state = current_state
+        moves += 1
+        if made is not None:
+            made.append(move_to_make)
+    stats.games += 1
+    stats.lengths[moves] = stats.lengths.get(moves, 0) + 1
+    winner = None
+    if forfeit is not None:
+        winner = 'p2' if forfeit == 'p1' else 'p1'
+        stats.forfeits[forfeit] += 1
+        stats.wins[winner] += 1
+    elif game.is_winner('p1'):
+        winner = 'p1'
+        stats.wins['p1'] += 1
+    elif game.is_winner('p2'):
+        winner = 'p2'
+        stats.wins['p2'] += 1
+    else:
+        stats.ties += 1
+    if log is not None:
+        log.append(start_state, made, winner)
+
+
+def simulate(game_key: str, p1_key: str, p2_key: str, n_games: int,
+             config: Optional[Dict[str, Any]] = None, is_p1_turn: bool = True,
+             max_moves: int = 1000, processes: int = 0,
+             seed: Optional[int] = None,
+             log_path: Optional[str] = None) -> MatchStats:
+    """Return the statistics of n_games games of playable_games[game_key]
+    between usable_strategies[p1_key] and usable_strategies[p2_key]
+
+    Each game is created with the keyword arguments in config, such as the
+    starting_value of a subtract square game. With processes > 0 the games
+    are split into one batch per process. Batch i seeds random with seed and
+    i, so the same arguments always give the same games. With log_path,
+    every game is appended to the game log there.
+
+    >>> s = simulate('s', 'r', 'r', 10, {'starting_value': 30}, seed=1)
+    >>> s.games
+    10
+    >>> t = simulate('s', 'r', 'r', 10, {'starting_value': 30}, seed=1)
+    >>> (s.wins, s.lengths) == (t.wins, t.lengths)
+    True
+    """
+    batches = [n_games // max(processes, 1)] * max(processes, 1)
+    for i in range(n_games % len(batches)):
+        batches[i] += 1
+    arguments = [(game_key, p1_key, p2_key, batch, config or {}, is_p1_turn,
+                  max_moves, None if seed is None else "{}-{}".format(seed, i),
+                  log_path)
+                 for i, batch in enumerate(batches)]
+    if log_path is not None:
+        create_log(log_path)
+    start = time.perf_counter()
+    stats = MatchStats()
+    if processes > 0:
+        with ProcessPoolExecutor(processes) as executor:
+            for result in executor.map(_play_batch, *zip(*arguments)):
+                stats.merge(result)
+    else:
+        stats.merge(_play_batch(*arguments[0]))
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def _play_batch(game_key: str, p1_key: str, p2_key: str, n_games: int,
+                config: Dict[str, Any], is_p1_turn: bool, max_moves: int,
+                seed: Optional[str], log_path: Optional[str]) -> MatchStats:
+    """Return the statistics of one batch of games, as in simulate
+    """
+    from game_interface import playable_games, usable_strategies
+    if seed is not None:
+        random.seed(seed)
+    strategies = {'p1': usable_strategies[p1_key],
+                  'p2': usable_strategies[p2_key]}
+    stats = MatchStats()
+    log = GameLogWriter(log_path) if log_path is not None else None
+    start = time.perf_counter()
+    for _ in range(n_games):
+        play_game(playable_games[game_key](is_p1_turn, **config), strategies,
+                  stats, max_moves, log)
+    if log is not None:
+        log.close()
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def _parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """Return the command line arguments of a simulation
+    """
+    parser = argparse.ArgumentParser(
+        description="Play games between two strategies with no console I/O.")
+    parser.add_argument('game', help="a key of playable_games, such as s")
+    parser.add_argument('p1', help="a key of usable_strategies for player 1")
+    parser.add_argument('p2', help="a key of usable_strategies for player 2")
+    parser.add_argument('-n', '--games', type=int, default=1000)
+    parser.add_argument('-v', '--starting-value', type=int, default=None,
+                        help="the starting value of a subtract square game")
+    parser.add_argument('--piles', type=int, nargs='+', default=None,
+                        help="the piles of a multi-pile subtract square game")
+    parser.add_argument('--p2-first', action='store_true')
+    parser.add_argument('--max-moves', type=int, default=1000)
+    parser.add_argument('-j', '--processes', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--log', metavar='PATH', default=None,
+                        help="append every game to the game log at PATH")
+    options = parser.parse_args(args)
+    # A multi-pile game would otherwise ask for its piles with input().
+    if options.game == 'm' and options.piles is None:
+        parser.error("game m needs --piles")
+    return options
+
+
+if __name__ == "__main__":
+    ARGS = _parse_args()
+    CONFIG = {}
+    if ARGS.starting_value is not None:
+        CONFIG['starting_value'] = ARGS.starting_value
+    if ARGS.piles is not None:
+        CONFIG['piles'] = ARGS.piles
+    print(simulate(ARGS.game, ARGS.p1, ARGS.p2, ARGS.games, CONFIG,
+                   not ARGS.p2_first, ARGS.max_moves, ARGS.processes,
+                   ARGS.seed, ARGS.log))
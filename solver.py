@@ -0,0 +1,348 @@
+"""module for Solver class
+"""
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Set, \
+    Tuple
+from game import Game
+from game_state import GameState
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+# The number of positions searched between checks of should_stop.
+STOP_CHECK_NODES = 256
+
+
+def default_key(state: GameState) -> Hashable:
+    """Return a transposition table key for state, which is state itself if it
+    is hashable
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> from chopstick_state import ChopsticksState
+    >>> print(default_key(SubtractSquareState('p1', 7)))
+    The current player is Player 1 and the current value is 7
+    >>> default_key(ChopsticksState('p1', [1, 1], [1, 1])).code
+    156
+    """
+    if type(state).__hash__ is not None:
+        return state
+    return state.get_current_player_name(), str(state)
+
+
+class Solver:
+    """A memoized minimax solver for a two-player, sequential move, zero-sum,
+    perfect-information game.
+
+    Every solved position is stored in a transposition table that maps the
+    key of a state to its value for the player about to move (WIN, DRAW or
+    LOSS) and a move that achieves that value. The table only depends on the
+    positions themselves, so it stays valid across moves and across games.
+    Only canonical states are searched and stored, so the mirror images of
+    a position share one entry.
+
+    A position that is over is lost by the player about to move, as in
+    every game in playable_games.
+
+    A depth-first search of a game whose positions repeat, such as
+    chopsticks, could search a position once per line of play leading to
+    it. So once a search meets a repeated position and the states of the
+    game are hashable, every position reachable from its root is labelled by
+    a RetrogradeSolver instead, and stored in the table.
+
+    table - the transposition table, from position key to (value, move)
+    key - the function that maps a state to its position key
+    hits - the number of positions answered from table
+    nodes - the number of positions searched
+    """
+    table: Dict[Hashable, Tuple[int, Any]]
+    key: Callable[[GameState], Hashable]
+    hits: int
+    nodes: int
+
+    def __init__(self, key: Callable[[GameState], Hashable] = default_key) \
+            -> None:
+        """Initialize a new solver with an empty transposition table
+
+        >>> s = Solver()
+        >>> s.table
+        {}
+        >>> s.hits, s.nodes
+        (0, 0)
+        """
+        self.table = {}
+        self.key = key
+        self.hits = 0
+        self.nodes = 0
+
+    def __str__(self) -> str:
+        """Return a summary of the statistics of self
+
+        >>> print(Solver())
+        Solver: 0 positions cached, 0 cache hits, 0 nodes searched
+        """
+        return ("Solver: {} positions cached, {} cache hits, {} nodes " +
+                "searched").format(len(self.table), self.hits, self.nodes)
+
+    def clear(self) -> None:
+        """Empty the transposition table and reset the statistics of self
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> s = Solver()
+        >>> s.solve(Chopsticks(True), ChopsticksState('p1', [4, 0], [0, 1]))
+        (1, 'lr')
+        >>> s.clear()
+        >>> print(s)
+        Solver: 0 positions cached, 0 cache hits, 0 nodes searched
+        """
+        self.table.clear()
+        self.hits = 0
+        self.nodes = 0
+
+    def solve(self, game: Game, state: GameState) -> Tuple[int, Any]:
+        """Return the value of state for the player about to move and a move
+        that achieves it
+
+        The value is WIN, DRAW or LOSS. The move is None if game is over at
+        state. A position repeated on the current line of play counts as a
+        draw. If the states of game are hashable, the positions reachable
+        from state are then solved by retrograde analysis; otherwise, a draw
+        that depends on such a repetition is not cached, because it depends
+        on how the position was reached.
+
+        The search uses an explicit stack, so deep games such as subtract
+        square from a large starting value do not hit the recursion limit.
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> s = Solver()
+        >>> s.solve(Chopsticks(True), ChopsticksState('p1', [4, 0], [0, 0]))
+        (-1, None)
+        >>> s.solve(Chopsticks(True), ChopsticksState('p1', [4, 0], [0, 1]))
+        (1, 'lr')
+        >>> s.solve(Chopsticks(True), ChopsticksState('p2', [1, 0], [1, 0]))
+        (1, 'll')
+        >>> s.solve(Chopsticks(True), ChopsticksState('p1', [0, 4], [1, 0]))
+        (1, 'rl')
+        """
+        value, move = self._solve(game, state.canonical())
+        if move is None:
+            return value, None
+        return value, state.from_canonical_move(move)
+
+    def ponder(self, game: Game, state: GameState,
+               should_stop: Callable[[], bool]) -> int:
+        """Solve the position after each move of state, in order, until they
+        are all solved or should_stop returns True, and return how many were
+        solved
+
+        This is the work of the player who moves after state, done while its
+        opponent decides. Every position solved stays in the table, including
+        those finished before a stop, so best_move after the opponent's move
+        is usually a table lookup.
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> s = Solver()
+        >>> state = ChopsticksState('p1', [1, 2], [3, 0])
+        >>> s.ponder(Chopsticks(True), state, lambda: False)
+        2
+        >>> hits = s.hits
+        >>> s.best_move(Chopsticks(True), state.make_move('ll')) is not None
+        True
+        >>> s.hits == hits + 1
+        True
+        >>> Solver().ponder(Chopsticks(True), state, lambda: True)
+        0
+        """
+        if game.is_over(state):
+            return 0
+        solved = 0
+        for move in state.get_possible_moves():
+            if should_stop():
+                break
+            try:
+                self._solve(game, state.make_move(move).canonical(),
+                            should_stop)
+            except _Stopped:
+                break
+            solved += 1
+        return solved
+
+    def _solve(self, game: Game, state: GameState,
+               should_stop: Optional[Callable[[], bool]] = None) \
+            -> Tuple[int, Any]:
+        """Return the value of the canonical state state and a move of it
+        that achieves that value, as in solve
+
+        Raise _Stopped if should_stop returns True, checked every
+        STOP_CHECK_NODES positions searched; the positions solved so far stay
+        in the table.
+        """
+        try:
+            return self._search(game, state, should_stop,
+                                type(state).__hash__ is not None)
+        except _Repeated:
+            self._solve_retrograde(game, state)
+            return self.table[self.key(state)]
+
+    def _search(self, game: Game, state: GameState,
+                should_stop: Optional[Callable[[], bool]],
+                retrograde: bool) -> Tuple[int, Any]:
+        """Return the value of the canonical state state and a move of it
+        that achieves that value, searched depth first
+
+        Raise _Repeated when a position repeats if retrograde, and _Stopped
+        as in _solve.
+        """
+        key = self.key(state)
+        if key in self.table:
+            self.hits += 1
+            return self.table[key]
+        if game.is_over(state):
+            self.nodes += 1
+            self.table[key] = (LOSS, None)
+            return self.table[key]
+        stack = [self._new_frame(state, key)]
+        on_path = {key}
+        while True:
+            frame = stack[-1]
+            child = None
+            if frame.value != WIN:
+                child = self._next_child(game, frame, on_path, retrograde)
+            if child is not None:
+                if (should_stop is not None
+                        and not self.nodes % STOP_CHECK_NODES
+                        and should_stop()):
+                    raise _Stopped
+                stack.append(child)
+                on_path.add(child.key)
+                continue
+            stack.pop()
+            on_path.discard(frame.key)
+            if frame.value != DRAW or not frame.tainted:
+                self.table[frame.key] = (frame.value, frame.move)
+            if not stack:
+                return frame.value, frame.move
+            stack[-1].update(-frame.value, frame.tainted)
+
+    def best_move(self, game: Game, state: GameState) -> Any:
+        """Return a move that achieves the best value of state for the player
+        about to move
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> s = ChopsticksState('p1', [1, 2], [3, 0])
+        >>> Solver().best_move(Chopsticks(True), s)
+        'rl'
+        """
+        return self.solve(game, state)[1]
+
+    def _new_frame(self, state: GameState, key: Hashable) -> '_Frame':
+        """Return a new search frame for state with key key
+        """
+        self.nodes += 1
+        return _Frame(state, key)
+
+    def _solve_retrograde(self, game: Game, state: GameState) -> None:
+        """Store the value and move of every position reachable from the
+        canonical state state, labelled by retrograde analysis
+
+        >>> from chopsticks import Chopsticks
+        >>> from chopstick_state import ChopsticksState
+        >>> s = Solver()
+        >>> s._solve_retrograde(Chopsticks(True),
+        ...                     ChopsticksState('p1', [1, 1], [1, 1]))
+        >>> len(s.table), s.table[ChopsticksState('p1', [1, 1], [1, 1])]
+        (398, (0, 'll'))
+        """
+        from retrograde import RetrogradeSolver
+        solver = RetrogradeSolver(game, [state])
+        self.nodes += len(solver.values)
+        for position, value in solver.values.items():
+            self.table[self.key(position)] = (value, solver.moves[position])
+
+    def _next_child(self, game: Game, frame: '_Frame',
+                    on_path: Set[Hashable],
+                    retrograde: bool) -> Optional['_Frame']:
+        """Return the frame of the next child of frame that must be searched,
+        or None if frame is solved
+
+        Children that are over, cached or repeated are resolved in place,
+        unless a child repeats and retrograde, which raises _Repeated.
+        """
+        for move in frame.moves:
+            child = frame.state.make_move(move).canonical()
+            key = self.key(child)
+            frame.last_move = move
+            if key in self.table:
+                self.hits += 1
+                frame.update(-self.table[key][0], False)
+            elif key in on_path:
+                if retrograde:
+                    raise _Repeated
+                frame.update(DRAW, True)
+            elif game.is_over(child):
+                self.nodes += 1
+                self.table[key] = (LOSS, None)
+                frame.update(WIN, False)
+            else:
+                return self._new_frame(child, key)
+            if frame.value == WIN:
+                return None
+        return None
+
+
+class _Stopped(Exception):
+    """Raised to abandon a search whose should_stop returned True
+    """
+
+
+class _Repeated(Exception):
+    """Raised to abandon a depth-first search that met a repeated position
+    """
+
+
+class _Frame:
+    """A position on the search stack of a Solver
+
+    state - the position being searched
+    key - the position key of state
+    moves - the moves of state that are not tried yet
+    value - the best value found so far for the player about to move
+    move - the move that achieves value
+    last_move - the move tried most recently
+    tainted - whether value depends on a repeated position
+    """
+    __slots__ = ('state', 'key', 'moves', 'value', 'move', 'last_move',
+                 'tainted')
+    state: GameState
+    key: Hashable
+    moves: Iterator[Any]
+    value: int
+    move: Any
+    last_move: Any
+    tainted: bool
+
+    def __init__(self, state: GameState, key: Hashable) -> None:
+        """Initialize a new frame for state, with no moves tried yet
+        """
+        self.state = state
+        self.key = key
+        self.moves = iter(state.get_possible_moves())
+        self.value = LOSS
+        self.move = None
+        self.last_move = None
+        self.tainted = False
+
+    def update(self, value: int, tainted: bool) -> None:
+        """Record that last_move leads to value for the player about to move
+        """
+        self.tainted = self.tainted or tainted
+        if value > self.value or self.move is None:
+            self.value = value
+            self.move = self.last_move
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
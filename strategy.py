@@ -1,9 +1,71 @@
 """
 module for strategies
 """
-from typing import Union, Any
+from typing import TYPE_CHECKING, Union, Any, Callable, Dict, Optional
+import os
 import random
+import threading
 from game import Game
+from solver import Solver
+from mcts import MCTS
+from alphabeta import AlphaBeta
+from subtract_square_state import SubtractSquareState
+from multi_subtract_square_state import MultiSubtractSquareState
+
+# The tables, the retrograde solver and the parallel search are imported by
+# the strategies that use them, so they cost nothing until one is chosen.
+if TYPE_CHECKING:
+    from retrograde import RetrogradeSolver
+    from parallel_search import ParallelSearch
+    from subtract_square_table import SubtractSquareTable
+    from grundy_table import GrundyTable
+    from chopsticks_table import ChopsticksTable
+
+# One solver is shared by every game in the process, so positions solved in
+# earlier moves and earlier games are answered from its transposition table.
+SOLVER = Solver()
+
+# Where table_strategy keeps its subtract square table between runs.
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'subtract_square.table')
+TABLE: Optional['SubtractSquareTable'] = None
+
+# Where retrograde_strategy keeps its chopsticks tablebase between runs.
+CHOPSTICKS_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(
+    __file__)), 'chopsticks.table')
+CHOPSTICKS_TABLE: Optional['ChopsticksTable'] = None
+
+# Where grundy_strategy keeps the Grundy values of pile sizes between runs.
+GRUNDY_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'grundy.table')
+GRUNDY_TABLE: Optional['GrundyTable'] = None
+
+# The retrograde analysis of each other state type, built on first use.
+RETROGRADE: Dict[type, 'RetrogradeSolver'] = {}
+
+# One Monte Carlo tree search player, which keeps its tree between moves.
+MCTS_PLAYER = MCTS(iterations=1000)
+
+# One iterative-deepening alpha-beta player, with a deadline for each move.
+ALPHA_BETA_PLAYER = AlphaBeta(seconds=1.0)
+
+# One parallel subtract square search, created with its worker pool on first
+# use.
+PARALLEL_SEARCH: Optional['ParallelSearch'] = None
+
+# The lock of each engine above, held by a strategy only while it builds or
+# searches that engine, so that threads, such as the sessions of a
+# game_server, can share them and a slow search only holds up the moves that
+# need the same engine. A strategy never holds a lock while it falls back to
+# another strategy. Pondering is kept apart by can_ponder_against instead.
+_SOLVER_LOCK = threading.Lock()
+_TABLE_LOCK = threading.Lock()
+_CHOPSTICKS_TABLE_LOCK = threading.Lock()
+_GRUNDY_TABLE_LOCK = threading.Lock()
+_RETROGRADE_LOCK = threading.Lock()
+_MCTS_LOCK = threading.Lock()
+_ALPHA_BETA_LOCK = threading.Lock()
+_PARALLEL_SEARCH_LOCK = threading.Lock()
 
 
 def interactive_strategy(game: Game) -> Union[str, int]:
@@ -23,6 +85,228 @@ def random_strategy(game: Any) -> Union[str, int]:
     return move
 
 
+def minimax_strategy(game: Any) -> Union[str, int]:
+    """
+    Return a move that plays game perfectly, found by memoized minimax search
+    """
+    with _SOLVER_LOCK:
+        return SOLVER.best_move(game, game.current_state)
+
+
+def table_strategy(game: Any) -> Union[str, int]:
+    """
+    Return a perfect move for a subtract square game by looking it up in the
+    table saved at TABLE_PATH, which is extended when the game needs larger
+    values. Multi-pile games are played by grundy_strategy, chopsticks
+    variants by retrograde_strategy, and other games by minimax_strategy.
+    """
+    global TABLE
+    from subtract_square_table import SubtractSquareTable
+    state = game.current_state
+    if isinstance(state, MultiSubtractSquareState):
+        return grundy_strategy(game)
+    if not isinstance(state, SubtractSquareState):
+        return _other_game_strategy(game)
+    with _TABLE_LOCK:
+        if TABLE is None or TABLE.size < state.current_value:
+            size = state.current_value
+            if TABLE is not None:
+                size = max(size, 2 * TABLE.size)
+                TABLE.close()
+            TABLE = SubtractSquareTable.load_or_build(TABLE_PATH, size)
+        return TABLE.best_move(state.current_value)
+
+
+def retrograde_strategy(game: Any) -> Union[str, int]:
+    """
+    Return a perfect move for game, looked up in a retrograde analysis of
+    every position reachable from the current state. Chopsticks moves are
+    looked up in the tablebase at CHOPSTICKS_TABLE_PATH, multi-pile subtract
+    square games are played by grundy_strategy, and subtract square games,
+    whose positions are too many to enumerate, and games whose states are
+    not hashable are played by table_strategy.
+    """
+    global CHOPSTICKS_TABLE
+    from retrograde import RetrogradeSolver
+    from chopstick_state import ChopsticksState
+    from chopsticks_table import ChopsticksTable
+    state = game.current_state
+    if isinstance(state, ChopsticksState):
+        with _CHOPSTICKS_TABLE_LOCK:
+            if CHOPSTICKS_TABLE is None:
+                CHOPSTICKS_TABLE = ChopsticksTable.load_or_build(
+                    CHOPSTICKS_TABLE_PATH)
+            return CHOPSTICKS_TABLE.best_move(state)
+    if isinstance(state, MultiSubtractSquareState):
+        return grundy_strategy(game)
+    if (isinstance(state, SubtractSquareState)
+            or type(state).__hash__ is None):
+        return table_strategy(game)
+    with _RETROGRADE_LOCK:
+        solver = RETROGRADE.get(type(state))
+        if solver is None or state.canonical() not in solver.moves:
+            solver = RetrogradeSolver(game, [state])
+            RETROGRADE[type(state)] = solver
+        return solver.best_move(state)
+
+
+def mcts_strategy(game: Any) -> Union[str, int]:
+    """
+    Return the move chosen by Monte Carlo tree search within the budget of
+    MCTS_PLAYER
+    """
+    with _MCTS_LOCK:
+        return MCTS_PLAYER.choose_move(game, game.current_state)
+
+
+def alpha_beta_strategy(game: Any) -> Union[str, int]:
+    """
+    Return the best move found by iterative-deepening alpha-beta search
+    before the deadline of ALPHA_BETA_PLAYER
+    """
+    with _ALPHA_BETA_LOCK:
+        return ALPHA_BETA_PLAYER.choose_move(game, game.current_state)
+
+
+def parallel_strategy(game: Any) -> Union[str, int]:
+    """
+    Return a perfect move for a subtract square game, searching the possible
+    moves of large values across a pool of processes. Multi-pile games are
+    played by grundy_strategy, chopsticks variants by retrograde_strategy,
+    and other games by minimax_strategy.
+    """
+    global PARALLEL_SEARCH
+    from parallel_search import ParallelSearch
+    state = game.current_state
+    if isinstance(state, MultiSubtractSquareState):
+        return grundy_strategy(game)
+    if not isinstance(state, SubtractSquareState):
+        return _other_game_strategy(game)
+    with _PARALLEL_SEARCH_LOCK:
+        if PARALLEL_SEARCH is None:
+            PARALLEL_SEARCH = ParallelSearch()
+        return PARALLEL_SEARCH.best_move(state.current_value)
+
+
+def grundy_strategy(game: Any) -> Union[str, int]:
+    """
+    Return a perfect move for a subtract square game on one or more piles,
+    found from the Grundy values of the piles in the table saved at
+    GRUNDY_TABLE_PATH, which is extended when the game needs larger piles.
+    Chopsticks variants are played by retrograde_strategy, and other games
+    by minimax_strategy.
+    """
+    global GRUNDY_TABLE
+    from grundy_table import GrundyTable
+    state = game.current_state
+    if not isinstance(state, SubtractSquareState):
+        return _other_game_strategy(game)
+    piles = getattr(state, 'piles', [state.current_value])
+    with _GRUNDY_TABLE_LOCK:
+        if GRUNDY_TABLE is None or GRUNDY_TABLE.size < max(piles):
+            size = max(piles)
+            if GRUNDY_TABLE is not None:
+                size = max(size, 2 * GRUNDY_TABLE.size)
+                GRUNDY_TABLE.close()
+            GRUNDY_TABLE = GrundyTable.load_or_build(GRUNDY_TABLE_PATH,
+                                                     size)
+        move = GRUNDY_TABLE.best_move(piles)
+    if move is None or isinstance(state, MultiSubtractSquareState):
+        return move
+    return move[1]
+
+
+def reset_engines() -> None:
+    """
+    Empty the solver, the retrograde analyses and the MCTS tree, and close
+    and drop the tables, so that every strategy starts again as it would in
+    a new process, which loads the tables saved on disk on first use.
+    """
+    global TABLE, CHOPSTICKS_TABLE, GRUNDY_TABLE
+    with _SOLVER_LOCK:
+        SOLVER.clear()
+    with _TABLE_LOCK:
+        if TABLE is not None:
+            TABLE.close()
+        TABLE = None
+    with _CHOPSTICKS_TABLE_LOCK:
+        if CHOPSTICKS_TABLE is not None:
+            CHOPSTICKS_TABLE.close()
+        CHOPSTICKS_TABLE = None
+    with _GRUNDY_TABLE_LOCK:
+        if GRUNDY_TABLE is not None:
+            GRUNDY_TABLE.close()
+        GRUNDY_TABLE = None
+    with _RETROGRADE_LOCK:
+        RETROGRADE.clear()
+    with _MCTS_LOCK:
+        MCTS_PLAYER.reset()
+
+
+def _other_game_strategy(game: Any) -> Union[str, int]:
+    """
+    Return a perfect move for a game other than subtract square: chopsticks
+    variants are played by retrograde_strategy, which labels all of their
+    positions at once, and other games by minimax_strategy.
+    """
+    from general_chopsticks_state import GeneralChopsticksState
+    if isinstance(game.current_state, GeneralChopsticksState):
+        return retrograde_strategy(game)
+    return minimax_strategy(game)
+
+
+def minimax_ponder(game: Any, should_stop: Callable[[], bool]) -> None:
+    """
+    Solve the positions minimax_strategy may face after the opponent's move
+    from the current state of game, until should_stop returns True
+    """
+    SOLVER.ponder(game, game.current_state, should_stop)
+
+
+def mcts_ponder(game: Any, should_stop: Callable[[], bool]) -> None:
+    """
+    Search the tree of MCTS_PLAYER from the current state of game, where the
+    opponent is to move, until should_stop returns True
+    """
+    MCTS_PLAYER.ponder(game, game.current_state, should_stop)
+
+
+# The ponder function of each strategy that can think on its opponent's
+# time, for GameInterface's pondering mode.
+PONDER_FUNCTIONS = {minimax_strategy: minimax_ponder,
+                    mcts_strategy: mcts_ponder}
+
+# The strategies that search the engine of each ponder function, directly or
+# by falling back to another strategy, and so must not choose a move while
+# it ponders.
+PONDER_ENGINE_USERS = {minimax_ponder: {minimax_strategy, table_strategy,
+                                        retrograde_strategy,
+                                        parallel_strategy, grundy_strategy},
+                       mcts_ponder: {mcts_strategy}}
+
+
+def can_ponder_against(ponder: Callable[[Any, Callable[[], bool]], Any],
+                       strategy: Callable[[Any], Any]) -> bool:
+    """
+    Return whether ponder can run while strategy chooses a move, that is,
+    whether strategy never searches the engine ponder fills. A ponder
+    function not in PONDER_ENGINE_USERS only runs against interactive_strategy
+    and random_strategy.
+
+    >>> can_ponder_against(mcts_ponder, interactive_strategy)
+    True
+    >>> can_ponder_against(mcts_ponder, mcts_strategy)
+    False
+    >>> can_ponder_against(minimax_ponder, mcts_strategy)
+    True
+    >>> can_ponder_against(minimax_ponder, table_strategy)
+    False
+    """
+    users = PONDER_ENGINE_USERS.get(ponder)
+    if users is None:
+        return strategy in (interactive_strategy, random_strategy)
+    return strategy not in users
+
 if __name__ == "__main__":
     import python_ta
     python_ta.check_all(config="a1_pyta.txt")
@@ -1,6 +1,6 @@
 """module for SubtractSquare class
 """
-from typing import Any
+from typing import Any, Optional
 from game import Game
 from subtract_square_state import SubtractSquareState
 
@@ -11,8 +11,10 @@ class SubtractSquare(Game):
     current_value: int
     current_state: SubtractSquareState
 
-    def __init__(self, is_p1_turn: bool) -> None:
-        """Initialize a new subtract sqaure game
+    def __init__(self, is_p1_turn: bool,
+                 starting_value: Optional[int] = None) -> None:
+        """Initialize a new subtract sqaure game, asking for the starting
+        value if starting_value is None
 
         Extends Game.__init__
 
@@ -21,10 +23,16 @@ class SubtractSquare(Game):
         current_state - an instance of SubtractSquareState class
 
         Assume starting_value is a non-negative whole number
+
+        >>> a = SubtractSquare(True, 20)
+        >>> print(a)
+        The current player is Player 1 and the current value is 20
         """
         super().__init__(is_p1_turn)
-        self.current_value = int(input("Type a non-negative whole number " +
+        if starting_value is None:
+            starting_value = int(input("Type a non-negative whole number " +
                                        "as the starting value of the game: "))
+        self.current_value = starting_value
         self.current_state = SubtractSquareState(self.current_player,
                                                  self.current_value)
 
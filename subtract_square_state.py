@@ -1,13 +1,143 @@
 """module for SubtractSquareState class
 """
-from typing import Any
+from typing import Any, Iterator, Union
+from collections.abc import Sequence
+import math
 from game_state import GameState
 
 
+class SquareMoves(Sequence):
+    """The possible moves of a subtract square value, the squares from 1 up
+    to the value, as a read-only sequence that computes each square when it
+    is needed instead of storing them
+
+    len, membership and indexing take constant time however large the value
+    is, so random.choice picks a move without building a list. It compares
+    equal to the list of the same squares, and prints like one.
+
+    value - the value whose possible moves are self
+    """
+    __slots__ = ('value', '_count')
+    value: int
+    _count: int
+
+    def __init__(self, value: int) -> None:
+        """Initialize the moves of value
+
+        >>> m = SquareMoves(10 ** 12)
+        >>> len(m), m[-1], 999999 ** 2 in m, 999999 ** 2 + 1 in m
+        (1000000, 1000000000000, True, False)
+        """
+        self.value = value
+        self._count = math.isqrt(value) if value > 0 else 0
+
+    def __repr__(self) -> str:
+        """Return the representation of the list of the squares of self
+
+        >>> SquareMoves(30)
+        [1, 4, 9, 16, 25]
+        """
+        return repr(list(self))
+
+    def __len__(self) -> int:
+        """Return the number of squares in self
+        """
+        return self._count
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        """Return the square at index, or a list of the squares of a slice
+
+        >>> m = SquareMoves(30)
+        >>> m[0], m[-1], m[1:3]
+        (1, 25, [4, 9])
+        >>> m[5]
+        Traceback (most recent call last):
+        ...
+        IndexError: square index out of range
+        """
+        if isinstance(index, slice):
+            return [(base + 1) ** 2
+                    for base in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("square index out of range")
+        return (index + 1) * (index + 1)
+
+    def __iter__(self) -> Iterator[int]:
+        """Return an iterator over the squares of self, in increasing order
+        """
+        return (base * base for base in range(1, self._count + 1))
+
+    def __contains__(self, move: object) -> bool:
+        """Return whether move is one of the squares of self, from its integer
+        square root
+
+        >>> m = SquareMoves(25)
+        >>> 25 in m, 4.0 in m, True in m, 7 in m, -4 in m, '4' in m
+        (True, True, True, False, False, False)
+        """
+        if isinstance(move, float) and move.is_integer():
+            move = int(move)
+        if not isinstance(move, int) or not 0 < move <= self.value:
+            return False
+        root = math.isqrt(move)
+        return root * root == move
+
+    def __eq__(self, other: Any) -> bool:
+        """Return whether self has the same squares as other, another
+        SquareMoves or a list
+
+        >>> SquareMoves(10) == [1, 4, 9], SquareMoves(10) == SquareMoves(11)
+        (True, True)
+        """
+        if isinstance(other, SquareMoves):
+            return self._count == other._count
+        if isinstance(other, list):
+            return len(other) == self._count and list(self) == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        """Return the hash of the number of squares of self
+        """
+        return hash(self._count)
+
+    def __reduce__(self) -> Any:
+        """Return how to pickle self: as its value
+        """
+        return SquareMoves, (self.value,)
+
+    def index(self, move: Any, start: int = 0, stop: Any = None) -> int:
+        """Return the index of the square move in self
+
+        Raise ValueError if move is not in self.
+
+        >>> SquareMoves(30).index(16)
+        3
+        """
+        if move not in self:
+            raise ValueError("{} is not a square move".format(move))
+        position = math.isqrt(int(move)) - 1
+        if stop is None:
+            stop = self._count
+        if not start <= position < stop:
+            raise ValueError("{} is not a square move".format(move))
+        return position
+
+    def count(self, move: Any) -> int:
+        """Return 1 if move is in self, and 0 otherwise
+        """
+        return int(move in self)
+
+
 class SubtractSquareState(GameState):
     """The current state of a subtract sqaure game
+
+    The hash of a state is computed once and kept up to date by apply_move
+    and undo_move: twice the current value, plus 1 when Player 2 is to move.
     """
     current_value: int
+    _hash: int
 
     def __init__(self, current_player: str, current_value: int) -> None:
         """Initialize a new state of a subtract square game
@@ -25,6 +155,7 @@ class SubtractSquareState(GameState):
         """
         super().__init__(current_player)
         self.current_value = current_value
+        self._hash = 2 * current_value + (current_player == 'p2')
 
     def __str__(self) -> str:
         """Return a string representation of current_player and current_value
@@ -55,12 +186,23 @@ class SubtractSquareState(GameState):
         >>> a == SubtractSquareState('p2', 28)
         True
         """
-        return (type(self) == type(other)
+        return (type(self) == type(other) and self._hash == other._hash
                 and self.current_value == other.current_value
                 and self.current_player == other.current_player)
 
-    def get_possible_moves(self) -> list:
-        """Return all possible moves for the subtract square game
+    def __hash__(self) -> int:
+        """Return the hash of self
+
+        >>> hash(SubtractSquareState('p2', 28))
+        57
+        >>> len({SubtractSquareState('p1', 5), SubtractSquareState('p1', 5)})
+        1
+        """
+        return self._hash
+
+    def get_possible_moves(self) -> SquareMoves:
+        """Return all possible moves for the subtract square game, as a lazy
+        sequence of squares
 
         Overrides GameState.get_possible_moves
 
@@ -71,12 +213,24 @@ class SubtractSquareState(GameState):
         >>> b.get_possible_moves()
         []
         """
-        possible_base = 1
-        result = []
-        while possible_base ** 2 <= self.current_value:
-            result.append(possible_base ** 2)
-            possible_base += 1
-        return result
+        return SquareMoves(self.current_value)
+
+    def moves_key(self) -> int:
+        """Return the current value of self, which decides its possible moves
+        for either player
+
+        Overrides GameState.moves_key
+
+        >>> a = SubtractSquareState.enable_move_cache(16)
+        >>> SubtractSquareState('p1', 10).get_possible_moves()
+        [1, 4, 9]
+        >>> SubtractSquareState('p2', 10).is_valid_move(9)
+        True
+        >>> print(a)
+        1/16 positions: 50.0% hits (1 hits, 1 misses)
+        >>> SubtractSquareState.disable_move_cache()
+        """
+        return self.current_value
 
     def is_valid_move(self, move_to_make: int) -> bool:
         """Return whether move_to_make is a valid move
@@ -111,6 +265,49 @@ class SubtractSquareState(GameState):
         current_value = self.current_value - move
         return SubtractSquareState(current_player, current_value)
 
+    def copy(self) -> 'SubtractSquareState':
+        """Return a new state equal to self that apply_move may change
+
+        Overrides GameState.copy
+
+        >>> a = SubtractSquareState('p2', 28)
+        >>> b = a.copy()
+        >>> b == a and b is not a
+        True
+        """
+        return SubtractSquareState(self.current_player, self.current_value)
+
+    def apply_move(self, move: int) -> int:
+        """Apply the valid move to self in place, and return what undo_move
+        needs to take it back
+
+        Overrides GameState.apply_move
+
+        >>> a = SubtractSquareState('p2', 28)
+        >>> undo = a.apply_move(16)
+        >>> a == SubtractSquareState('p1', 12)
+        True
+        >>> a.undo_move(undo)
+        >>> a == SubtractSquareState('p2', 28)
+        True
+        >>> hash(a) == hash(SubtractSquareState('p2', 28))
+        True
+        """
+        self.current_value -= move
+        self.current_player = 'p1' if self.current_player == 'p2' else 'p2'
+        self._hash = (self._hash - 2 * move) ^ 1
+        return move
+
+    def undo_move(self, undo: int) -> None:
+        """Take back the last move applied to self, where undo is what
+        apply_move returned for it
+
+        Overrides GameState.undo_move
+        """
+        self.current_value += undo
+        self.current_player = 'p1' if self.current_player == 'p2' else 'p2'
+        self._hash = (self._hash + 2 * undo) ^ 1
+
 
 if __name__ == "__main__":
     import python_ta
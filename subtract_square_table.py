@@ -0,0 +1,237 @@
+"""module for SubtractSquareTable class
+"""
+from typing import List, Optional, Union
+from array import array
+from math import isqrt
+import os
+from tablebase import Tablebase, write_tablebase
+
+
+class SubtractSquareTable:
+    """A table of the winning moves of every subtract square value up to size
+
+    For each value v, the table stores the base k of a winning square k ** 2,
+    or 0 if v is lost by the player about to move. A table can be saved to a
+    tablebase file and memory-mapped on the next start, so looking up a value
+    costs O(1) and nothing is recomputed.
+
+    size - the largest value in the table
+    """
+    # The game identifier of subtract square tablebases.
+    GAME = 'subtract_square'
+    size: int
+    _bases: Union[array, memoryview]
+    _tablebase: Optional[Tablebase]
+
+    def __init__(self, size: int = 0) -> None:
+        """Initialize a new table of every value up to size
+
+        >>> t = SubtractSquareTable(10)
+        >>> t.size
+        10
+        >>> [v for v in range(11) if not t.is_win(v)]
+        [0, 2, 5, 7, 10]
+        """
+        self.size = -1
+        self._bases = array('I')
+        self._tablebase = None
+        self.extend(size)
+
+    def __str__(self) -> str:
+        """Return a string representation of self
+
+        >>> print(SubtractSquareTable(100))
+        Subtract square table of the values 0 to 100
+        """
+        return "Subtract square table of the values 0 to {}".format(self.size)
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether SubtractSquareTable self is equivalent to other
+
+        >>> SubtractSquareTable(3) == SubtractSquareTable(4)
+        False
+        """
+        return (type(self) == type(other)
+                and self.size == other.size
+                and bytes(self._bases) == bytes(other._bases))
+
+    def is_win(self, value: int) -> bool:
+        """Return whether value is won by the player about to move
+
+        Assume 0 <= value <= self.size
+
+        >>> t = SubtractSquareTable(20)
+        >>> t.is_win(17)
+        False
+        >>> t.is_win(18)
+        True
+        """
+        return self._bases[value] != 0
+
+    def best_move(self, value: int) -> Optional[int]:
+        """Return the best square to subtract from value, or None if no square
+        can be subtracted
+
+        The best square of a losing value is 1, which makes the game last as
+        long as possible.
+
+        Assume 0 <= value <= self.size
+
+        >>> t = SubtractSquareTable(20)
+        >>> t.best_move(18)
+        16
+        >>> t.best_move(17)
+        1
+        >>> t.best_move(0) is None
+        True
+        """
+        base = self._bases[value]
+        if base:
+            return base * base
+        if value:
+            return 1
+        return None
+
+    def extend(self, size: int) -> None:
+        """Extend self to every value up to size, reusing the values that are
+        already in the table
+
+        Every losing value v makes v + k ** 2 a winning value, so the table is
+        filled bottom-up by a sieve from each losing value, and only the
+        values above the old size are computed.
+
+        >>> t = SubtractSquareTable(5)
+        >>> t.extend(50)
+        >>> t.size
+        50
+        >>> t == SubtractSquareTable(50)
+        True
+        """
+        if size <= self.size:
+            return
+        old_size = self.size
+        bases = self._copy()
+        bases.frombytes(bytes((size - old_size) * bases.itemsize))
+        # Values above old_size reached from a losing value at most old_size.
+        for value in range(old_size + 1):
+            if not bases[value]:
+                self._mark(bases, value, old_size + 1, size)
+        for value in range(old_size + 1, size + 1):
+            if not bases[value]:
+                self._mark(bases, value, value + 1, size)
+        self._bases = bases
+        self.size = size
+
+    def save(self, path: str) -> None:
+        """Save self to a tablebase file at path
+
+        >>> import tempfile
+        >>> d = tempfile.mkdtemp()
+        >>> SubtractSquareTable(30).save(os.path.join(d, 'ss.table'))
+        >>> SubtractSquareTable.load(os.path.join(d, 'ss.table')).size
+        30
+        """
+        write_tablebase(path, self.GAME, 'I', 1, array('I', self._bases))
+
+    @classmethod
+    def load(cls, path: str) -> 'SubtractSquareTable':
+        """Return the table saved in the tablebase file at path, memory-mapped
+        rather than read into memory
+
+        Raise ValueError if the file is not a subtract square tablebase.
+        """
+        tablebase = Tablebase(path)
+        if (tablebase.game != cls.GAME or tablebase.typecode != 'I'
+                or tablebase.width != 1):
+            raise ValueError("{} is not a subtract square tablebase".format(
+                path))
+        table = cls.__new__(cls)
+        table.size = tablebase.count - 1
+        table._tablebase = tablebase
+        table._bases = tablebase.records()
+        return table
+
+    @classmethod
+    def load_or_build(cls, path: str, size: int) -> 'SubtractSquareTable':
+        """Return the table saved at path, extended and saved again if it does
+        not reach size
+
+        A missing or unreadable file is rebuilt from scratch.
+
+        >>> import tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'ss.table')
+        >>> SubtractSquareTable.load_or_build(path, 40).size
+        40
+        >>> SubtractSquareTable.load_or_build(path, 10).size
+        40
+        >>> SubtractSquareTable.load_or_build(path, 90).size
+        90
+        """
+        try:
+            table = cls.load(path)
+        except (OSError, ValueError):
+            table = cls()
+        if table.size < size:
+            table.extend(size)
+            table.save(path)
+        return table
+
+    def close(self) -> None:
+        """Release the file mapped by self, keeping a copy of its values
+        """
+        self._bases = self._copy()
+
+    def _copy(self) -> array:
+        """Return the values of self as an array in memory, releasing the
+        memory-mapped file of self, if any
+        """
+        if self._tablebase is None:
+            return self._bases
+        bases = array('I')
+        bases.frombytes(self._bases.cast('B'))
+        self._tablebase.close()
+        self._tablebase = None
+        return bases
+
+    def check(self) -> List[str]:
+        """Return the values whose entry disagrees with the rules of subtract
+        square, described as problems
+
+        A winning value must leave a losing value after its square, and every
+        square of a losing value must leave a winning value.
+
+        >>> SubtractSquareTable(300).check()
+        []
+        """
+        problems = []
+        for value in range(self.size + 1):
+            base = self._bases[value]
+            if base:
+                if base * base > value or self._bases[value - base * base]:
+                    problems.append("value {} does not win with {}".format(
+                        value, base * base))
+            else:
+                for square in (k * k for k in range(1, isqrt(value) + 1)):
+                    if not self._bases[value - square]:
+                        problems.append("value {} wins with {}".format(
+                            value, square))
+                        break
+        return problems
+
+    @staticmethod
+    def _mark(bases: array, value: int, low: int, high: int) -> None:
+        """Mark every value in [low, high] that is a square above the losing
+        value value as winning, unless it is already marked
+        """
+        base = max(1, isqrt(max(low - value - 1, 0)) + 1)
+        square = base * base
+        while value + square <= high:
+            if value + square >= low and not bases[value + square]:
+                bases[value + square] = base
+            base += 1
+            square = base * base
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
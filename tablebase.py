@@ -0,0 +1,250 @@
+"""module for Tablebase class and the tablebase file format
+
+A tablebase file holds one fixed-width record of integers per position of a
+game, indexed by the position's code. It starts with a header:
+
+    magic         8 bytes   b'CSCTBASE'
+    version       uint16
+    game          16 bytes  the game identifier, padded with NUL bytes
+    typecode      1 byte    the array typecode of the integers
+    width         uint8     the number of integers per record
+    byte order    uint8     0 for little-endian, 1 for big-endian
+    count         uint64    the number of records
+    checksum      uint32    the CRC-32 of the records
+
+and the records start at byte DATA_OFFSET. Files are memory-mapped
+read-only, so every process that opens the same file shares one copy of its
+pages, and a lookup reads only the page it needs.
+
+Run it to build or verify the tablebases of both games and the Grundy
+values of subtract square piles:
+
+    python tablebase.py build subtract_square ss.table --size 1000000
+    python tablebase.py build chopsticks chopsticks.table
+    python tablebase.py build grundy grundy.table --size 100000
+    python tablebase.py verify ss.table
+"""
+from typing import List, Optional
+from array import array
+import argparse
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+
+MAGIC = b'CSCTBASE'
+VERSION = 1
+HEADER = struct.Struct('<8sH16scBBQI')
+# Records start here, so that they are aligned for every typecode.
+DATA_OFFSET = 48
+BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+
+def write_tablebase(path: str, game: str, typecode: str, width: int,
+                    records: array) -> None:
+    """Write records, an array of width integers per position, to a tablebase
+    file for game at path, replacing it atomically so that other processes
+    never see a partly written file
+
+    Raise ValueError if game is longer than 16 characters.
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'a.table')
+    >>> write_tablebase(path, 'demo', 'h', 2, array('h', [1, -1, 2, -2]))
+    >>> t = Tablebase(path)
+    >>> t.game, t.count, t.get(1, 1)
+    ('demo', 2, -2)
+    >>> t.close()
+    """
+    if len(game) > 16:
+        raise ValueError("the game identifier {} is longer than 16 "
+                         "characters".format(game))
+    data = records.tobytes()
+    header = HEADER.pack(MAGIC, VERSION, game.encode('ascii'),
+                         typecode.encode('ascii'), width, BYTE_ORDER,
+                         len(records) // width, zlib.crc32(data))
+    temp_path = '{}.{}.{}.tmp'.format(path, os.getpid(),
+                                      threading.get_ident())
+    with open(temp_path, 'wb') as f:
+        f.write(header.ljust(DATA_OFFSET, b'\0'))
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class Tablebase:
+    """A tablebase file, memory-mapped on the first lookup
+
+    game - the identifier of the game of the tablebase
+    typecode - the array typecode of the integers of each record
+    width - the number of integers in each record
+    count - the number of records
+    checksum - the CRC-32 of the records, as written
+    """
+    game: str
+    typecode: str
+    width: int
+    count: int
+    checksum: int
+    _path: str
+    _map: Optional[mmap.mmap]
+    _records: Optional[memoryview]
+
+    def __init__(self, path: str) -> None:
+        """Initialize a tablebase from the header of the file at path, without
+        reading its records
+
+        Raise ValueError if the file is not a tablebase of this version for
+        this machine.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            size = os.fstat(f.fileno()).st_size
+        if len(header) < HEADER.size:
+            raise ValueError("{} is not a tablebase".format(path))
+        (magic, version, game, typecode, width, order, count,
+         checksum) = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or order != BYTE_ORDER:
+            raise ValueError("{} is not a version {} tablebase for this "
+                             "machine".format(path, VERSION))
+        self.game = game.rstrip(b'\0').decode('ascii')
+        self.typecode = typecode.decode('ascii')
+        self.width = width
+        self.count = count
+        self.checksum = checksum
+        if size != DATA_OFFSET + count * width * self.itemsize():
+            raise ValueError("{} is truncated".format(path))
+        self._path = path
+        self._map = None
+        self._records = None
+
+    def __str__(self) -> str:
+        """Return a summary of self
+
+        >>> import tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'a.table')
+        >>> write_tablebase(path, 'demo', 'I', 1, array('I', [7, 8, 9]))
+        >>> print(Tablebase(path))
+        demo tablebase: 3 records of 1 'I' integers
+        """
+        return "{} tablebase: {} records of {} '{}' integers".format(
+            self.game, self.count, self.width, self.typecode)
+
+    def itemsize(self) -> int:
+        """Return the number of bytes of each integer of a record
+        """
+        return array(self.typecode).itemsize
+
+    def records(self) -> memoryview:
+        """Return the integers of every record, in one flat read-only view of
+        the mapped file
+        """
+        if self._records is None:
+            with open(self._path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._records = memoryview(self._map)[DATA_OFFSET:].cast(
+                self.typecode)
+        return self._records
+
+    def get(self, code: int, column: int = 0) -> int:
+        """Return integer column of the record of the position with code code
+        """
+        return self.records()[code * self.width + column]
+
+    def verify_checksum(self) -> bool:
+        """Return whether the records match the checksum in the header
+        """
+        return zlib.crc32(self.records().cast('B')) == self.checksum
+
+    def close(self) -> None:
+        """Unmap the file of self; later lookups map it again
+        """
+        if self._records is not None:
+            self._records.release()
+            self._map.close()
+            self._records = None
+            self._map = None
+
+
+def verify(path: str) -> List[str]:
+    """Return the problems found in the tablebase at path: a checksum
+    mismatch, or a record that disagrees with the rules of its game
+
+    >>> import tempfile
+    >>> from subtract_square_table import SubtractSquareTable
+    >>> path = os.path.join(tempfile.mkdtemp(), 'ss.table')
+    >>> SubtractSquareTable(500).save(path)
+    >>> verify(path)
+    []
+    >>> from grundy_table import GrundyTable
+    >>> GrundyTable(200).save(path)
+    >>> verify(path)
+    []
+    """
+    from subtract_square_table import SubtractSquareTable
+    from chopsticks_table import ChopsticksTable
+    from grundy_table import GrundyTable
+    tablebase = Tablebase(path)
+    problems = []
+    try:
+        if not tablebase.verify_checksum():
+            problems.append("the records do not match the checksum")
+        game = tablebase.game
+    finally:
+        tablebase.close()
+    tables = {SubtractSquareTable.GAME: SubtractSquareTable,
+              ChopsticksTable.GAME: ChopsticksTable,
+              GrundyTable.GAME: GrundyTable}
+    if game not in tables:
+        problems.append("unknown game {}".format(game))
+        return problems
+    table = tables[game].load(path)
+    try:
+        problems.extend(table.check())
+    finally:
+        table.close()
+    return problems
+
+
+def _parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """Return the command line arguments of the tablebase tool
+    """
+    parser = argparse.ArgumentParser(
+        description="Build or verify game tablebases.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="build a tablebase")
+    build.add_argument('game', choices=['subtract_square', 'chopsticks',
+                                        'grundy'])
+    build.add_argument('path')
+    build.add_argument('--size', type=int, default=10 ** 6,
+                       help="the largest subtract square value or pile")
+    check = commands.add_parser('verify', help="verify a tablebase")
+    check.add_argument('path')
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """Build or verify a tablebase as the command line args ask and return
+    the exit status, which is 1 if verification found problems
+    """
+    from subtract_square_table import SubtractSquareTable
+    from chopsticks_table import ChopsticksTable
+    from grundy_table import GrundyTable
+    options = _parse_args(args)
+    if options.command == 'build':
+        if options.game == 'subtract_square':
+            SubtractSquareTable(options.size).save(options.path)
+        elif options.game == 'grundy':
+            GrundyTable(options.size).save(options.path)
+        else:
+            ChopsticksTable().save(options.path)
+    problems = verify(options.path)
+    print(Tablebase(options.path))
+    for problem in problems:
+        print("PROBLEM:", problem)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""module for the shape of game trees: TreeStats, explore and perft
+
+explore walks the tree of a starting position depth first, applying and
+undoing moves on one copy of the state, and counts the positions at each
+depth, the branching factors, the finished positions and the transpositions.
+perft counts the move sequences of an exact length, so a faster make_move or
+get_possible_moves can be checked against the known counts.
+
+Run it with the key of a game and its starting values, as sent in a NEW
+line to game_server:
+
+    python tree_stats.py s 200
+    python tree_stats.py c --depth 12 --max-positions 100000
+    python tree_stats.py v 7 3 1 --perft 5
+"""
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, \
+    Set, Tuple
+import argparse
+import time
+from game import Game
+from game_state import GameState
+
+# The most positions the visited set of explore keeps unless told otherwise.
+DEFAULT_MAX_POSITIONS = 10 ** 6
+# Marks the end of the moves of a position on the stack of a traversal.
+_DONE = object()
+
+
+class TreeStats:
+    """The shape of the part of a game tree explored from a position
+
+    depth_counts - the number of positions reached at each depth, the root
+        being at depth 0
+    terminal - the number of positions reached where the game is over
+    expanded - the number of positions whose moves were followed
+    max_branching - the most moves of a position expanded
+    transpositions - the number of positions reached again, and not
+        followed again, when duplicates are skipped
+    unique - the number of distinct positions recorded, or None if
+        duplicates are not skipped
+    max_positions - the most positions the visited set keeps
+    capped - whether the visited set filled up, so that unique is a lower
+        bound and positions reached after that may be followed again
+    elapsed - the seconds the exploration took
+    """
+    depth_counts: List[int]
+    terminal: int
+    expanded: int
+    max_branching: int
+    transpositions: int
+    unique: Optional[int]
+    max_positions: int
+    capped: bool
+    elapsed: float
+    _moves: int
+
+    def __init__(self, dedupe: bool = True,
+                 max_positions: int = DEFAULT_MAX_POSITIONS) -> None:
+        """Initialize the statistics of an empty exploration
+
+        >>> s = TreeStats()
+        >>> s.nodes(), s.unique, s.average_branching()
+        (0, 0, 0.0)
+        """
+        self.depth_counts = []
+        self.terminal = 0
+        self.expanded = 0
+        self.max_branching = 0
+        self.transpositions = 0
+        self.unique = 0 if dedupe else None
+        self.max_positions = max_positions
+        self.capped = False
+        self.elapsed = 0.0
+        self._moves = 0
+
+    def __str__(self) -> str:
+        """Return a report of self, with a line per depth
+
+        >>> from subtract_square import SubtractSquare
+        >>> from subtract_square_state import SubtractSquareState
+        >>> print(explore(SubtractSquare(True, 5),
+        ...               SubtractSquareState('p1', 5)))  # doctest: +ELLIPSIS
+        depth  positions
+            0  1
+            1  2
+            2  2
+            3  1
+            4  1
+            5  1
+        8 positions to depth 5 in ... s, 2 over
+        branching: average 1.33, maximum 2
+        unique positions: 8
+        transpositions: 1 (11.1% of the positions reached)
+        """
+        lines = ["depth  positions"]
+        lines.extend("{:5}  {}".format(depth, count)
+                     for depth, count in enumerate(self.depth_counts))
+        lines.append("{} positions to depth {} in {:.3f} s, {} over".format(
+            self.nodes(), len(self.depth_counts) - 1, self.elapsed,
+            self.terminal))
+        lines.append("branching: average {:.2f}, maximum {}".format(
+            self.average_branching(), self.max_branching))
+        if self.unique is not None:
+            if self.capped:
+                lines.append("unique positions: at least {} (the visited "
+                             "set is capped at {})".format(
+                                 self.unique, self.max_positions))
+            else:
+                lines.append("unique positions: {}".format(self.unique))
+            lines.append("transpositions: {} ({:.1%} of the positions "
+                         "reached)".format(self.transpositions,
+                                           self.transposition_ratio()))
+        return "\n".join(lines)
+
+    def nodes(self) -> int:
+        """Return the number of positions counted at every depth
+        """
+        return sum(self.depth_counts)
+
+    def average_branching(self) -> float:
+        """Return the average number of moves of the positions expanded
+        """
+        if not self.expanded:
+            return 0.0
+        return self._moves / self.expanded
+
+    def transposition_ratio(self) -> float:
+        """Return the fraction of the positions reached that had been reached
+        before
+        """
+        reached = self.nodes() + self.transpositions
+        if not reached:
+            return 0.0
+        return self.transpositions / reached
+
+    def _reach(self, depth: int) -> None:
+        """Count a position at depth
+        """
+        if depth == len(self.depth_counts):
+            self.depth_counts.append(0)
+        self.depth_counts[depth] += 1
+
+    def _expand(self, moves: int) -> None:
+        """Count a position expanded with moves moves
+        """
+        self.expanded += 1
+        self._moves += moves
+        if moves > self.max_branching:
+            self.max_branching = moves
+
+
+def position_key(state: GameState) -> Hashable:
+    """Return the key of the position of state in a visited set: its hash if
+    it is hashable, or its player and string otherwise
+
+    A hash is a small int whatever the position, and is taken from the
+    state at the time, so a copy changed by apply_move afterwards does not
+    change the keys already stored.
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> position_key(SubtractSquareState('p2', 10))
+    21
+    """
+    if type(state).__hash__ is not None:
+        return hash(state)
+    return state.get_current_player_name(), str(state)
+
+
+def explore(game: Game, state: GameState, max_depth: Optional[int] = None,
+            dedupe: bool = True,
+            max_positions: int = DEFAULT_MAX_POSITIONS,
+            key: Callable[[GameState], Hashable] = position_key) \
+        -> TreeStats:
+    """Return the statistics of the tree of game from state, explored depth
+    first to max_depth, or to the end if it is None
+
+    If dedupe, a position reached again is counted as a transposition and
+    not followed again, so each position is counted once, at the depth it
+    was first reached. With max_depth, the visited set also keeps the
+    shallowest depth each position was reached at, and a position reached
+    again at a smaller depth is moved to that depth and followed again, so
+    that a subtree cut short by the depth limit is explored as far as a
+    breadth-first search would. The visited set keeps the keys of at most
+    max_positions positions; after that, only the positions on the current
+    line are checked, which keeps cycles out but may count a position more
+    than once, so a capped exploration of a large tree needs max_depth to
+    finish in reasonable time. Without dedupe, every line of play is
+    counted, which never ends in a game with cycles unless max_depth is
+    given.
+
+    >>> from chopsticks import Chopsticks
+    >>> from chopstick_state import ChopsticksState
+    >>> start = ChopsticksState('p1', [1, 1], [1, 1])
+    >>> s = explore(Chopsticks(True), start)
+    >>> s.unique, s.terminal, s.max_branching
+    (1163, 48, 4)
+    >>> explore(Chopsticks(True), start, 3, dedupe=False).depth_counts
+    [1, 4, 16, 64]
+    >>> s = explore(Chopsticks(True), start, 8, max_positions=100)
+    >>> s.capped, s.unique
+    (True, 100)
+
+    A depth-limited exploration finds the positions a breadth-first search
+    finds within the same depth:
+
+    >>> def breadth_first(state, max_depth):
+    ...     depths, level = {state: 0}, [state]
+    ...     for depth in range(1, max_depth + 1):
+    ...         level = [child for parent in level
+    ...                  if not Chopsticks(True).is_over(parent)
+    ...                  for child in map(parent.make_move,
+    ...                                   parent.get_possible_moves())
+    ...                  if child not in depths
+    ...                  and depths.setdefault(child, depth) == depth]
+    ...     return [list(depths.values()).count(d)
+    ...             for d in range(max_depth + 1)]
+    >>> s = explore(Chopsticks(True), start, 6)
+    >>> s.unique, s.depth_counts == breadth_first(start, 6)
+    (619, True)
+    """
+    stats = TreeStats(dedupe, max_positions)
+    start = time.perf_counter()
+    walker = state.copy()
+    # The shallowest depth each position was reached at.
+    visited: Optional[Dict[Hashable, int]] = {} if dedupe else None
+    root_key = key(walker) if dedupe else None
+    if visited is not None:
+        visited[root_key] = 0
+        stats.unique = 1
+    stats._reach(0)
+    # Each entry is the moves of a position still to follow, what takes back
+    # the move that led to it, and its key.
+    stack: List[Tuple[Iterator[Any], Any, Hashable]] = []
+    on_path: Set[Hashable] = {root_key}
+    if game.is_over(walker):
+        stats.terminal += 1
+    elif max_depth is None or max_depth > 0:
+        moves = walker.get_possible_moves()
+        stats._expand(len(moves))
+        stack.append((iter(moves), None, root_key))
+    while stack:
+        moves_left, _, _ = stack[-1]
+        move = next(moves_left, _DONE)
+        if move is _DONE:
+            _, undo, position = stack.pop()
+            if stack:
+                walker.undo_move(undo)
+                on_path.discard(position)
+            continue
+        undo = walker.apply_move(move)
+        depth = len(stack)
+        position = None
+        # The depth position was reached at before, if it is followed again.
+        shallower = None
+        if visited is not None:
+            position = key(walker)
+            if position in on_path or (
+                    position in visited and (max_depth is None
+                                             or visited[position] <= depth)):
+                stats.transpositions += 1
+                walker.undo_move(undo)
+                continue
+            if position in visited:
+                shallower = visited[position]
+                visited[position] = depth
+            elif len(visited) < max_positions:
+                visited[position] = depth
+                stats.unique += 1
+            else:
+                stats.capped = True
+        if shallower is not None:
+            stats.depth_counts[shallower] -= 1
+        stats._reach(depth)
+        if game.is_over(walker):
+            if shallower is None:
+                stats.terminal += 1
+        elif max_depth is None or depth < max_depth:
+            moves = walker.get_possible_moves()
+            # A position followed again was expanded before, unless it was
+            # first reached at the depth limit.
+            if shallower is None or shallower == max_depth:
+                stats._expand(len(moves))
+            stack.append((iter(moves), undo, position))
+            on_path.add(position)
+            continue
+        walker.undo_move(undo)
+    while len(stats.depth_counts) > 1 and not stats.depth_counts[-1]:
+        stats.depth_counts.pop()
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def perft(game: Game, state: GameState, depth: int) -> int:
+    """Return the number of sequences of depth moves from state, where the
+    game is not over before the last move
+
+    Every move is applied and taken back on one copy of state, so the count
+    exercises get_possible_moves, apply_move and undo_move.
+
+    >>> from chopsticks import Chopsticks
+    >>> from chopstick_state import ChopsticksState
+    >>> start = ChopsticksState('p1', [1, 1], [1, 1])
+    >>> [perft(Chopsticks(True), start, d) for d in range(6)]
+    [1, 4, 16, 64, 240, 816]
+    >>> from subtract_square import SubtractSquare
+    >>> from subtract_square_state import SubtractSquareState
+    >>> perft(SubtractSquare(True, 30), SubtractSquareState('p1', 30), 4)
+    148
+    """
+    walker = state.copy()
+    if depth == 0:
+        return 1
+    if game.is_over(walker):
+        return 0
+    count = 0
+    undos = []
+    stack = [iter(walker.get_possible_moves())]
+    while stack:
+        move = next(stack[-1], _DONE)
+        if move is _DONE:
+            stack.pop()
+            if undos:
+                walker.undo_move(undos.pop())
+            continue
+        undo = walker.apply_move(move)
+        if len(stack) == depth:
+            count += 1
+            walker.undo_move(undo)
+        elif game.is_over(walker):
+            walker.undo_move(undo)
+        else:
+            undos.append(undo)
+            stack.append(iter(walker.get_possible_moves()))
+    return count
+
+
+def timed_perft(game: Game, state: GameState,
+                max_depth: int) -> Iterator[Tuple[int, int, float]]:
+    """Yield the depth, the perft count and its seconds of each depth from 1
+    to max_depth
+
+    >>> from chopsticks import Chopsticks
+    >>> from chopstick_state import ChopsticksState
+    >>> start = ChopsticksState('p1', [1, 1], [1, 1])
+    >>> [count for _, count, _ in timed_perft(Chopsticks(True), start, 3)]
+    [4, 16, 64]
+    """
+    for depth in range(1, max_depth + 1):
+        start = time.perf_counter()
+        count = perft(game, state, depth)
+        yield depth, count, time.perf_counter() - start
+
+
+def _parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """Return the command line arguments of the profiler
+    """
+    parser = argparse.ArgumentParser(
+        description="Report the shape of the game tree of a starting "
+                    "position.")
+    parser.add_argument('game', help="the key of a game in playable_games")
+    parser.add_argument('values', type=int, nargs='*',
+                        help="the starting values of the game")
+    parser.add_argument('--depth', type=int,
+                        help="the deepest position explored")
+    parser.add_argument('--no-dedupe', action='store_true',
+                        help="follow every line of play, even to positions "
+                             "already reached")
+    parser.add_argument('--max-positions', type=int,
+                        default=DEFAULT_MAX_POSITIONS,
+                        help="the most positions kept in the visited set")
+    parser.add_argument('--perft', type=int, metavar='DEPTH',
+                        help="count the move sequences of each length up to "
+                             "DEPTH instead")
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """Print the report the command line args ask for
+    """
+    from game_server import make_game
+    options = _parse_args(args)
+    game = make_game(options.game, options.values)
+    if options.perft is not None:
+        for depth, count, seconds in timed_perft(game, game.current_state,
+                                                 options.perft):
+            print("perft({}) = {} in {:.3f} s ({:.0f} per second)".format(
+                depth, count, seconds, count / seconds if seconds else 0.0))
+        return
+    print(explore(game, game.current_state, options.depth,
+                  not options.no_dedupe, options.max_positions))
+
+
+if __name__ == "__main__":
+    main()